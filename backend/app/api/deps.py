@@ -1,41 +1,96 @@
+import contextvars
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.db.database import get_db
+from app.db.database import get_read_db
+from app.db.lookups import user_by_id
+from app.core.cache import get_cache
 from app.core.security import oauth2_scheme, decode_access_token
-from app.models.user import User
+from app.models.user import User, UserRole
 
+PRINCIPAL_CACHE_TTL = 60
+# Never cached, and not needed once the token has been issued
+_PRINCIPAL_EXCLUDED = {"password_hash"}
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
+
+# Set by POST /api/batch so its sub-requests reuse the already authenticated user
+batch_principal: contextvars.ContextVar[Optional[User]] = contextvars.ContextVar(
+    "batch_principal", default=None
+)
+
+
+def _principals():
+    return get_cache().namespace("principals", PRINCIPAL_CACHE_TTL)
+
+
+def _load_principal(db: Session, user_id: int):
+    user = user_by_id(db, user_id)
+    if user is None:
+        return None
+    return {
+        column.key: getattr(user, column.key)
+        for column in User.__table__.columns
+        if column.key not in _PRINCIPAL_EXCLUDED
+    }
+
+
+def forget_principal(user_id: int) -> None:
+    _principals().delete(str(user_id))
+
+
+def principal_from_token(token: str, db: Session) -> Optional[User]:
+    """The user ``token`` was issued to, or None if it is invalid or the user is gone."""
     payload = decode_access_token(token)
     if payload is None:
-        raise credentials_exception
+        return None
     
     user_id = payload.get("sub")
     if user_id is None:
-        raise credentials_exception
+        return None
     
     # Convert to integer (JWT stores it as string)
     try:
         user_id = int(user_id)
     except ValueError:
-        raise credentials_exception
+        return None
+    
+    # Detached copy of the user row, shared between requests and workers
+    principal = _principals().get_or_load(str(user_id), lambda: _load_principal(db, user_id))
+    if principal is None:
+        return None
+    
+    return User(**principal)
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_read_db)
+) -> User:
+    principal = batch_principal.get()
+    if principal is not None:
+        return principal
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = principal_from_token(token, db)
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
     return user
 
 
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    return current_user
@@ -0,0 +1,86 @@
+"""
+Response formats for the list endpoints.
+
+Every list route hands its items to ``ListEncoder.render``. Plain JSON, the
+default, still goes through the route's ``response_model``. Clients that send
+``Accept: application/msgpack`` get MessagePack instead, with datetimes as
+msgpack timestamps rather than ISO strings. Adding ``shape=columnar`` to
+either media type (``Accept: application/json; shape=columnar``) returns
+``{"columns": [...], "rows": [[...], ...]}``, so field names are sent once per
+response instead of once per item.
+"""
+from datetime import datetime, timezone
+from typing import Any, List, Sequence, Tuple, Type
+
+import msgpack
+from fastapi import Request, Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+COLUMNAR = "columnar"
+
+_SUPPORTED = {JSON: JSON, MSGPACK: MSGPACK, "application/x-msgpack": MSGPACK, "application/*": JSON, "*/*": JSON}
+
+
+def _parse_accept(header: str) -> List[Tuple[float, str, dict]]:
+    ranges = []
+    for index, part in enumerate(header.split(",")):
+        media_type, *raw_params = [piece.strip() for piece in part.split(";")]
+        params = {}
+        for raw in raw_params:
+            name, _, value = raw.partition("=")
+            params[name.strip().lower()] = value.strip().strip('"')
+        try:
+            quality = float(params.pop("q", 1))
+        except ValueError:
+            quality = 0
+        if media_type and quality > 0:
+            # Sort by quality, keeping the client's order among equals
+            ranges.append((-quality, index, media_type.lower(), params))
+    return [(-quality, media_type, params) for quality, _, media_type, params in sorted(ranges)]
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return msgpack.Timestamp.from_datetime(value)
+    raise TypeError(f"Cannot encode {type(value).__name__} as MessagePack")
+
+
+class ListEncoder:
+    def __init__(self, media_type: str = JSON, columnar: bool = False):
+        self.media_type = media_type
+        self.columnar = columnar
+
+    @classmethod
+    def from_accept(cls, header: str) -> "ListEncoder":
+        for _, media_type, params in _parse_accept(header):
+            if media_type in _SUPPORTED:
+                return cls(_SUPPORTED[media_type], params.get("shape") == COLUMNAR)
+        return cls()
+
+    def render(self, items: Sequence[Any], schema: Type[BaseModel]) -> Any:
+        """Encode ``items`` (schema instances or ORM rows) in the negotiated format."""
+        if self.media_type == JSON and not self.columnar:
+            return items
+        items = [item if isinstance(item, schema) else schema.model_validate(item) for item in items]
+        if self.columnar:
+            columns = list(schema.model_fields)
+            payload = {"columns": columns, "rows": [[getattr(item, c) for c in columns] for item in items]}
+        else:
+            payload = [item.model_dump() for item in items]
+        if self.media_type == MSGPACK:
+            body = msgpack.packb(payload, default=_msgpack_default)
+        else:
+            body = to_json(payload)
+        media_type = self.media_type + (f"; shape={COLUMNAR}" if self.columnar else "")
+        return Response(body, media_type=media_type, headers={"Vary": "Accept"})
+
+
+def list_encoder(request: Request, response: Response) -> ListEncoder:
+    # The same URL answers in several formats, so shared caches must key on Accept
+    response.headers["Vary"] = "Accept"
+    return ListEncoder.from_accept(request.headers.get("accept", ""))
@@ -0,0 +1,147 @@
+"""
+Access checks shared by the route modules, backed by the shared cache.
+
+A task, comment, document or project never moves between containers, so
+the task -> project, project -> workspace and comment/document -> workspace
+mappings are cached until the row is deleted.
+Membership answers are cached per (workspace, user) until the membership
+changes. Denials are not cached: a lagging read replica must not lock a
+newly added member out for the whole TTL.
+
+Entries are stored under versioned keys, and invalidation bumps the version
+rather than deleting the key. A check that loaded its answer before a
+concurrent revoke therefore writes it under a version nobody reads again.
+Without ``CACHE_URL`` a bump only reaches the worker that made it, so
+entries then live for ``CACHE_NEAR_TTL_SECONDS`` instead of
+``PERMISSION_CACHE_TTL``; that bounds how long a revoked member stays
+authorised in the other workers.
+"""
+from typing import Any, Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import get_cache
+from app.core.config import settings
+from app.db import lookups
+
+PERMISSION_CACHE_TTL = 300
+
+
+def _permissions():
+    cache = get_cache()
+    ttl = PERMISSION_CACHE_TTL if cache.shared is not None else settings.CACHE_NEAR_TTL_SECONDS
+    return cache.namespace("permissions", ttl)
+
+
+def _get_or_load(key: str, loader: Callable[[], Any], *scopes: str) -> Any:
+    """``loader()`` cached under ``key`` until ``_forget`` of ``key`` or of one of ``scopes``."""
+    versions = get_cache().versions(*(f"permissions:{scope}" for scope in (key, *scopes)))
+    return _permissions().get_or_load(f"{key}@{versions}", loader)
+
+
+def _forget(key: str) -> None:
+    get_cache().bump("permissions:" + key)
+
+
+def project_workspace_id(db: Session, project_id: int) -> Optional[int]:
+    return _get_or_load(
+        f"project:{project_id}",
+        lambda: lookups.project_workspace_id(db, project_id)
+    )
+
+
+def task_project_id(db: Session, task_id: int) -> Optional[int]:
+    return _get_or_load(
+        f"task:{task_id}",
+        lambda: lookups.task_project_id(db, task_id)
+    )
+
+
+def comment_workspace_id(db: Session, comment_id: int) -> Optional[int]:
+    return _get_or_load(
+        f"comment:{comment_id}",
+        lambda: lookups.comment_workspace_id(db, comment_id)
+    )
+
+
+def document_workspace_id(db: Session, document_id: int) -> Optional[int]:
+    return _get_or_load(
+        f"document:{document_id}",
+        lambda: lookups.document_workspace_id(db, document_id)
+    )
+
+
+def task_workspace_id(db: Session, task_id: int) -> Optional[int]:
+    project_id = task_project_id(db, task_id)
+    if project_id is None:
+        return None
+    return project_workspace_id(db, project_id)
+
+
+def _load_workspace_access(db: Session, workspace_id: int, user_id: int) -> Optional[bool]:
+    row = lookups.workspace_owner_and_membership(db, workspace_id, user_id)
+    if row is None:
+        return None
+    owner_id, member_id = row
+    return True if owner_id == user_id or member_id is not None else None
+
+
+def check_workspace_access(db: Session, workspace_id: int, user_id: int) -> bool:
+    return bool(_get_or_load(
+        f"access:{workspace_id}:{user_id}",
+        lambda: _load_workspace_access(db, workspace_id, user_id),
+        f"workspace:{workspace_id}"
+    ))
+
+
+def check_project_access(db: Session, project_id: int, user_id: int) -> bool:
+    workspace_id = project_workspace_id(db, project_id)
+    if workspace_id is None:
+        return False
+    return check_workspace_access(db, workspace_id, user_id)
+
+
+def check_task_access(db: Session, task_id: int, user_id: int) -> bool:
+    project_id = task_project_id(db, task_id)
+    if project_id is None:
+        return False
+    return check_project_access(db, project_id, user_id)
+
+
+def forget_membership(workspace_id: int, user_id: int) -> None:
+    _forget(f"access:{workspace_id}:{user_id}")
+
+
+def forget_project(project_id: int) -> None:
+    _forget(f"project:{project_id}")
+
+
+def forget_task(task_id: int) -> None:
+    _forget(f"task:{task_id}")
+
+
+def forget_comment(comment_id: int) -> None:
+    _forget(f"comment:{comment_id}")
+
+
+def forget_document(document_id: int) -> None:
+    _forget(f"document:{document_id}")
+
+
+def forget_workspace(workspace_id: int) -> None:
+    """Drop every member's cached access to ``workspace_id`` (it was deleted)."""
+    _forget(f"workspace:{workspace_id}")
+
+
+def touch_workspace(workspace_id: int, project_id: Optional[int] = None) -> None:
+    """Mark workspace (and project) data as changed so versioned cache entries go stale."""
+    scopes = [f"workspace:{workspace_id}"]
+    if project_id is not None:
+        scopes.append(f"project:{project_id}")
+    get_cache().bump(*scopes)
+
+
+def touch_project(db: Session, project_id: int) -> None:
+    workspace_id = project_workspace_id(db, project_id)
+    if workspace_id is not None:
+        touch_workspace(workspace_id, project_id)
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Depends
+from typing import Dict, List
+
+from app.models.user import User
+from app.core.profiling import slow_requests
+from app.api.deps import get_current_admin_user
+
+router = APIRouter()
+
+
+@router.get("/slow-requests", response_model=Dict[str, List[dict]])
+def get_slow_requests(current_user: User = Depends(get_current_admin_user)):
+    """Slowest recent requests per route template, slowest first"""
+    return slow_requests.snapshot()
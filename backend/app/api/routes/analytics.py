@@ -0,0 +1,153 @@
+"""
+Flow analytics for a project, served from the ``project_daily_flow`` rollups
+(app.db.flow) rather than from the tasks: every series is two index reads
+on (project_id, day), however many tasks the project has. Rollups trail the
+live board by up to one rollup interval.
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterator, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db.database import get_read_db
+from app.models.flow import ProjectDailyFlow
+from app.models.user import User
+from app.schemas.analytics import (
+    MAX_ANALYTICS_DAYS, Burndown, BurndownDay, CumulativeFlow, CycleTime, CycleTimeDay, FlowDay
+)
+from app.api.deps import get_current_user
+from app.api.permissions import check_workspace_access, project_workspace_id
+
+router = APIRouter()
+
+DEFAULT_ANALYTICS_DAYS = 30
+
+_STATUSES = ("todo", "in_progress", "review", "done")
+
+
+def _check_access(db: Session, project_id: int, user_id: int) -> None:
+    workspace_id = project_workspace_id(db, project_id)
+    if workspace_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    if not check_workspace_access(db, workspace_id, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this project"
+        )
+
+
+def _date_range(start: Optional[date], end: Optional[date]) -> Tuple[date, date]:
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=DEFAULT_ANALYTICS_DAYS - 1)
+    if start > end or (end - start).days >= MAX_ANALYTICS_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"start must not be after end, and the range at most {MAX_ANALYTICS_DAYS} days"
+        )
+    return start, end
+
+
+def _daily_flow(
+    db: Session, project_id: int, start: date, end: date
+) -> Iterator[Tuple[date, Dict[str, int], Optional[ProjectDailyFlow]]]:
+    """
+    Yield (day, status counts at the end of the day, that day's rollup row or
+    None) for every day from ``start`` to ``end``.
+    """
+    baseline = db.execute(
+        select(*(func.coalesce(func.sum(getattr(ProjectDailyFlow, name)), 0) for name in _STATUSES))
+        .where(ProjectDailyFlow.project_id == project_id, ProjectDailyFlow.day < start)
+    ).one()
+    counts = dict(zip(_STATUSES, baseline))
+    rows = {
+        row.day: row
+        for row in db.scalars(
+            select(ProjectDailyFlow).where(
+                ProjectDailyFlow.project_id == project_id,
+                ProjectDailyFlow.day >= start,
+                ProjectDailyFlow.day <= end
+            )
+        )
+    }
+    day = start
+    while day <= end:
+        row = rows.get(day)
+        if row is not None:
+            for name in _STATUSES:
+                counts[name] += getattr(row, name)
+        yield day, dict(counts), row
+        day += timedelta(days=1)
+
+
+@router.get("/{project_id}/analytics/cumulative-flow", response_model=CumulativeFlow)
+def get_cumulative_flow(
+    project_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Tasks in each status at the end of every day in the range (default: the last 30 days)."""
+    _check_access(db, project_id, current_user.id)
+    start, end = _date_range(start, end)
+    
+    return CumulativeFlow(
+        project_id=project_id,
+        days=[FlowDay(day=day, **counts) for day, counts, _ in _daily_flow(db, project_id, start, end)]
+    )
+
+
+@router.get("/{project_id}/analytics/burndown", response_model=Burndown)
+def get_burndown(
+    project_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    _check_access(db, project_id, current_user.id)
+    start, end = _date_range(start, end)
+    
+    days = []
+    for day, counts, _ in _daily_flow(db, project_id, start, end):
+        remaining = counts["todo"] + counts["in_progress"] + counts["review"]
+        days.append(BurndownDay(
+            day=day, remaining=remaining, completed=counts["done"], scope=remaining + counts["done"]
+        ))
+    return Burndown(project_id=project_id, days=days)
+
+
+@router.get("/{project_id}/analytics/cycle-time", response_model=CycleTime)
+def get_cycle_time(
+    project_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Daily throughput and average cycle time (first leaving TODO to done)."""
+    _check_access(db, project_id, current_user.id)
+    start, end = _date_range(start, end)
+    
+    days = []
+    total_seconds = total_count = 0
+    for day, _, row in _daily_flow(db, project_id, start, end):
+        if row is None or row.cycle_time_count == 0:
+            average = None
+        else:
+            average = row.cycle_time_seconds / row.cycle_time_count / 3600
+            total_seconds += row.cycle_time_seconds
+            total_count += row.cycle_time_count
+        days.append(CycleTimeDay(
+            day=day, throughput=row.completed if row is not None else 0, average_cycle_time_hours=average
+        ))
+    return CycleTime(
+        project_id=project_id,
+        days=days,
+        average_cycle_time_hours=total_seconds / total_count / 3600 if total_count else None
+    )
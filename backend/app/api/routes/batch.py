@@ -0,0 +1,159 @@
+"""
+``POST /api/batch``: several API calls in one round trip.
+
+Sub-requests are dispatched in-process to the application's router and
+share the batch's authenticated user. The middleware stack already ran for
+the batch request itself, so two of its jobs are repeated per item: every
+item takes a token from the rate-limit bucket it would use on its own (the
+whole batch is refused with 429 when one does not fit), and every item is
+recorded in the per-route request metrics. Items read from the primary,
+like any other part of a write request. Writes run one at a time, in order, in a
+single shared session; a failed write is rolled back before the next item.
+Each run of consecutive GETs is dispatched concurrently. Those reads use
+their own read sessions, which hold a connection only per statement, because
+one session cannot be used from several threads. Items never see each
+other's failures: every item gets its own status and body.
+"""
+import asyncio
+import json
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+from starlette.types import Message, Scope
+
+from app.db.database import SessionLocal, batch_session
+from app.models.user import User
+from app.schemas.batch import BatchRequest, BatchRequestItem, BatchResponse, BatchResponseItem
+from app.api.deps import batch_principal, get_current_user
+from app.core.instrumentation import RequestMetricsMiddleware
+from app.core.rate_limit import ADMISSION_SCOPE_KEY, retry_after_header
+
+router = APIRouter()
+
+_BATCH_PATH = "/api/batch"
+
+
+def _sub_scope(request: Request, item: BatchRequestItem, body: bytes) -> Optional[Scope]:
+    """The ASGI scope ``item`` would have had as a request of its own, or None if its path is not allowed."""
+    path, _, query = item.path.partition("?")
+    if not path.startswith("/api/") or path.rstrip("/") == _BATCH_PATH:
+        return None
+
+    headers = [
+        (b"accept", b"application/json"),
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+    ]
+    authorization = request.headers.get("authorization")
+    if authorization:
+        headers.append((b"authorization", authorization.encode("latin-1")))
+
+    scope = {
+        key: value for key, value in request.scope.items()
+        if key not in ("route", "endpoint", "path_params", "router")
+    }
+    scope.update(
+        method=item.method,
+        path=path,
+        raw_path=path.encode(),
+        query_string=query.encode(),
+        headers=headers,
+    )
+    return scope
+
+
+async def _charge(request: Request, items: List[BatchRequestItem]) -> None:
+    """Take one rate-limit token per item; 429 for the whole batch once one does not fit."""
+    admission = request.scope.get(ADMISSION_SCOPE_KEY)
+    if admission is None:
+        return
+    for item in items:
+        scope = _sub_scope(request, item, b"")
+        if scope is None:
+            continue
+        retry_after = await admission.charge(scope)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": retry_after_header(retry_after)}
+            )
+
+
+async def _dispatch(request: Request, item: BatchRequestItem) -> BatchResponseItem:
+    body = b"" if item.body is None else json.dumps(item.body).encode()
+    scope = _sub_scope(request, item, body)
+    if scope is None:
+        return BatchResponseItem(status=status.HTTP_400_BAD_REQUEST, body={"detail": "Invalid batch path"})
+
+    received = False
+
+    async def receive() -> Message:
+        nonlocal received
+        if received:
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    response: dict = {"status": 500, "body": []}
+
+    async def send(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+
+    try:
+        await RequestMetricsMiddleware(request.app.router)(scope, receive, send)
+    except Exception:
+        return BatchResponseItem(status=status.HTTP_500_INTERNAL_SERVER_ERROR, body={"detail": "Internal server error"})
+
+    content = b"".join(response["body"])
+    try:
+        body = json.loads(content) if content else None
+    except ValueError:
+        body = content.decode("utf-8", "replace")
+    return BatchResponseItem(status=response["status"], body=body)
+
+
+def _group(items: List[BatchRequestItem]) -> List[Tuple[bool, List[Tuple[int, BatchRequestItem]]]]:
+    """Split the batch into (is_read, [(index, item), ...]) runs, preserving order."""
+    groups: List[Tuple[bool, List[Tuple[int, BatchRequestItem]]]] = []
+    for index, item in enumerate(items):
+        is_read = item.method == "GET"
+        if groups and is_read and groups[-1][0]:
+            groups[-1][1].append((index, item))
+        else:
+            groups.append((is_read, [(index, item)]))
+    return groups
+
+
+@router.post("/", response_model=BatchResponse)
+async def run_batch(
+    batch: BatchRequest,
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    await _charge(request, batch.requests)
+    results: List[Optional[BatchResponseItem]] = [None] * len(batch.requests)
+    db = SessionLocal()
+    principal_token = batch_principal.set(current_user)
+    session_token = batch_session.set(db)
+    try:
+        for is_read, group in _group(batch.requests):
+            if is_read:
+                responses = await asyncio.gather(*(_dispatch(request, item) for _, item in group))
+                for (index, _), result in zip(group, responses):
+                    results[index] = result
+                continue
+            index, item = group[0]
+            results[index] = await _dispatch(request, item)
+            if results[index].status >= 400:
+                await run_in_threadpool(db.rollback)
+    finally:
+        batch_session.reset(session_token)
+        batch_principal.reset(principal_token)
+        await run_in_threadpool(db.close)
+
+    return BatchResponse(responses=results)
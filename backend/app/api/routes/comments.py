@@ -1,48 +1,29 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from typing import List
 
-from app.db.database import get_db
+from app.db.activity import record
+from app.db.counters import adjust_comment_count
+from app.db.database import get_db, get_read_db
+from app.db.lookups import comment_by_id, comment_with_author_by_id
 from app.models.user import User
-from app.models.workspace import Workspace, WorkspaceMember
-from app.models.project import Project
-from app.models.task import Task
 from app.models.comment import Comment
 from app.schemas.comment import CommentCreate, CommentUpdate, CommentResponse
 from app.api.deps import get_current_user
+from app.api.encoding import ListEncoder, list_encoder
+from app.api.permissions import (
+    check_task_access, comment_workspace_id, forget_comment, task_project_id, task_workspace_id, touch_project
+)
 
 router = APIRouter()
 
 
-def check_task_access(db: Session, task_id: int, user_id: int) -> bool:
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
-        return False
-    
-    project = db.query(Project).filter(Project.id == task.project_id).first()
-    if not project:
-        return False
-    
-    workspace = db.query(Workspace).filter(Workspace.id == project.workspace_id).first()
-    if not workspace:
-        return False
-    
-    if workspace.owner_id == user_id:
-        return True
-    
-    member = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == workspace.id,
-        WorkspaceMember.user_id == user_id
-    ).first()
-    
-    return member is not None
-
-
 @router.get("/", response_model=List[CommentResponse])
 def get_comments(
     task_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+    encoder: ListEncoder = Depends(list_encoder)
 ):
     if not check_task_access(db, task_id, current_user.id):
         raise HTTPException(
@@ -50,7 +31,10 @@ def get_comments(
             detail="Not authorized to access this task's comments"
         )
     
-    comments = db.query(Comment).filter(Comment.task_id == task_id).order_by(Comment.created_at).all()
+    comments = db.query(Comment).options(joinedload(Comment.user)).filter(
+        Comment.workspace_id == task_workspace_id(db, task_id),
+        Comment.task_id == task_id
+    ).order_by(Comment.created_at).all()
     
     result = []
     for comment in comments:
@@ -63,7 +47,7 @@ def get_comments(
             user_name=comment.user.display_name if comment.user else None
         ))
     
-    return result
+    return encoder.render(result, CommentResponse)
 
 
 @router.post("/", response_model=CommentResponse, status_code=status.HTTP_201_CREATED)
@@ -79,13 +63,22 @@ def create_comment(
         )
     
     comment = Comment(
+        workspace_id=task_workspace_id(db, comment_data.task_id),
         task_id=comment_data.task_id,
         user_id=current_user.id,
         content=comment_data.content
     )
     db.add(comment)
+    db.flush()
+    project_id = task_project_id(db, comment.task_id)
+    adjust_comment_count(db, comment.workspace_id, comment.task_id, 1)
+    record(
+        db, comment.workspace_id, current_user.id, "comment.created", comment.id, project_id,
+        task_id=comment.task_id
+    )
     db.commit()
-    db.refresh(comment)
+    # Board cards carry the comment count
+    touch_project(db, project_id)
     
     return CommentResponse(
         id=comment.id,
@@ -104,7 +97,7 @@ def update_comment(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    comment = comment_with_author_by_id(db, comment_workspace_id(db, comment_id), comment_id)
     if not comment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -120,9 +113,13 @@ def update_comment(
     update_data = comment_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(comment, field, value)
+    if update_data:
+        record(
+            db, comment.workspace_id, current_user.id, "comment.updated", comment.id,
+            task_project_id(db, comment.task_id), task_id=comment.task_id, fields=sorted(update_data)
+        )
     
     db.commit()
-    db.refresh(comment)
     
     return CommentResponse(
         id=comment.id,
@@ -140,7 +137,7 @@ def delete_comment(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    comment = comment_by_id(db, comment_workspace_id(db, comment_id), comment_id)
     if not comment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -153,6 +150,14 @@ def delete_comment(
             detail="Only comment author can delete"
         )
     
+    project_id = task_project_id(db, comment.task_id)
     db.delete(comment)
+    adjust_comment_count(db, comment.workspace_id, comment.task_id, -1)
+    record(
+        db, comment.workspace_id, current_user.id, "comment.deleted", comment_id, project_id,
+        task_id=comment.task_id
+    )
     db.commit()
+    forget_comment(comment_id)
+    touch_project(db, project_id)
     return None
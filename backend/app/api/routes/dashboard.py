@@ -1,19 +1,30 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
-from datetime import datetime, timedelta
+from sqlalchemy import case, func, or_, select
+from collections import Counter as Tally
+from typing import Dict, List, Tuple
+from datetime import datetime, timedelta, timezone
 from pydantic import BaseModel
 
-from app.db.database import get_db
+from app.db.activity import recent_activity
+from app.db.database import get_read_db
+from app.db.purge import pending_project_ids
 from app.models.user import User
 from app.models.workspace import Workspace, WorkspaceMember
 from app.models.project import Project
-from app.models.task import Task, TaskStatus, TaskPriority
+from app.models.task import Task, TaskStatus, TaskPriority, open_with_due_date
+from app.schemas.activity import ActivityEventResponse
 from app.api.deps import get_current_user
+from app.api.permissions import check_workspace_access
+from app.core.cache import get_cache
+from app.core.config import settings
 
 router = APIRouter()
 
+# Entries are also keyed by workspace data versions, so the TTL only bounds
+# how stale the time-dependent overdue / due-soon counts can get.
+DASHBOARD_CACHE_TTL = 30
+
 
 class TaskStats(BaseModel):
     total: int
@@ -38,7 +49,7 @@ class WorkspaceStats(BaseModel):
     total_tasks: int
     task_stats: TaskStats
     priority_stats: PriorityStats
-    recent_activity: List[dict]
+    recent_activity: List[ActivityEventResponse]
 
 
 class DashboardStats(BaseModel):
@@ -52,129 +63,158 @@ class DashboardStats(BaseModel):
     workspaces: List[WorkspaceStats]
 
 
-def check_workspace_access(db: Session, workspace_id: int, user_id: int) -> bool:
-    workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
-    if not workspace:
-        return False
-    
-    if workspace.owner_id == user_id:
-        return True
-    
-    member = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == workspace_id,
-        WorkspaceMember.user_id == user_id
-    ).first()
-    
-    return member is not None
+def _deadline_counts(db: Session, workspace_ids: List[int]) -> Dict[int, Tuple[int, int]]:
+    """(overdue, due soon) open-task counts per workspace, from the partial due-date index."""
+    if not workspace_ids:
+        return {}
+    now = datetime.now(timezone.utc)
+    soon = now + timedelta(days=settings.DUE_SOON_DAYS)
+    rows = db.execute(
+        select(
+            Task.workspace_id,
+            func.count(case((Task.due_date < now, 1))),
+            func.count(case((Task.due_date >= now, 1)))
+        ).where(
+            Task.workspace_id.in_(workspace_ids),
+            open_with_due_date(),
+            Task.due_date <= soon,
+            Task.project_id.not_in(pending_project_ids(Project.workspace_id.in_(workspace_ids)))
+        ).group_by(Task.workspace_id)
+    ).all()
+    return {workspace_id: (overdue, due_soon) for workspace_id, overdue, due_soon in rows}
+
+
+def _task_counts(db: Session, workspace_ids: List[int], user_id: int) -> Dict[int, List[tuple]]:
+    """
+    ``(status, priority, tasks, assigned to user_id)`` rows per workspace,
+    counted with one ``GROUP BY`` instead of loading the tasks.
+    """
+    if not workspace_ids:
+        return {}
+    rows = db.execute(
+        select(
+            Task.workspace_id,
+            Task.status,
+            Task.priority,
+            func.count(),
+            func.count(case((Task.assignee_id == user_id, 1)))
+        ).where(
+            Task.workspace_id.in_(workspace_ids),
+            Task.project_id.not_in(pending_project_ids(Project.workspace_id.in_(workspace_ids)))
+        ).group_by(Task.workspace_id, Task.status, Task.priority)
+    ).all()
+    counts: Dict[int, List[tuple]] = {}
+    for workspace_id, *row in rows:
+        counts.setdefault(workspace_id, []).append(tuple(row))
+    return counts
+
+
+def _task_stats(rows: List[tuple], overdue: int) -> TaskStats:
+    by_status = Tally()
+    for task_status, _, count, _ in rows:
+        by_status[task_status] += count
+    return TaskStats(
+        total=sum(by_status.values()),
+        todo=by_status[TaskStatus.TODO],
+        in_progress=by_status[TaskStatus.IN_PROGRESS],
+        review=by_status[TaskStatus.REVIEW],
+        done=by_status[TaskStatus.DONE],
+        overdue=overdue
+    )
+
+
+def _priority_stats(rows: List[tuple]) -> PriorityStats:
+    by_priority = Tally()
+    for _, priority, count, _ in rows:
+        by_priority[priority] += count
+    return PriorityStats(
+        low=by_priority[TaskPriority.LOW],
+        medium=by_priority[TaskPriority.MEDIUM],
+        high=by_priority[TaskPriority.HIGH],
+        urgent=by_priority[TaskPriority.URGENT]
+    )
 
 
 @router.get("/stats", response_model=DashboardStats)
 def get_dashboard_stats(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     # Get accessible workspaces
-    owned_workspaces = db.query(Workspace).filter(Workspace.owner_id == current_user.id).all()
-    
-    member_workspace_ids = db.query(WorkspaceMember.workspace_id).filter(
+    member_workspace_ids = select(WorkspaceMember.workspace_id).where(
         WorkspaceMember.user_id == current_user.id
-    ).all()
-    member_workspace_ids = [w[0] for w in member_workspace_ids]
-    
-    member_workspaces = db.query(Workspace).filter(
-        Workspace.id.in_(member_workspace_ids)
-    ).all() if member_workspace_ids else []
-    
-    all_workspaces = {w.id: w for w in owned_workspaces + member_workspaces}
-    workspaces = list(all_workspaces.values())
-    workspace_ids = list(all_workspaces.keys())
+    )
+    workspace_ids = sorted(w[0] for w in db.query(Workspace.id).filter(
+        or_(Workspace.owner_id == current_user.id, Workspace.id.in_(member_workspace_ids)),
+        Workspace.deleted_at.is_(None)
+    ).all())
+    
+    cache = get_cache()
+    dashboard_cache = cache.namespace("dashboard", DASHBOARD_CACHE_TTL)
+    cache_key = f"user:{current_user.id}:{cache.versions(*(f'workspace:{w}' for w in workspace_ids))}"
+    cached = dashboard_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    workspaces = db.query(Workspace).filter(
+        Workspace.id.in_(workspace_ids)
+    ).all() if workspace_ids else []
     
     # Get all projects
-    projects = db.query(Project).filter(Project.workspace_id.in_(workspace_ids)).all()
-    project_ids = [p.id for p in projects]
+    projects = db.query(Project).filter(
+        Project.workspace_id.in_(workspace_ids),
+        Project.deleted_at.is_(None)
+    ).all()
     
-    # Get all tasks
-    tasks = db.query(Task).filter(Task.project_id.in_(project_ids)).all() if project_ids else []
+    # Status / priority breakdown, counted in the database
+    task_counts = _task_counts(db, workspace_ids, current_user.id)
+    all_rows = [row for rows in task_counts.values() for row in rows]
     
-    now = datetime.utcnow()
-    soon = now + timedelta(days=7)
+    activity = recent_activity(db, workspace_ids, 5)
+    deadlines = _deadline_counts(db, workspace_ids)
     
     # Calculate overall stats
-    total_tasks = len(tasks)
-    my_tasks = len([t for t in tasks if t.assignee_id == current_user.id])
-    overdue_tasks = len([t for t in tasks if t.due_date and t.due_date < now and t.status != TaskStatus.DONE])
-    tasks_due_soon = len([t for t in tasks if t.due_date and now <= t.due_date <= soon and t.status != TaskStatus.DONE])
+    my_tasks = sum(mine for _, _, _, mine in all_rows)
+    overdue_tasks = sum(overdue for overdue, _ in deadlines.values())
+    tasks_due_soon = sum(due_soon for _, due_soon in deadlines.values())
     
-    task_stats = TaskStats(
-        total=total_tasks,
-        todo=len([t for t in tasks if t.status == TaskStatus.TODO]),
-        in_progress=len([t for t in tasks if t.status == TaskStatus.IN_PROGRESS]),
-        review=len([t for t in tasks if t.status == TaskStatus.REVIEW]),
-        done=len([t for t in tasks if t.status == TaskStatus.DONE]),
-        overdue=overdue_tasks
-    )
+    task_stats = _task_stats(all_rows, overdue_tasks)
     
     # Per-workspace stats
     workspace_stats = []
     for workspace in workspaces:
         ws_projects = [p for p in projects if p.workspace_id == workspace.id]
-        ws_project_ids = [p.id for p in ws_projects]
-        ws_tasks = [t for t in tasks if t.project_id in ws_project_ids]
-        
-        ws_task_stats = TaskStats(
-            total=len(ws_tasks),
-            todo=len([t for t in ws_tasks if t.status == TaskStatus.TODO]),
-            in_progress=len([t for t in ws_tasks if t.status == TaskStatus.IN_PROGRESS]),
-            review=len([t for t in ws_tasks if t.status == TaskStatus.REVIEW]),
-            done=len([t for t in ws_tasks if t.status == TaskStatus.DONE]),
-            overdue=len([t for t in ws_tasks if t.due_date and t.due_date < now and t.status != TaskStatus.DONE])
-        )
-        
-        priority_stats = PriorityStats(
-            low=len([t for t in ws_tasks if t.priority == TaskPriority.LOW]),
-            medium=len([t for t in ws_tasks if t.priority == TaskPriority.MEDIUM]),
-            high=len([t for t in ws_tasks if t.priority == TaskPriority.HIGH]),
-            urgent=len([t for t in ws_tasks if t.priority == TaskPriority.URGENT])
-        )
-        
-        # Recent activity (last 5 tasks)
-        recent_tasks = sorted(ws_tasks, key=lambda t: t.created_at, reverse=True)[:5]
-        recent_activity = [
-            {
-                "task_id": t.id,
-                "task_title": t.title,
-                "status": t.status.value,
-                "created_at": t.created_at.isoformat()
-            }
-            for t in recent_tasks
-        ]
+        ws_rows = task_counts.get(workspace.id, [])
+        ws_task_stats = _task_stats(ws_rows, deadlines.get(workspace.id, (0, 0))[0])
         
         workspace_stats.append(WorkspaceStats(
             workspace_id=workspace.id,
             workspace_name=workspace.name,
             total_projects=len(ws_projects),
-            total_tasks=len(ws_tasks),
+            total_tasks=ws_task_stats.total,
             task_stats=ws_task_stats,
-            priority_stats=priority_stats,
-            recent_activity=recent_activity
+            priority_stats=_priority_stats(ws_rows),
+            recent_activity=activity.get(workspace.id, [])
         ))
     
-    return DashboardStats(
+    stats = DashboardStats(
         total_workspaces=len(workspaces),
         total_projects=len(projects),
-        total_tasks=total_tasks,
+        total_tasks=task_stats.total,
         my_tasks=my_tasks,
         overdue_tasks=overdue_tasks,
         tasks_due_soon=tasks_due_soon,
         task_stats=task_stats,
         workspaces=workspace_stats
     )
+    dashboard_cache.set(cache_key, stats)
+    return stats
 
 
 @router.get("/workspace/{workspace_id}/stats", response_model=WorkspaceStats)
 def get_workspace_stats(
     workspace_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     if not check_workspace_access(db, workspace_id, current_user.id):
@@ -183,47 +223,31 @@ def get_workspace_stats(
             detail="Not authorized to access this workspace"
         )
     
-    workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
-    projects = db.query(Project).filter(Project.workspace_id == workspace_id).all()
-    project_ids = [p.id for p in projects]
+    cache = get_cache()
+    dashboard_cache = cache.namespace("dashboard", DASHBOARD_CACHE_TTL)
+    cache_key = f"workspace:{workspace_id}:{cache.versions(f'workspace:{workspace_id}')}"
+    cached = dashboard_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
-    tasks = db.query(Task).filter(Task.project_id.in_(project_ids)).all() if project_ids else []
-    
-    now = datetime.utcnow()
-    
-    task_stats = TaskStats(
-        total=len(tasks),
-        todo=len([t for t in tasks if t.status == TaskStatus.TODO]),
-        in_progress=len([t for t in tasks if t.status == TaskStatus.IN_PROGRESS]),
-        review=len([t for t in tasks if t.status == TaskStatus.REVIEW]),
-        done=len([t for t in tasks if t.status == TaskStatus.DONE]),
-        overdue=len([t for t in tasks if t.due_date and t.due_date < now and t.status != TaskStatus.DONE])
-    )
-    
-    priority_stats = PriorityStats(
-        low=len([t for t in tasks if t.priority == TaskPriority.LOW]),
-        medium=len([t for t in tasks if t.priority == TaskPriority.MEDIUM]),
-        high=len([t for t in tasks if t.priority == TaskPriority.HIGH]),
-        urgent=len([t for t in tasks if t.priority == TaskPriority.URGENT])
-    )
+    workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
+    projects = db.query(Project).filter(
+        Project.workspace_id == workspace_id,
+        Project.deleted_at.is_(None)
+    ).all()
+    rows = _task_counts(db, [workspace_id], current_user.id).get(workspace_id, [])
     
-    recent_tasks = sorted(tasks, key=lambda t: t.created_at, reverse=True)[:10]
-    recent_activity = [
-        {
-            "task_id": t.id,
-            "task_title": t.title,
-            "status": t.status.value,
-            "created_at": t.created_at.isoformat()
-        }
-        for t in recent_tasks
-    ]
+    overdue, _ = _deadline_counts(db, [workspace_id]).get(workspace_id, (0, 0))
+    task_stats = _task_stats(rows, overdue)
     
-    return WorkspaceStats(
+    stats = WorkspaceStats(
         workspace_id=workspace.id,
         workspace_name=workspace.name,
         total_projects=len(projects),
-        total_tasks=len(tasks),
+        total_tasks=task_stats.total,
         task_stats=task_stats,
-        priority_stats=priority_stats,
-        recent_activity=recent_activity
+        priority_stats=_priority_stats(rows),
+        recent_activity=recent_activity(db, [workspace_id], 10).get(workspace_id, [])
     )
+    dashboard_cache.set(cache_key, stats)
+    return stats
@@ -1,43 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from typing import List
 
-from app.db.database import get_db
+from app.db.activity import record
+from app.db.database import get_db, get_read_db
+from app.db.lookups import document_by_id, document_with_creator_by_id
 from app.models.user import User
-from app.models.workspace import Workspace, WorkspaceMember
-from app.models.project import Project
 from app.models.document import Document
 from app.schemas.document import DocumentCreate, DocumentUpdate, DocumentResponse
 from app.api.deps import get_current_user
+from app.api.encoding import ListEncoder, list_encoder
+from app.api.permissions import check_project_access, document_workspace_id, forget_document, project_workspace_id
 
 router = APIRouter()
 
 
-def check_project_access(db: Session, project_id: int, user_id: int) -> bool:
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
-        return False
-    
-    workspace = db.query(Workspace).filter(Workspace.id == project.workspace_id).first()
-    if not workspace:
-        return False
-    
-    if workspace.owner_id == user_id:
-        return True
-    
-    member = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == workspace.id,
-        WorkspaceMember.user_id == user_id
-    ).first()
-    
-    return member is not None
-
-
 @router.get("/", response_model=List[DocumentResponse])
 def get_documents(
     project_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+    encoder: ListEncoder = Depends(list_encoder)
 ):
     if not check_project_access(db, project_id, current_user.id):
         raise HTTPException(
@@ -45,7 +28,10 @@ def get_documents(
             detail="Not authorized to access this project's documents"
         )
     
-    documents = db.query(Document).filter(Document.project_id == project_id).order_by(Document.created_at.desc()).all()
+    documents = db.query(Document).options(joinedload(Document.created_by_user)).filter(
+        Document.workspace_id == project_workspace_id(db, project_id),
+        Document.project_id == project_id
+    ).order_by(Document.created_at.desc()).all()
     
     result = []
     for doc in documents:
@@ -60,7 +46,7 @@ def get_documents(
             creator_name=doc.created_by_user.display_name if doc.created_by_user else None
         ))
     
-    return result
+    return encoder.render(result, DocumentResponse)
 
 
 @router.post("/", response_model=DocumentResponse, status_code=status.HTTP_201_CREATED)
@@ -76,14 +62,19 @@ def create_document(
         )
     
     document = Document(
+        workspace_id=project_workspace_id(db, document_data.project_id),
         project_id=document_data.project_id,
         title=document_data.title,
         content=document_data.content,
         created_by=current_user.id
     )
     db.add(document)
+    db.flush()
+    record(
+        db, document.workspace_id, current_user.id, "document.created", document.id, document.project_id,
+        title=document.title
+    )
     db.commit()
-    db.refresh(document)
     
     return DocumentResponse(
         id=document.id,
@@ -100,10 +91,10 @@ def create_document(
 @router.get("/{document_id}", response_model=DocumentResponse)
 def get_document(
     document_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    document = db.query(Document).filter(Document.id == document_id).first()
+    document = document_with_creator_by_id(db, document_workspace_id(db, document_id), document_id)
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -135,7 +126,7 @@ def update_document(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    document = db.query(Document).filter(Document.id == document_id).first()
+    document = document_with_creator_by_id(db, document_workspace_id(db, document_id), document_id)
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -151,9 +142,13 @@ def update_document(
     update_data = document_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(document, field, value)
+    if update_data:
+        record(
+            db, document.workspace_id, current_user.id, "document.updated", document.id, document.project_id,
+            title=document.title, fields=sorted(update_data)
+        )
     
     db.commit()
-    db.refresh(document)
     
     return DocumentResponse(
         id=document.id,
@@ -173,7 +168,7 @@ def delete_document(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    document = db.query(Document).filter(Document.id == document_id).first()
+    document = document_by_id(db, document_workspace_id(db, document_id), document_id)
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -187,5 +182,10 @@ def delete_document(
         )
     
     db.delete(document)
+    record(
+        db, document.workspace_id, current_user.id, "document.deleted", document_id, document.project_id,
+        title=document.title
+    )
     db.commit()
+    forget_document(document_id)
     return None
@@ -1,40 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import and_, func, literal, or_, select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.db.database import get_db
+from app.db.counters import adjust_project_count
+from app.db.database import get_db, get_read_db
+from app.db.lookups import project_by_id
 from app.models.user import User
 from app.models.workspace import Workspace, WorkspaceMember
 from app.models.project import Project
+from app.models.task import Task, TaskStatus
+from app.schemas.board import MAX_BOARD_COLUMN_LIMIT, BoardCard, BoardColumn, BoardResponse, BoardUser
 from app.schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse
 from app.api.deps import get_current_user
+from app.api.encoding import ListEncoder, list_encoder
+from app.api.permissions import check_workspace_access, forget_project, project_workspace_id, touch_workspace
+from app.api.routes.tasks import BOARD_CACHE_TTL
+from app.core.cache import get_cache
+from app.core.config import settings
+from app.core.jobs import enqueue
 
 router = APIRouter()
 
+# Tasks written without a status (the column is nullable) are shown as TODO
+_BOARD_STATUS = func.coalesce(Task.status, literal(TaskStatus.TODO, Task.status.type))
 
-def check_workspace_access(db: Session, workspace_id: int, user_id: int) -> bool:
-    workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
-    if not workspace:
-        return False
-    
-    if workspace.owner_id == user_id:
-        return True
-    
-    member = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == workspace_id,
-        WorkspaceMember.user_id == user_id
-    ).first()
-    
-    return member is not None
+_BOARD_CARD_COLUMNS = (
+    Task.id, _BOARD_STATUS.label("status"), Task.title, Task.description, Task.priority, Task.due_date,
+    Task.position, Task.assignee_id, Task.created_by, Task.comment_count, Task.created_at,
+    Task.parent_id, Task.subtask_count, Task.subtasks_done
+)
 
 
 @router.get("/", response_model=List[ProjectResponse])
 def get_projects(
     workspace_id: int = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+    encoder: ListEncoder = Depends(list_encoder)
 ):
-    query = db.query(Project)
+    query = db.query(Project).filter(Project.deleted_at.is_(None))
     
     if workspace_id:
         if not check_workspace_access(db, workspace_id, current_user.id):
@@ -46,17 +51,19 @@ def get_projects(
     else:
         # Get all projects from workspaces user has access to
         owned_workspaces = db.query(Workspace.id).filter(
-            Workspace.owner_id == current_user.id
+            Workspace.owner_id == current_user.id,
+            Workspace.deleted_at.is_(None)
         ).all()
         
-        member_workspaces = db.query(WorkspaceMember.workspace_id).filter(
-            WorkspaceMember.user_id == current_user.id
+        member_workspaces = db.query(WorkspaceMember.workspace_id).join(Workspace).filter(
+            WorkspaceMember.user_id == current_user.id,
+            Workspace.deleted_at.is_(None)
         ).all()
         
         workspace_ids = [w[0] for w in owned_workspaces + member_workspaces]
         query = query.filter(Project.workspace_id.in_(workspace_ids))
     
-    return query.all()
+    return encoder.render(query.all(), ProjectResponse)
 
 
 @router.post("/", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
@@ -73,18 +80,19 @@ def create_project(
     
     project = Project(**project_data.model_dump())
     db.add(project)
+    adjust_project_count(db, project.workspace_id, 1)
     db.commit()
-    db.refresh(project)
+    touch_workspace(project.workspace_id)
     return project
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
 def get_project(
     project_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = project_by_id(db, project_id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -100,6 +108,123 @@ def get_project(
     return project
 
 
+def _parse_board_cursor(cursor: str):
+    position, _, task_id = cursor.partition(":")
+    try:
+        return int(position), int(task_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+@router.get("/{project_id}/board", response_model=BoardResponse)
+def get_project_board(
+    project_id: int,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_BOARD_COLUMN_LIMIT),
+    column: Optional[TaskStatus] = None,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    The whole Kanban board in three queries: the project, its cards and the
+    people on them. ``limit`` caps every column; ``column`` with ``cursor``
+    pages through a single column.
+    """
+    if cursor is not None and column is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cursor requires column"
+        )
+    
+    workspace_id = project_workspace_id(db, project_id)
+    if workspace_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    if not check_workspace_access(db, workspace_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this project"
+        )
+    
+    # Same namespace and versions as the task-list board cache
+    cache = get_cache()
+    board_cache = cache.namespace("board", BOARD_CACHE_TTL)
+    board_key = (
+        f"snapshot:{project_id}:{column.value if column else ''}:{limit or ''}:{cursor or ''}:"
+        f"{cache.versions(f'project:{project_id}', 'users')}"
+    )
+    cached = board_cache.get(board_key)
+    if cached is not None:
+        return cached
+    
+    project = project_by_id(db, project_id)
+    query = select(*_BOARD_CARD_COLUMNS).where(
+        Task.workspace_id == workspace_id,
+        Task.project_id == project_id
+    )
+    if column is not None:
+        query = query.where(_BOARD_STATUS == column)
+    if cursor is not None:
+        position, task_id = _parse_board_cursor(cursor)
+        query = query.where(or_(
+            Task.position > position,
+            and_(Task.position == position, Task.id > task_id)
+        ))
+    if limit:
+        # One extra card per column tells us whether the column continues
+        rank = func.row_number().over(
+            partition_by=_BOARD_STATUS, order_by=(Task.position, Task.id)
+        ).label("rank")
+        ranked = query.add_columns(rank).subquery()
+        query = select(ranked).where(ranked.c.rank <= limit + 1).order_by(
+            ranked.c.status, ranked.c.position, ranked.c.id
+        )
+    else:
+        query = query.order_by(_BOARD_STATUS, Task.position, Task.id)
+    rows = db.execute(query).all()
+    
+    cards = {s: [] for s in ([column] if column else TaskStatus)}
+    for row in rows:
+        cards[row.status].append(row)
+    
+    columns = {}
+    user_ids = set()
+    for task_status, column_rows in cards.items():
+        next_cursor = None
+        if limit and len(column_rows) > limit:
+            column_rows = column_rows[:limit]
+            next_cursor = f"{column_rows[-1].position}:{column_rows[-1].id}"
+        user_ids.update(row.assignee_id for row in column_rows if row.assignee_id)
+        user_ids.update(row.created_by for row in column_rows)
+        columns[task_status] = BoardColumn(
+            tasks=[BoardCard.model_validate(row) for row in column_rows],
+            next_cursor=next_cursor
+        )
+    
+    users = {}
+    if user_ids:
+        users = {
+            user.id: BoardUser.model_validate(user)
+            for user in db.execute(
+                select(User.id, User.display_name, User.avatar_url).where(User.id.in_(user_ids))
+            ).all()
+        }
+    
+    board = BoardResponse(
+        project=ProjectResponse.model_validate(project),
+        columns=columns,
+        users=users
+    )
+    board_cache.set(board_key, board)
+    return board
+
+
 @router.patch("/{project_id}", response_model=ProjectResponse)
 def update_project(
     project_id: int,
@@ -107,7 +232,7 @@ def update_project(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = project_by_id(db, project_id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -125,7 +250,7 @@ def update_project(
         setattr(project, field, value)
     
     db.commit()
-    db.refresh(project)
+    touch_workspace(project.workspace_id, project.id)
     return project
 
 
@@ -135,7 +260,7 @@ def delete_project(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = project_by_id(db, project_id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -148,6 +273,15 @@ def delete_project(
             detail="Not authorized to delete this project"
         )
     
-    db.delete(project)
+    workspace_id = project.workspace_id
+    if settings.SOFT_DELETE_CONTAINERS:
+        # Hidden from now on; tasks and documents are purged by a job once this commits
+        project.deleted_at = func.now()
+        enqueue(db, "purge_project", {"project_id": project_id}, key=f"purge_project:{project_id}")
+    else:
+        db.delete(project)
+    adjust_project_count(db, workspace_id, -1)
     db.commit()
+    forget_project(project_id)
+    touch_workspace(workspace_id, project_id)
     return None
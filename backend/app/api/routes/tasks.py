@@ -1,44 +1,102 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, func, insert, or_, select
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
 
-from app.db.database import get_db
+from app.db.activity import record
+from app.db.counters import adjust_task_count
+from app.db.database import get_db, get_read_db
+from app.db.deadlines import rearm_reminders
+from app.db.export import MEDIA_TYPES, ExportFormat, export_tasks, require_pyarrow
+from app.db.flow import record_transition
+from app.db.lookups import task_by_id, task_project_id, task_with_people_by_id
+from app.db.purge import pending_project_ids
+from app.db.subtasks import (
+    add_to_tree, is_in_subtree, lock_task_tree, lock_tree, move_in_tree, remove_from_tree, rollup_status_change
+)
 from app.models.user import User
 from app.models.workspace import Workspace, WorkspaceMember
 from app.models.project import Project
-from app.models.task import Task
-from app.schemas.task import TaskCreate, TaskUpdate, TaskResponse, TaskPositionUpdate
+from app.models.task import PRIORITY_RANK, Task, TaskClosure, is_open, open_with_due_date, priority_rank
+from app.schemas.task import (
+    MAX_DEADLINE_LIMIT, MAX_MY_TASKS_LIMIT, DeadlineTask, MyTask, MyTaskGroup, MyTasks, SubtaskResponse,
+    TaskCreate, TaskDeadlines, TaskUpdate, TaskResponse, TaskPositionUpdate
+)
 from app.api.deps import get_current_user
+from app.api.encoding import ListEncoder, list_encoder
+from app.api.permissions import (
+    check_project_access, forget_task, project_workspace_id, task_workspace_id, touch_project
+)
+from app.core.cache import get_cache
+from app.core.config import settings
 
 router = APIRouter()
 
+BOARD_CACHE_TTL = 30
 
-def check_project_access(db: Session, project_id: int, user_id: int) -> bool:
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
-        return False
-    
-    workspace = db.query(Workspace).filter(Workspace.id == project.workspace_id).first()
-    if not workspace:
-        return False
-    
-    if workspace.owner_id == user_id:
-        return True
-    
-    member = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == workspace.id,
-        WorkspaceMember.user_id == user_id
-    ).first()
-    
-    return member is not None
+_DEADLINE_COLUMNS = (
+    Task.id, Task.title, Task.status, Task.priority, Task.due_date,
+    Task.project_id, Task.workspace_id, Task.deadline_state
+)
+
+_MY_TASK_COLUMNS = (
+    Task.id, Task.title, Task.status, Task.priority, Task.due_date, Task.position, Task.parent_id,
+    Task.subtask_count, Task.subtasks_done, Task.comment_count, Task.deadline_state,
+    Task.project_id, Project.name.label("project_name"), Task.workspace_id, Workspace.name.label("workspace_name")
+)
+
+_SUBTASK_COLUMNS = (
+    Task.id, Task.title, Task.status, Task.priority, Task.due_date, Task.assignee_id,
+    Task.position, Task.parent_id, TaskClosure.depth, Task.subtask_count, Task.subtasks_done
+)
+
+
+def _check_parent(db: Session, project_id: int, parent_id: int, task_id: int = None) -> None:
+    """400 unless ``parent_id`` is a task in ``project_id`` outside ``task_id``'s own subtree."""
+    if task_project_id(db, parent_id) != project_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Parent task must be in the same project"
+        )
+    if task_id is not None and is_in_subtree(db, task_id, parent_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A task cannot be moved under itself or one of its subtasks"
+        )
+
+
+def _task_response(task: Task, creator: Optional[User] = None) -> TaskResponse:
+    """``task`` with its assignee's and creator's names; pass ``creator`` when the caller already has it."""
+    creator = creator or task.creator
+    return TaskResponse(
+        id=task.id,
+        title=task.title,
+        description=task.description,
+        status=task.status,
+        priority=task.priority,
+        due_date=task.due_date,
+        project_id=task.project_id,
+        assignee_id=task.assignee_id,
+        created_by=task.created_by,
+        position=task.position,
+        created_at=task.created_at,
+        assignee_name=task.assignee.display_name if task.assignee else None,
+        creator_name=creator.display_name if creator else None,
+        comment_count=task.comment_count,
+        parent_id=task.parent_id,
+        subtask_count=task.subtask_count,
+        subtasks_done=task.subtasks_done
+    )
 
 
 @router.get("/", response_model=List[TaskResponse])
 def get_tasks(
     project_id: int = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+    encoder: ListEncoder = Depends(list_encoder)
 ):
     if project_id:
         if not check_project_access(db, project_id, current_user.id):
@@ -46,47 +104,171 @@ def get_tasks(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not authorized to access this project"
             )
-        tasks = db.query(Task).filter(Task.project_id == project_id).order_by(Task.position).all()
+        # Board cache: keyed by the project's data version and the user-profile version
+        cache = get_cache()
+        board_cache = cache.namespace("board", BOARD_CACHE_TTL)
+        board_key = f"{project_id}:{cache.versions(f'project:{project_id}', 'users')}"
+        cached = board_cache.get(board_key)
+        if cached is not None:
+            return encoder.render(cached, TaskResponse)
+        tasks = db.query(Task).options(
+            joinedload(Task.assignee), joinedload(Task.creator)
+        ).filter(
+            Task.workspace_id == project_workspace_id(db, project_id),
+            Task.project_id == project_id
+        ).order_by(Task.position).all()
     else:
-        # Get all tasks from accessible projects
-        owned_workspaces = db.query(Workspace.id).filter(
-            Workspace.owner_id == current_user.id
-        ).all()
-        
-        member_workspaces = db.query(WorkspaceMember.workspace_id).filter(
+        # Get all tasks from accessible workspaces
+        member_workspace_ids = select(WorkspaceMember.workspace_id).where(
             WorkspaceMember.user_id == current_user.id
-        ).all()
-        
-        workspace_ids = [w[0] for w in owned_workspaces + member_workspaces]
+        )
+        workspace_ids = [w[0] for w in db.query(Workspace.id).filter(
+            or_(Workspace.owner_id == current_user.id, Workspace.id.in_(member_workspace_ids)),
+            Workspace.deleted_at.is_(None)
+        ).all()]
         
-        project_ids = db.query(Project.id).filter(
-            Project.workspace_id.in_(workspace_ids)
+        tasks = db.query(Task).options(
+            joinedload(Task.assignee), joinedload(Task.creator)
+        ).filter(
+            Task.workspace_id.in_(workspace_ids),
+            Task.project_id.not_in(pending_project_ids(Project.workspace_id.in_(workspace_ids)))
+        ).order_by(Task.position).all()
+    
+    result = [_task_response(task) for task in tasks]
+    
+    if project_id:
+        board_cache.set(board_key, result)
+    return encoder.render(result, TaskResponse)
+
+
+@router.get("/deadlines", response_model=TaskDeadlines)
+def get_my_deadlines(
+    limit: int = Query(50, ge=1, le=MAX_DEADLINE_LIMIT),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """The caller's open tasks that are overdue or due within DUE_SOON_DAYS."""
+    now = datetime.now(timezone.utc)
+    soon = now + timedelta(days=settings.DUE_SOON_DAYS)
+    # Owners are members too, so membership alone decides access
+    workspace_ids = select(WorkspaceMember.workspace_id).join(
+        Workspace, Workspace.id == WorkspaceMember.workspace_id
+    ).where(WorkspaceMember.user_id == current_user.id, Workspace.deleted_at.is_(None))
+    
+    def due(*window):
+        # Range scan of the partial (assignee_id, due_date) index on open tasks
+        return db.execute(
+            select(*_DEADLINE_COLUMNS).where(
+                Task.assignee_id == current_user.id,
+                open_with_due_date(),
+                *window,
+                Task.workspace_id.in_(workspace_ids),
+                Task.project_id.not_in(pending_project_ids())
+            ).order_by(Task.due_date, Task.id).limit(limit)
         ).all()
-        project_ids = [p[0] for p in project_ids]
-        
-        tasks = db.query(Task).filter(Task.project_id.in_(project_ids)).order_by(Task.position).all()
     
-    # Add assignee and creator names
-    result = []
-    for task in tasks:
-        task_dict = TaskResponse(
-            id=task.id,
-            title=task.title,
-            description=task.description,
-            status=task.status,
-            priority=task.priority,
-            due_date=task.due_date,
-            project_id=task.project_id,
-            assignee_id=task.assignee_id,
-            created_by=task.created_by,
-            position=task.position,
-            created_at=task.created_at,
-            assignee_name=task.assignee.display_name if task.assignee else None,
-            creator_name=task.creator.display_name if task.creator else None
+    return TaskDeadlines(
+        overdue=[DeadlineTask.model_validate(row) for row in due(Task.due_date < now)],
+        due_soon=[DeadlineTask.model_validate(row) for row in due(Task.due_date >= now, Task.due_date <= soon)]
+    )
+
+
+@router.get("/export")
+def get_tasks_export(
+    format: ExportFormat = ExportFormat.CSV,
+    workspace_id: Optional[int] = None,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Every task in the caller's workspaces (or in ``workspace_id``) as a CSV or
+    Parquet download, streamed in batches rather than built in memory.
+    """
+    workspace_ids = db.scalars(
+        select(WorkspaceMember.workspace_id).where(WorkspaceMember.user_id == current_user.id)
+    ).all()
+    if workspace_id is not None:
+        if workspace_id not in workspace_ids:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to access this workspace"
+            )
+        workspace_ids = [workspace_id]
+    if format == ExportFormat.PARQUET:
+        try:
+            require_pyarrow()
+        except RuntimeError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(exc)
+            )
+    
+    return StreamingResponse(
+        export_tasks(format, workspace_ids),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format.value}"'}
+    )
+
+
+def _after_my_task(cursor: str):
+    """Tasks after "<due_date>|<priority rank>|<id>" (empty due date: undated) in "my tasks" order."""
+    try:
+        due_date, rank, task_id = cursor.split("|")
+        due_date = datetime.fromisoformat(due_date) if due_date else None
+        rank, task_id = int(rank), int(task_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
         )
-        result.append(task_dict)
+    same_day = or_(priority_rank() > rank, and_(priority_rank() == rank, Task.id > task_id))
+    if due_date is None:
+        return and_(Task.due_date.is_(None), same_day)
+    return or_(Task.due_date > due_date, and_(Task.due_date == due_date, same_day), Task.due_date.is_(None))
+
+
+@router.get("/mine", response_model=MyTasks)
+def get_my_tasks(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_MY_TASKS_LIMIT),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    The caller's open tasks in every workspace they belong to: soonest due
+    first (undated last), then most urgent, grouped by project.
+    """
+    # Range scan of the partial (assignee_id, due_date) index on open tasks;
+    # the joins drop workspaces the caller has left and deleted containers
+    query = select(*_MY_TASK_COLUMNS).join(
+        WorkspaceMember,
+        and_(WorkspaceMember.workspace_id == Task.workspace_id, WorkspaceMember.user_id == current_user.id)
+    ).join(
+        Workspace, and_(Workspace.id == Task.workspace_id, Workspace.deleted_at.is_(None))
+    ).join(
+        Project, and_(Project.id == Task.project_id, Project.deleted_at.is_(None))
+    ).where(Task.assignee_id == current_user.id, is_open())
+    if cursor is not None:
+        query = query.where(_after_my_task(cursor))
+    # One extra row tells whether there is a next page
+    rows = db.execute(
+        query.order_by(Task.due_date.asc().nulls_last(), priority_rank(), Task.id).limit(limit + 1)
+    ).all()
     
-    return result
+    groups = {}
+    for row in rows[:limit]:
+        if row.project_id not in groups:
+            groups[row.project_id] = MyTaskGroup(
+                project_id=row.project_id, project_name=row.project_name,
+                workspace_id=row.workspace_id, workspace_name=row.workspace_name, tasks=[]
+            )
+        groups[row.project_id].tasks.append(MyTask.model_validate(row))
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        due_date = last.due_date.isoformat() if last.due_date else ""
+        next_cursor = f"{due_date}|{PRIORITY_RANK[last.priority]}|{last.id}"
+    return MyTasks(projects=list(groups.values()), next_cursor=next_cursor)
 
 
 @router.post("/", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
@@ -101,45 +283,44 @@ def create_task(
             detail="Not authorized to create tasks in this project"
         )
     
-    # Get max position for the status
-    max_position = db.query(func.max(Task.position)).filter(
+    workspace_id = project_workspace_id(db, task_data.project_id)
+    if task_data.parent_id is not None:
+        lock_tree(db, task_data.project_id)
+        _check_parent(db, task_data.project_id, task_data.parent_id)
+    
+    # Next position for the status, computed inside the INSERT and returned by it
+    next_position = select(func.coalesce(func.max(Task.position), 0) + 1).where(
+        Task.workspace_id == workspace_id,
         Task.project_id == task_data.project_id,
         Task.status == task_data.status
-    ).scalar() or 0
+    ).scalar_subquery()
     
-    task = Task(
-        **task_data.model_dump(),
-        created_by=current_user.id,
-        position=max_position + 1
-    )
-    db.add(task)
+    task = db.scalars(
+        insert(Task).values(
+            **task_data.model_dump(),
+            workspace_id=workspace_id,
+            created_by=current_user.id,
+            position=next_position
+        ).returning(Task)
+    ).one()
+    adjust_task_count(db, task.project_id, 1)
+    if task.parent_id is not None:
+        add_to_tree(db, task)
+    record(db, workspace_id, current_user.id, "task.created", task.id, task.project_id, title=task.title)
+    record_transition(db, task, None, task.status, current_user.id)
     db.commit()
-    db.refresh(task)
+    touch_project(db, task.project_id)
     
-    return TaskResponse(
-        id=task.id,
-        title=task.title,
-        description=task.description,
-        status=task.status,
-        priority=task.priority,
-        due_date=task.due_date,
-        project_id=task.project_id,
-        assignee_id=task.assignee_id,
-        created_by=task.created_by,
-        position=task.position,
-        created_at=task.created_at,
-        assignee_name=task.assignee.display_name if task.assignee else None,
-        creator_name=current_user.display_name
-    )
+    return _task_response(task, creator=current_user)
 
 
 @router.get("/{task_id}", response_model=TaskResponse)
 def get_task(
     task_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    task = db.query(Task).filter(Task.id == task_id).first()
+    task = task_with_people_by_id(db, task_workspace_id(db, task_id), task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -152,21 +333,56 @@ def get_task(
             detail="Not authorized to access this task"
         )
     
-    return TaskResponse(
-        id=task.id,
-        title=task.title,
-        description=task.description,
-        status=task.status,
-        priority=task.priority,
-        due_date=task.due_date,
-        project_id=task.project_id,
-        assignee_id=task.assignee_id,
-        created_by=task.created_by,
-        position=task.position,
-        created_at=task.created_at,
-        assignee_name=task.assignee.display_name if task.assignee else None,
-        creator_name=task.creator.display_name if task.creator else None
-    )
+    return _task_response(task)
+
+
+def _tree_query(db: Session, task_id: int, user_id: int):
+    """Closure rows joined to their tasks, once the caller may see ``task_id``."""
+    workspace_id = task_workspace_id(db, task_id)
+    if workspace_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+    if not check_project_access(db, task_project_id(db, task_id), user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this task"
+        )
+    return select(*_SUBTASK_COLUMNS).where(TaskClosure.workspace_id == workspace_id)
+
+
+@router.get("/{task_id}/subtasks", response_model=List[SubtaskResponse])
+def get_subtasks(
+    task_id: int,
+    max_depth: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Every task below this one (or down to ``max_depth`` levels), level by level."""
+    query = _tree_query(db, task_id, current_user.id).join(
+        Task, Task.id == TaskClosure.descendant_id
+    ).where(TaskClosure.ancestor_id == task_id)
+    if max_depth is not None:
+        query = query.where(TaskClosure.depth <= max_depth)
+    
+    rows = db.execute(query.order_by(TaskClosure.depth, Task.position, Task.id)).all()
+    return [SubtaskResponse.model_validate(row) for row in rows]
+
+
+@router.get("/{task_id}/ancestors", response_model=List[SubtaskResponse])
+def get_ancestors(
+    task_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """The chain of parents above this task, from the top-level task down to its parent."""
+    query = _tree_query(db, task_id, current_user.id).join(
+        Task, Task.id == TaskClosure.ancestor_id
+    ).where(TaskClosure.descendant_id == task_id)
+    
+    rows = db.execute(query.order_by(TaskClosure.depth.desc())).all()
+    return [SubtaskResponse.model_validate(row) for row in rows]
 
 
 @router.patch("/{task_id}", response_model=TaskResponse)
@@ -176,7 +392,11 @@ def update_task(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    task = db.query(Task).filter(Task.id == task_id).first()
+    update_data = task_update.model_dump(exclude_unset=True)
+    if "parent_id" in update_data or "status" in update_data:
+        # Before the row is read, so its parent, status and rollups stay current until commit
+        lock_task_tree(db, task_id)
+    task = task_with_people_by_id(db, task_workspace_id(db, task_id), task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -189,28 +409,39 @@ def update_task(
             detail="Not authorized to update this task"
         )
     
-    update_data = task_update.model_dump(exclude_unset=True)
+    previous_status, previous_due_date = task.status, task.due_date
+    parent_id = update_data.get("parent_id", task.parent_id)
+    if parent_id != task.parent_id and parent_id is not None:
+        _check_parent(db, task.project_id, parent_id, task.id)
     for field, value in update_data.items():
-        setattr(task, field, value)
+        if field != "parent_id":
+            setattr(task, field, value)
+    if "assignee_id" in update_data:
+        # The eagerly loaded assignee is stale now; reload it on access
+        db.expire(task, ["assignee"])
+    rearm_reminders(task, previous_status, previous_due_date)
+    # Against the old ancestors first; the move then carries the new status along
+    rollup_status_change(db, task, previous_status)
+    if parent_id != task.parent_id:
+        move_in_tree(db, task, parent_id)
+    
+    if task.status != previous_status:
+        record(
+            db, task.workspace_id, current_user.id, "task.status_changed", task.id, task.project_id,
+            title=task.title, previous=previous_status.value, status=task.status.value
+        )
+        record_transition(db, task, previous_status, task.status, current_user.id)
+    fields = sorted(field for field in update_data if field != "status")
+    if fields:
+        record(
+            db, task.workspace_id, current_user.id, "task.updated", task.id, task.project_id,
+            title=task.title, fields=fields
+        )
     
     db.commit()
-    db.refresh(task)
+    touch_project(db, task.project_id)
     
-    return TaskResponse(
-        id=task.id,
-        title=task.title,
-        description=task.description,
-        status=task.status,
-        priority=task.priority,
-        due_date=task.due_date,
-        project_id=task.project_id,
-        assignee_id=task.assignee_id,
-        created_by=task.created_by,
-        position=task.position,
-        created_at=task.created_at,
-        assignee_name=task.assignee.display_name if task.assignee else None,
-        creator_name=task.creator.display_name if task.creator else None
-    )
+    return _task_response(task)
 
 
 @router.patch("/{task_id}/position", response_model=TaskResponse)
@@ -221,7 +452,8 @@ def update_task_position(
     current_user: User = Depends(get_current_user)
 ):
     """Update task status and position (for drag-and-drop)"""
-    task = db.query(Task).filter(Task.id == task_id).first()
+    lock_task_tree(db, task_id)
+    task = task_with_people_by_id(db, task_workspace_id(db, task_id), task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -234,27 +466,22 @@ def update_task_position(
             detail="Not authorized to update this task"
         )
     
+    previous_status = task.status
     task.status = position_update.status
     task.position = position_update.position
+    rearm_reminders(task, previous_status, task.due_date)
+    rollup_status_change(db, task, previous_status)
+    if task.status != previous_status:
+        record(
+            db, task.workspace_id, current_user.id, "task.status_changed", task.id, task.project_id,
+            title=task.title, previous=previous_status.value, status=task.status.value
+        )
+        record_transition(db, task, previous_status, task.status, current_user.id)
     
     db.commit()
-    db.refresh(task)
+    touch_project(db, task.project_id)
     
-    return TaskResponse(
-        id=task.id,
-        title=task.title,
-        description=task.description,
-        status=task.status,
-        priority=task.priority,
-        due_date=task.due_date,
-        project_id=task.project_id,
-        assignee_id=task.assignee_id,
-        created_by=task.created_by,
-        position=task.position,
-        created_at=task.created_at,
-        assignee_name=task.assignee.display_name if task.assignee else None,
-        creator_name=task.creator.display_name if task.creator else None
-    )
+    return _task_response(task)
 
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -263,7 +490,8 @@ def delete_task(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    task = db.query(Task).filter(Task.id == task_id).first()
+    lock_task_tree(db, task_id)
+    task = task_by_id(db, task_workspace_id(db, task_id), task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -276,6 +504,13 @@ def delete_task(
             detail="Not authorized to delete this task"
         )
     
+    project_id = task.project_id
+    remove_from_tree(db, task)
     db.delete(task)
+    adjust_task_count(db, project_id, -1)
+    record(db, task.workspace_id, current_user.id, "task.deleted", task_id, project_id, title=task.title)
+    record_transition(db, task, task.status, None, current_user.id)
     db.commit()
+    forget_task(task_id)
+    touch_project(db, project_id)
     return None
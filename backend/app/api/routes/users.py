@@ -2,10 +2,13 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.db.database import get_db
+from app.db.database import get_db, get_read_db
+from app.db.lookups import user_by_id
 from app.models.user import User
 from app.schemas.user import UserResponse, UserUpdate
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, forget_principal
+from app.api.encoding import ListEncoder, list_encoder
+from app.core.cache import get_cache
 
 router = APIRouter()
 
@@ -14,20 +17,21 @@ router = APIRouter()
 def get_users(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+    encoder: ListEncoder = Depends(list_encoder)
 ):
     users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    return encoder.render(users, UserResponse)
 
 
 @router.get("/{user_id}", response_model=UserResponse)
 def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = user_by_id(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -49,7 +53,7 @@ def update_user(
             detail="Not authorized to update this user"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = user_by_id(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -61,5 +65,7 @@ def update_user(
         setattr(user, field, value)
     
     db.commit()
-    db.refresh(user)
+    forget_principal(user_id)
+    # Names and avatars are embedded in cached boards
+    get_cache().bump("users")
     return user
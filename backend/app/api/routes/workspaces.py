@@ -1,26 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import delete, func, select, tuple_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 
-from app.db.database import get_db
+from app.db.activity import activity_row, feed_order, record, record_all, to_response
+from app.db.database import get_db, get_read_db
+from app.db.lookups import membership, user_by_id, workspace_by_id
+from app.db.upsert import insert_ignoring_conflicts
+from app.models.activity import ActivityEvent
 from app.models.user import User
 from app.models.workspace import Workspace, WorkspaceMember, MemberRole
 from app.schemas.workspace import (
     WorkspaceCreate, WorkspaceUpdate, WorkspaceResponse,
-    WorkspaceMemberCreate, WorkspaceMemberResponse, WorkspaceDetailResponse
+    WorkspaceMemberCreate, WorkspaceMemberResponse, WorkspaceDetailResponse,
+    WorkspaceMemberPage, WorkspaceMembersBulkUpdate, WorkspaceMembersBulkResult
 )
+from app.schemas.activity import MAX_ACTIVITY_PAGE_SIZE, ActivityPage
 from app.api.deps import get_current_user
+from app.api.encoding import ListEncoder, list_encoder
+from app.api.permissions import check_workspace_access, forget_membership, forget_workspace, touch_workspace
+from app.core.config import settings
+from app.core.jobs import enqueue
 
 router = APIRouter()
 
+MEMBER_PAGE_SIZE = 50
+MAX_MEMBER_PAGE_SIZE = 200
+ACTIVITY_PAGE_SIZE = 50
+
+_MEMBER_COLUMNS = (
+    WorkspaceMember.id, WorkspaceMember.user_id, WorkspaceMember.role, WorkspaceMember.joined_at
+)
+
 
 @router.get("/", response_model=List[WorkspaceResponse])
 def get_workspaces(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+    encoder: ListEncoder = Depends(list_encoder)
 ):
     # Get workspaces where user is owner or member
-    owned = db.query(Workspace).filter(Workspace.owner_id == current_user.id).all()
+    owned = db.query(Workspace).filter(
+        Workspace.owner_id == current_user.id,
+        Workspace.deleted_at.is_(None)
+    ).all()
     
     member_workspace_ids = db.query(WorkspaceMember.workspace_id).filter(
         WorkspaceMember.user_id == current_user.id
@@ -28,12 +52,13 @@ def get_workspaces(
     member_workspace_ids = [w[0] for w in member_workspace_ids]
     
     member_workspaces = db.query(Workspace).filter(
-        Workspace.id.in_(member_workspace_ids)
+        Workspace.id.in_(member_workspace_ids),
+        Workspace.deleted_at.is_(None)
     ).all() if member_workspace_ids else []
     
     # Combine and deduplicate
     all_workspaces = {w.id: w for w in owned + member_workspaces}
-    return list(all_workspaces.values())
+    return encoder.render(list(all_workspaces.values()), WorkspaceResponse)
 
 
 @router.post("/", response_model=WorkspaceResponse, status_code=status.HTTP_201_CREATED)
@@ -47,10 +72,9 @@ def create_workspace(
         owner_id=current_user.id
     )
     db.add(workspace)
-    db.commit()
-    db.refresh(workspace)
+    db.flush()
     
-    # Add owner as admin member
+    # Add owner as admin member, in the same transaction
     member = WorkspaceMember(
         workspace_id=workspace.id,
         user_id=current_user.id,
@@ -58,6 +82,7 @@ def create_workspace(
     )
     db.add(member)
     db.commit()
+    forget_membership(workspace.id, current_user.id)
     
     return workspace
 
@@ -65,44 +90,26 @@ def create_workspace(
 @router.get("/{workspace_id}", response_model=WorkspaceDetailResponse)
 def get_workspace(
     workspace_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
+    workspace = workspace_by_id(db, workspace_id)
     if not workspace:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Workspace not found"
         )
     
-    # Check access
-    is_member = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == workspace_id,
-        WorkspaceMember.user_id == current_user.id
-    ).first()
-    
-    if not is_member and workspace.owner_id != current_user.id:
+    if not check_workspace_access(db, workspace_id, current_user.id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to access this workspace"
         )
     
-    # Get members with user details
-    members = db.query(WorkspaceMember).filter(
+    # Members are listed page by page from /{workspace_id}/members
+    member_count = db.query(func.count(WorkspaceMember.id)).filter(
         WorkspaceMember.workspace_id == workspace_id
-    ).all()
-    
-    member_responses = []
-    for member in members:
-        user = db.query(User).filter(User.id == member.user_id).first()
-        member_responses.append(WorkspaceMemberResponse(
-            id=member.id,
-            user_id=member.user_id,
-            role=member.role,
-            joined_at=member.joined_at,
-            user_email=user.email if user else None,
-            user_display_name=user.display_name if user else None
-        ))
+    ).scalar()
     
     return WorkspaceDetailResponse(
         id=workspace.id,
@@ -110,10 +117,87 @@ def get_workspace(
         description=workspace.description,
         owner_id=workspace.owner_id,
         created_at=workspace.created_at,
-        members=member_responses
+        member_count=member_count
     )
 
 
+@router.get("/{workspace_id}/members", response_model=WorkspaceMemberPage)
+def get_workspace_members(
+    workspace_id: int,
+    cursor: Optional[int] = None,
+    limit: int = Query(MEMBER_PAGE_SIZE, ge=1, le=MAX_MEMBER_PAGE_SIZE),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not check_workspace_access(db, workspace_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this workspace"
+        )
+    
+    query = db.query(WorkspaceMember, User.email, User.display_name).join(
+        User, User.id == WorkspaceMember.user_id
+    ).filter(WorkspaceMember.workspace_id == workspace_id)
+    if cursor is not None:
+        query = query.filter(WorkspaceMember.id > cursor)
+    # One extra row tells whether there is a next page
+    rows = query.order_by(WorkspaceMember.id).limit(limit + 1).all()
+    
+    items = [
+        WorkspaceMemberResponse(
+            id=member.id,
+            user_id=member.user_id,
+            role=member.role,
+            joined_at=member.joined_at,
+            user_email=email,
+            user_display_name=display_name
+        )
+        for member, email, display_name in rows[:limit]
+    ]
+    next_cursor = items[-1].id if len(rows) > limit else None
+    return WorkspaceMemberPage(items=items, next_cursor=next_cursor)
+
+
+@router.get("/{workspace_id}/activity", response_model=ActivityPage)
+def get_workspace_activity(
+    workspace_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(ACTIVITY_PAGE_SIZE, ge=1, le=MAX_ACTIVITY_PAGE_SIZE),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """The workspace's activity feed, newest first."""
+    if not check_workspace_access(db, workspace_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this workspace"
+        )
+    
+    query = select(ActivityEvent, User.display_name).outerjoin(
+        User, User.id == ActivityEvent.actor_id
+    ).where(ActivityEvent.workspace_id == workspace_id)
+    if cursor is not None:
+        # "<created_at>|<id>" of the last event on the previous page
+        created_at, _, event_id = cursor.rpartition("|")
+        try:
+            after = (datetime.fromisoformat(created_at), int(event_id))
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        query = query.where(tuple_(ActivityEvent.created_at, ActivityEvent.id) < after)
+    # One extra row tells whether there is a next page
+    rows = db.execute(query.order_by(*feed_order()).limit(limit + 1)).all()
+    
+    items = [to_response(event, actor_name) for event, actor_name in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = f"{last.created_at.isoformat()}|{last.id}"
+    return ActivityPage(items=items, next_cursor=next_cursor)
+
+
 @router.patch("/{workspace_id}", response_model=WorkspaceResponse)
 def update_workspace(
     workspace_id: int,
@@ -121,7 +205,7 @@ def update_workspace(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
+    workspace = workspace_by_id(db, workspace_id)
     if not workspace:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -139,7 +223,7 @@ def update_workspace(
         setattr(workspace, field, value)
     
     db.commit()
-    db.refresh(workspace)
+    touch_workspace(workspace_id)
     return workspace
 
 
@@ -149,7 +233,7 @@ def delete_workspace(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
+    workspace = workspace_by_id(db, workspace_id)
     if not workspace:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -162,8 +246,15 @@ def delete_workspace(
             detail="Only workspace owner can delete"
         )
     
-    db.delete(workspace)
+    if settings.SOFT_DELETE_CONTAINERS:
+        # Hidden from now on; projects, tasks and the rest are purged by a job once this commits
+        workspace.deleted_at = func.now()
+        enqueue(db, "purge_workspace", {"workspace_id": workspace_id}, key=f"purge_workspace:{workspace_id}")
+    else:
+        db.delete(workspace)
     db.commit()
+    touch_workspace(workspace_id)
+    forget_workspace(workspace_id)
     return None
 
 
@@ -174,7 +265,7 @@ def add_workspace_member(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
+    workspace = workspace_by_id(db, workspace_id)
     if not workspace:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -182,47 +273,43 @@ def add_workspace_member(
         )
     
     # Check if current user is admin
-    current_member = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == workspace_id,
-        WorkspaceMember.user_id == current_user.id,
-        WorkspaceMember.role == MemberRole.ADMIN
-    ).first()
+    current_member = membership(db, workspace_id, current_user.id)
+    is_admin = current_member is not None and current_member.role == MemberRole.ADMIN
     
-    if not current_member and workspace.owner_id != current_user.id:
+    if not is_admin and workspace.owner_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only admins can add members"
         )
     
     # Check if user exists
-    user = db.query(User).filter(User.id == member_data.user_id).first()
+    user = user_by_id(db, member_data.user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    # Check if already a member
-    existing = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == workspace_id,
-        WorkspaceMember.user_id == member_data.user_id
-    ).first()
-    
-    if existing:
+    # An existing membership makes the insert a no-op
+    inserted = insert_ignoring_conflicts(
+        db, WorkspaceMember,
+        [{"workspace_id": workspace_id, "user_id": member_data.user_id, "role": member_data.role}],
+        conflict_columns=("workspace_id", "user_id"),
+        returning=_MEMBER_COLUMNS
+    )
+    if not inserted:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User is already a member"
         )
-    
-    member = WorkspaceMember(
-        workspace_id=workspace_id,
-        user_id=member_data.user_id,
-        role=member_data.role
+    record(
+        db, workspace_id, current_user.id, "member.added", member_data.user_id,
+        role=member_data.role.value
     )
-    db.add(member)
     db.commit()
-    db.refresh(member)
+    forget_membership(workspace_id, member_data.user_id)
     
+    member = inserted[0]
     return WorkspaceMemberResponse(
         id=member.id,
         user_id=member.user_id,
@@ -233,6 +320,87 @@ def add_workspace_member(
     )
 
 
+@router.post("/{workspace_id}/members/bulk", response_model=WorkspaceMembersBulkResult)
+def bulk_update_workspace_members(
+    workspace_id: int,
+    changes: WorkspaceMembersBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Add and remove many members at once. The workspace owner is never removed."""
+    workspace = workspace_by_id(db, workspace_id)
+    if not workspace:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Workspace not found"
+        )
+    
+    current_member = membership(db, workspace_id, current_user.id)
+    is_admin = current_member is not None and current_member.role == MemberRole.ADMIN
+    
+    if not is_admin and workspace.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can manage members"
+        )
+    
+    # Last entry wins if a user is listed twice
+    roles = {entry.user_id: entry.role for entry in changes.add}
+    users = {
+        user.id: user
+        for user in db.query(User.id, User.email, User.display_name).filter(User.id.in_(roles)).all()
+    } if roles else {}
+    
+    inserted = insert_ignoring_conflicts(
+        db, WorkspaceMember,
+        [
+            {"workspace_id": workspace_id, "user_id": user_id, "role": role}
+            for user_id, role in roles.items() if user_id in users
+        ],
+        conflict_columns=("workspace_id", "user_id"),
+        returning=_MEMBER_COLUMNS
+    )
+    
+    removed = []
+    to_remove = set(changes.remove) - {workspace.owner_id}
+    if to_remove:
+        removed = db.execute(
+            delete(WorkspaceMember).where(
+                WorkspaceMember.workspace_id == workspace_id,
+                WorkspaceMember.user_id.in_(to_remove)
+            ).returning(WorkspaceMember.user_id)
+        ).scalars().all()
+    
+    record_all(db, [
+        activity_row(workspace_id, current_user.id, "member.added", row.user_id, role=row.role.value)
+        for row in inserted
+    ] + [
+        activity_row(workspace_id, current_user.id, "member.removed", user_id)
+        for user_id in removed
+    ])
+    db.commit()
+    for user_id in {row.user_id for row in inserted} | set(removed):
+        forget_membership(workspace_id, user_id)
+    
+    added_ids = {row.user_id for row in inserted}
+    return WorkspaceMembersBulkResult(
+        added=[
+            WorkspaceMemberResponse(
+                id=row.id,
+                user_id=row.user_id,
+                role=row.role,
+                joined_at=row.joined_at,
+                user_email=users[row.user_id].email,
+                user_display_name=users[row.user_id].display_name
+            )
+            for row in inserted
+        ],
+        removed=sorted(removed),
+        already_members=sorted(user_id for user_id in users if user_id not in added_ids),
+        unknown_users=sorted(user_id for user_id in roles if user_id not in users)
+    )
+
+
 @router.delete("/{workspace_id}/members/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 def remove_workspace_member(
     workspace_id: int,
@@ -240,7 +408,7 @@ def remove_workspace_member(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
+    workspace = workspace_by_id(db, workspace_id)
     if not workspace:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -248,13 +416,10 @@ def remove_workspace_member(
         )
     
     # Check if current user is admin or removing themselves
-    current_member = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == workspace_id,
-        WorkspaceMember.user_id == current_user.id,
-        WorkspaceMember.role == MemberRole.ADMIN
-    ).first()
+    current_member = membership(db, workspace_id, current_user.id)
+    is_admin = current_member is not None and current_member.role == MemberRole.ADMIN
     
-    if not current_member and workspace.owner_id != current_user.id and current_user.id != user_id:
+    if not is_admin and workspace.owner_id != current_user.id and current_user.id != user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to remove this member"
@@ -267,10 +432,7 @@ def remove_workspace_member(
             detail="Cannot remove workspace owner"
         )
     
-    member = db.query(WorkspaceMember).filter(
-        WorkspaceMember.workspace_id == workspace_id,
-        WorkspaceMember.user_id == user_id
-    ).first()
+    member = membership(db, workspace_id, user_id)
     
     if not member:
         raise HTTPException(
@@ -279,5 +441,7 @@ def remove_workspace_member(
         )
     
     db.delete(member)
+    record(db, workspace_id, current_user.id, "member.removed", user_id)
     db.commit()
+    forget_membership(workspace_id, user_id)
     return None
@@ -0,0 +1,330 @@
+"""
+Cache layer shared by every worker process.
+
+Each process keeps a small in-memory LRU ("near cache"). When ``CACHE_URL``
+points at Redis, that LRU sits in front of the shared store: values are
+written to both, and every delete or version bump is published on a
+pub/sub channel so the other workers drop their near copies. Without
+``CACHE_URL`` the LRU is the whole cache, which is correct for a single
+worker.
+
+Keys are grouped into namespaces with their own TTL. ``namespace.clear()``
+bumps the namespace version instead of scanning keys, and ``version()`` /
+``bump()`` give callers data-version counters (for example one per
+workspace) to build versioned keys that go stale the moment data changes.
+
+``LocalRedis`` implements the part of the redis client used here in
+memory, so multi-worker invalidation can be tested without a server.
+"""
+import fnmatch
+import itertools
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+INVALIDATION_CHANNEL = "teamhub:cache:invalidate"
+_FLUSH_ALL = "*"
+_MISSING = object()
+
+
+class MemoryBackend:
+    """Thread-safe LRU with per-entry TTL."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return _MISSING
+            expires_at, value = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class RedisBackend:
+    """Values pickled into Redis; invalidations fanned out with PUBLISH."""
+
+    def __init__(self, client):
+        self.client = client
+        self._listener = None
+
+    def get(self, key: str) -> Any:
+        raw = self.client.get(key)
+        return _MISSING if raw is None else pickle.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.client.set(key, pickle.dumps(value), ex=max(1, int(ttl)) if ttl else None)
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self.client.delete(*keys)
+
+    def get_int(self, key: str) -> int:
+        return int(self.client.get(key) or 0)
+
+    def incr(self, key: str) -> int:
+        return int(self.client.incr(key))
+
+    def clear(self, prefix: str) -> None:
+        keys = list(self.client.scan_iter(match=f"{prefix}*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def publish(self, message: str) -> None:
+        self.client.publish(INVALIDATION_CHANNEL, message)
+
+    def subscribe(self, handler: Callable[[str], None]) -> None:
+        def on_message(message):
+            data = message["data"]
+            handler(data.decode() if isinstance(data, bytes) else data)
+
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{INVALIDATION_CHANNEL: on_message})
+        self._listener = pubsub.run_in_thread(sleep_time=0.1, daemon=True)
+
+    def close(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+
+class Cache:
+    def __init__(
+        self,
+        shared: Optional[RedisBackend] = None,
+        near_entries: int = 10000,
+        near_ttl: float = 5.0,
+        prefix: str = "teamhub:cache:",
+    ):
+        self.shared = shared
+        self.near = MemoryBackend(near_entries)
+        self.near_ttl = near_ttl
+        self.prefix = prefix
+        # Without a shared store versions live in their own LRU. A version is
+        # never reused, so an evicted scope just gets a new one and every key
+        # built from the old version goes unread, as after a bump.
+        self._local_versions = MemoryBackend(near_entries)
+        self._version_sequence = itertools.count(1)
+        self._versions_lock = threading.Lock()
+        if shared is not None:
+            shared.subscribe(self._on_invalidate)
+
+    def _on_invalidate(self, key: str) -> None:
+        if key == _FLUSH_ALL:
+            self.near.clear()
+        else:
+            self.near.delete(key)
+
+    def get(self, key: str) -> Any:
+        value = self.near.get(key)
+        if value is not _MISSING or self.shared is None:
+            return value
+        value = self.shared.get(key)
+        if value is not _MISSING:
+            self.near.set(key, value, self.near_ttl)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        if self.shared is None:
+            self.near.set(key, value, ttl)
+            return
+        self.shared.set(key, value, ttl)
+        self.near.set(key, value, min(ttl, self.near_ttl) if ttl else self.near_ttl)
+
+    def delete(self, *keys: str) -> None:
+        self.near.delete(*keys)
+        if self.shared is not None:
+            self.shared.delete(*keys)
+            for key in keys:
+                self.shared.publish(key)
+
+    def version(self, scope: str) -> int:
+        key = f"{self.prefix}version:{scope}"
+        if self.shared is None:
+            with self._versions_lock:
+                value = self._local_versions.get(key)
+                if value is _MISSING:
+                    value = next(self._version_sequence)
+                    self._local_versions.set(key, value)
+            return value
+        value = self.near.get(key)
+        if value is _MISSING:
+            value = self.shared.get_int(key)
+            self.near.set(key, value, self.near_ttl)
+        return value
+
+    def versions(self, *scopes: str) -> str:
+        return ",".join(f"{scope}@{self.version(scope)}" for scope in scopes)
+
+    def bump(self, *scopes: str) -> None:
+        for scope in scopes:
+            key = f"{self.prefix}version:{scope}"
+            if self.shared is None:
+                with self._versions_lock:
+                    self._local_versions.set(key, next(self._version_sequence))
+            else:
+                self.shared.incr(key)
+                self.near.delete(key)
+                self.shared.publish(key)
+
+    def namespace(self, name: str, ttl: float) -> "CacheNamespace":
+        return CacheNamespace(self, name, ttl)
+
+    def flush(self) -> None:
+        """Drop everything this cache can see (tests and maintenance)."""
+        self.near.clear()
+        self._local_versions.clear()
+        if self.shared is not None:
+            self.shared.clear(self.prefix)
+            self.shared.publish(_FLUSH_ALL)
+
+    def close(self) -> None:
+        if self.shared is not None:
+            self.shared.close()
+
+
+class CacheNamespace:
+    def __init__(self, cache: Cache, name: str, ttl: float):
+        self.cache = cache
+        self.name = name
+        self.ttl = ttl
+
+    def _key(self, key: str) -> str:
+        return f"{self.cache.prefix}{self.name}:v{self.cache.version('ns:' + self.name)}:{key}"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.cache.get(self._key(key))
+        return default if value is _MISSING else value
+
+    def set(self, key: str, value: Any) -> None:
+        self.cache.set(self._key(key), value, self.ttl)
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Return the cached value or compute it; ``None`` results are not cached."""
+        full_key = self._key(key)
+        value = self.cache.get(full_key)
+        if value is _MISSING:
+            value = loader()
+            if value is not None:
+                self.cache.set(full_key, value, self.ttl)
+        return value
+
+    def delete(self, *keys: str) -> None:
+        self.cache.delete(*(self._key(key) for key in keys))
+
+    def clear(self) -> None:
+        self.cache.bump("ns:" + self.name)
+
+
+class LocalRedis:
+    """In-memory stand-in for the subset of ``redis.Redis`` that ``RedisBackend`` uses."""
+
+    def __init__(self):
+        self._data: Dict[str, tuple] = {}
+        self._subscribers: List["_LocalPubSub"] = []
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._data.get(name)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[name]
+                return None
+            return value
+
+    def set(self, name: str, value: bytes, ex: Optional[int] = None) -> bool:
+        with self._lock:
+            self._data[name] = (time.monotonic() + ex if ex else None, value)
+        return True
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+
+    def incr(self, name: str) -> int:
+        with self._lock:
+            _, value = self._data.get(name, (None, b"0"))
+            value = int(value) + 1
+            self._data[name] = (None, str(value).encode())
+            return value
+
+    def scan_iter(self, match: str = "*"):
+        with self._lock:
+            names = list(self._data)
+        return (name for name in names if fnmatch.fnmatchcase(name, match))
+
+    def publish(self, channel: str, message: str) -> int:
+        payload = {"type": "message", "channel": channel.encode(), "data": message.encode()}
+        receivers = [s for s in self._subscribers if channel in s.handlers]
+        for subscriber in receivers:
+            subscriber.handlers[channel](payload)
+        return len(receivers)
+
+    def pubsub(self, ignore_subscribe_messages: bool = False) -> "_LocalPubSub":
+        return _LocalPubSub(self)
+
+
+class _LocalPubSub:
+    def __init__(self, server: LocalRedis):
+        self.server = server
+        self.handlers: Dict[str, Callable] = {}
+
+    def subscribe(self, **handlers: Callable) -> None:
+        self.handlers.update(handlers)
+        self.server._subscribers.append(self)
+
+    def run_in_thread(self, sleep_time: float = 0, daemon: bool = False) -> "_LocalPubSub":
+        # Messages are delivered synchronously by LocalRedis.publish
+        return self
+
+    def stop(self) -> None:
+        if self in self.server._subscribers:
+            self.server._subscribers.remove(self)
+
+
+@lru_cache()
+def get_cache() -> Cache:
+    shared = None
+    if settings.CACHE_URL:
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("CACHE_URL requires the 'redis' package") from exc
+        shared = RedisBackend(redis.Redis.from_url(settings.CACHE_URL))
+    return Cache(
+        shared,
+        near_entries=settings.CACHE_MAX_ENTRIES,
+        near_ttl=settings.CACHE_NEAR_TTL_SECONDS,
+    )
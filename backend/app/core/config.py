@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -8,6 +9,55 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Admission control / rate limiting
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_STORE_URL: Optional[str] = None  # e.g. redis://localhost:6379/0, in-memory when unset
+    RATE_LIMIT_MAX_KEYS: int = 100000  # in-memory buckets kept per process, least recently used dropped
+    RATE_LIMIT_AUTH_PER_MINUTE: int = 20
+    RATE_LIMIT_HEAVY_READ_PER_MINUTE: int = 60
+    RATE_LIMIT_WRITE_PER_MINUTE: int = 120
+    RATE_LIMIT_READ_PER_MINUTE: int = 600
+    MAX_IN_FLIGHT_REQUESTS: int = 64  # 0 disables the global cap
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 2.0
+
+    # On-demand profiling (admin users only, via X-Profile header or ?_profile=)
+    PROFILING_ENABLED: bool = False
+    PROFILING_OUTPUT_DIR: str = "profiles"
+    PROFILING_SAMPLE_INTERVAL_MS: float = 2.0
+    SLOW_REQUEST_LOG_SIZE: int = 10  # slowest requests kept per route, 0 disables
+
+    # Database pool and startup
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_PREFILL: int = 0  # connections opened during startup, capped at DB_POOL_SIZE
+    AUTO_CREATE_TABLES: bool = True
+    DB_PREPARE_THRESHOLD: int = 5  # psycopg server-side prepared statements; -1 disables (e.g. behind PgBouncer)
+    DB_WORKSPACE_PARTITIONS: int = 0  # Postgres only: hash-partition tasks/comments/documents by workspace
+    SOFT_DELETE_CONTAINERS: bool = True  # hide deleted workspaces/projects at once, purge their rows afterwards
+    PURGE_BATCH_SIZE: int = 1000  # rows removed per transaction while purging
+    ACTIVITY_RETENTION_DAYS: int = 90  # activity events older than this are pruned daily
+    ACTIVITY_PARTITION_BY_MONTH: bool = False  # Postgres only: range-partition activity_events by month
+    DUE_SOON_DAYS: int = 7  # open tasks due within this many days count as due soon and get a reminder
+
+    # Read replicas for GET/HEAD requests; everything else uses DATABASE_URL
+    DATABASE_REPLICA_URLS: str = ""  # comma-separated
+    DATABASE_REPLICA_RETRY_SECONDS: float = 10.0  # how long an unreachable replica is skipped
+    READ_YOUR_WRITES_SECONDS: float = 5.0  # reads stay on the primary this long after a write
+
+    # Background jobs (app.core.jobs); run the worker in-process or with `python -m app.core.jobs`
+    JOBS_WORKER_ENABLED: bool = True  # start a worker thread in every app process
+    JOBS_POLL_INTERVAL_SECONDS: float = 1.0
+    JOBS_MAX_ATTEMPTS: int = 5
+    JOBS_RETRY_BASE_SECONDS: float = 5.0  # doubled after every failed attempt
+    JOBS_RETRY_MAX_SECONDS: float = 900.0
+    JOBS_LOCK_TIMEOUT_SECONDS: float = 300.0  # a running job not finished by then is retried
+    JOBS_RETENTION_DAYS: int = 7  # done and failed jobs older than this are deleted daily
+
+    # Cache shared by workers; in-process LRU only when CACHE_URL is unset
+    CACHE_URL: Optional[str] = None  # e.g. redis://localhost:6379/1
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_NEAR_TTL_SECONDS: float = 5.0
+
     class Config:
         env_file = ".env"
 
@@ -17,4 +67,11 @@ def get_settings():
     return Settings()
 
 
-settings = get_settings()
+class _LazySettings:
+    """Reads .env / the environment on first attribute access, not at import."""
+
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+
+settings = _LazySettings()
@@ -0,0 +1,159 @@
+"""
+Per-route request and database instrumentation.
+
+``RequestMetricsMiddleware`` times every request and attributes the SQL run
+while serving it (statement count, DB time, rows) to the matched route
+template, e.g. ``/api/workspaces/{workspace_id}``. The numbers are exported
+through ``/metrics`` (admins only) and echoed to the client in a ``Server-Timing``
+header.
+
+SQL is captured with engine ``before_cursor_execute``/``after_cursor_execute``
+hooks installed by ``instrument_engine``. Rows are taken from
+``cursor.rowcount``; drivers that do not report it for SELECTs (sqlite)
+only contribute rows for writes.
+"""
+import contextvars
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import Counter, Histogram
+from app.core.profiling import slow_requests
+
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+REQUEST_LATENCY = Histogram(
+    "teamhub_http_request_duration_seconds",
+    "Request latency by route template.",
+    ("method", "route"),
+)
+REQUESTS_TOTAL = Counter(
+    "teamhub_http_requests_total",
+    "Requests served by route template and status code.",
+    ("method", "route", "status"),
+)
+STATEMENTS_PER_REQUEST = Histogram(
+    "teamhub_db_statements_per_request",
+    "SQL statements executed per request.",
+    ("method", "route"),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+DB_STATEMENTS = Counter(
+    "teamhub_db_statements_total",
+    "SQL statements executed, by route template.",
+    ("method", "route"),
+)
+DB_TIME = Counter(
+    "teamhub_db_time_seconds_total",
+    "Time spent executing SQL, by route template.",
+    ("method", "route"),
+)
+DB_ROWS = Counter(
+    "teamhub_db_rows_total",
+    "Rows returned or affected by SQL, by route template.",
+    ("method", "route"),
+)
+
+
+class RequestStats:
+    __slots__ = ("statements", "db_time", "rows")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+        self.rows = 0
+
+
+_current_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "teamhub_request_stats", default=None
+)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # On the statement's own context, so one that fails leaves nothing behind
+    context._teamhub_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = context._teamhub_query_start
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    stats.statements += 1
+    stats.db_time += time.perf_counter() - started
+    if cursor.rowcount and cursor.rowcount > 0:
+        stats.rows += cursor.rowcount
+
+
+def instrument_engine(engine: Engine) -> None:
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def route_template(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.db_time * 1000:.1f};desc="{stats.statements} queries", '
+                    f"app;dur={elapsed_ms:.1f}",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            elapsed = time.perf_counter() - started
+            method = scope["method"]
+            route = route_template(scope)
+            REQUEST_LATENCY.observe(elapsed, method=method, route=route)
+            REQUESTS_TOTAL.inc(method=method, route=route, status=str(status_code))
+            STATEMENTS_PER_REQUEST.observe(stats.statements, method=method, route=route)
+            DB_STATEMENTS.inc(stats.statements, method=method, route=route)
+            DB_TIME.inc(stats.db_time, method=method, route=route)
+            DB_ROWS.inc(stats.rows, method=method, route=route)
+            slow_requests.record(f"{method} {route}", elapsed, {
+                "method": method,
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "status": status_code,
+                "duration_ms": round(elapsed * 1000, 2),
+                "db_statements": stats.statements,
+                "db_time_ms": round(stats.db_time * 1000, 2),
+                "at": datetime.now(timezone.utc).isoformat(),
+            })
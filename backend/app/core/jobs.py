@@ -0,0 +1,315 @@
+"""
+Background jobs backed by the ``jobs`` table.
+
+Handlers are plain functions registered under a name with ``@job("name")``;
+their keyword arguments are the job's JSON payload. Routes call ``enqueue``
+with their own session before committing, so a job becomes visible to
+workers exactly when the write that caused it commits, and never if it rolls
+back. An optional idempotency key turns repeated enqueues into no-ops.
+
+Workers claim the oldest due job with a single conditional ``UPDATE``
+(``FOR UPDATE SKIP LOCKED`` on Postgres), so any number of them can share the
+table. A failed job is retried with exponential backoff until it has used
+``JOBS_MAX_ATTEMPTS``; a job whose worker died is picked up again once
+``JOBS_LOCK_TIMEOUT_SECONDS`` have passed, or failed if that was its last
+attempt. Finished jobs are deleted daily once they are older than
+``JOBS_RETENTION_DAYS``. Handlers registered with
+``every=`` seconds also run periodically: each run is a job keyed by its time
+slot, so however many workers schedule it, it runs once per period. Every
+app process runs a worker
+thread unless ``JOBS_WORKER_ENABLED=false``; a standalone worker runs with
+
+    python -m app.core.jobs
+"""
+import importlib
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import and_, delete, event, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import Counter, Histogram
+from app.db.database import SessionLocal
+from app.db.upsert import insert_ignoring_conflicts
+from app.models.job import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+# Modules whose handlers every worker must know about
+HANDLER_MODULES = ("app.db.purge", "app.db.activity", "app.db.deadlines", "app.db.flow")
+
+JOBS_ENQUEUED = Counter(
+    "teamhub_jobs_enqueued_total",
+    "Jobs enqueued, by job name.",
+    ("job",),
+)
+JOBS_PROCESSED = Counter(
+    "teamhub_jobs_processed_total",
+    "Job attempts finished, by job name and outcome (done, retry, failed).",
+    ("job", "outcome"),
+)
+JOB_DURATION = Histogram(
+    "teamhub_job_duration_seconds",
+    "Time spent running a job attempt.",
+    ("job",),
+)
+
+_handlers: Dict[str, Callable[..., object]] = {}
+_periodic: Dict[str, float] = {}
+# Set after a commit that enqueued jobs, so an in-process worker wakes at once
+_wakeup = threading.Event()
+
+
+def job(name: str, every: Optional[float] = None):
+    """
+    Register the decorated function as the handler for jobs called ``name``;
+    with ``every``, also run it once every ``every`` seconds.
+    """
+    def register(func):
+        _handlers[name] = func
+        if every:
+            _periodic[name] = every
+        return func
+    return register
+
+
+def load_handlers() -> None:
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue(
+    db: Session,
+    name: str,
+    payload: Optional[dict] = None,
+    key: Optional[str] = None,
+    delay: float = 0,
+    max_attempts: Optional[int] = None,
+) -> None:
+    """Add a job to ``db``'s transaction; workers see it once the caller commits."""
+    row = {
+        "name": name,
+        "payload": payload or {},
+        "idempotency_key": key,
+        "status": JobStatus.PENDING,
+        "attempts": 0,
+        "max_attempts": max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        "run_at": _now() + timedelta(seconds=delay),
+    }
+    if key is None:
+        db.execute(insert(Job).values(row))
+    else:
+        insert_ignoring_conflicts(db, Job, [row], ["idempotency_key"], [Job.id])
+    db.info["jobs_enqueued"] = True
+    JOBS_ENQUEUED.inc(job=name)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _wake_worker(session):
+    if session.info.pop("jobs_enqueued", False):
+        _wakeup.set()
+
+
+def _schedule_next(db: Session, name: str) -> None:
+    every = _periodic[name]
+    now = time.time()
+    slot = int(now // every) + 1
+    enqueue(db, name, key=f"{name}:{slot}", delay=slot * every - now)
+
+
+def schedule_periodic() -> None:
+    """Enqueue the next run of every periodic job, unless it is already enqueued."""
+    db = SessionLocal()
+    try:
+        for name in _periodic:
+            _schedule_next(db, name)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _backoff(attempts: int) -> float:
+    return min(settings.JOBS_RETRY_MAX_SECONDS, settings.JOBS_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+
+def _fail_abandoned(db: Session, now: datetime, stale: datetime) -> None:
+    """
+    Fail jobs whose worker died during their last attempt, rather than
+    running them again. A periodic job gets its next run enqueued, as if
+    the attempt had failed in ``run_once``.
+    """
+    abandoned = db.execute(
+        update(Job).where(
+            Job.status == JobStatus.RUNNING, Job.locked_at < stale, Job.attempts >= Job.max_attempts
+        ).values(
+            status=JobStatus.FAILED, locked_by=None, locked_at=None, finished_at=now,
+            last_error="worker lost the job during its last attempt"
+        ).returning(Job.name).execution_options(synchronize_session=False)
+    ).scalars().all()
+    for name in abandoned:
+        JOBS_PROCESSED.inc(job=name, outcome="failed")
+        if name in _periodic:
+            _schedule_next(db, name)
+
+
+def _claim(db: Session, worker_id: str):
+    now = _now()
+    stale = now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT_SECONDS)
+    _fail_abandoned(db, now, stale)
+    due = select(Job.id).where(or_(
+        and_(Job.status == JobStatus.PENDING, Job.run_at <= now),
+        and_(Job.status == JobStatus.RUNNING, Job.locked_at < stale, Job.attempts < Job.max_attempts),
+    )).order_by(Job.run_at).limit(1).with_for_update(skip_locked=True).scalar_subquery()
+    claimed = db.execute(
+        update(Job).where(Job.id == due).values(
+            status=JobStatus.RUNNING,
+            locked_by=worker_id,
+            locked_at=now,
+            attempts=Job.attempts + 1,
+        ).returning(Job.id, Job.name, Job.payload, Job.attempts, Job.max_attempts)
+        .execution_options(synchronize_session=False)
+    ).first()
+    db.commit()
+    return claimed
+
+
+def _finish(db: Session, job_id: int, **values) -> None:
+    db.execute(
+        update(Job).where(Job.id == job_id).values(locked_by=None, locked_at=None, **values)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+@job("prune_jobs", every=24 * 60 * 60)
+def prune_jobs(batch_size: int = 1000) -> int:
+    """Delete done and failed jobs finished more than JOBS_RETENTION_DAYS ago; returns how many."""
+    cutoff = _now() - timedelta(days=settings.JOBS_RETENTION_DAYS)
+    batch = select(Job.id).where(
+        Job.status.in_((JobStatus.DONE, JobStatus.FAILED)), Job.finished_at < cutoff
+    ).limit(batch_size).scalar_subquery()
+    db = SessionLocal()
+    try:
+        removed = 0
+        while True:
+            result = db.execute(
+                delete(Job).where(Job.id.in_(batch)).execution_options(synchronize_session=False)
+            )
+            db.commit()
+            removed += result.rowcount
+            if result.rowcount < batch_size:
+                return removed
+    finally:
+        db.close()
+
+
+def run_once(worker_id: Optional[str] = None) -> bool:
+    """Claim and run one due job. Returns False when there was nothing to do."""
+    worker_id = worker_id or _default_worker_id()
+    db = SessionLocal()
+    try:
+        claimed = _claim(db, worker_id)
+        if claimed is None:
+            return False
+        job_id, name, payload, attempts, max_attempts = claimed
+        started = time.perf_counter()
+        try:
+            handler = _handlers.get(name)
+            if handler is None:
+                raise LookupError(f"no handler registered for job {name!r}")
+            handler(**payload)
+        except Exception as exc:
+            logger.exception("job %s (%s) failed on attempt %d", job_id, name, attempts)
+            db.rollback()
+            if attempts >= max_attempts:
+                _finish(db, job_id, status=JobStatus.FAILED, last_error=repr(exc), finished_at=_now())
+                JOBS_PROCESSED.inc(job=name, outcome="failed")
+            else:
+                _finish(
+                    db, job_id, status=JobStatus.PENDING, last_error=repr(exc),
+                    run_at=_now() + timedelta(seconds=_backoff(attempts))
+                )
+                JOBS_PROCESSED.inc(job=name, outcome="retry")
+        else:
+            _finish(db, job_id, status=JobStatus.DONE, last_error=None, finished_at=_now())
+            JOBS_PROCESSED.inc(job=name, outcome="done")
+        finally:
+            JOB_DURATION.observe(time.perf_counter() - started, job=name)
+        if name in _periodic:
+            _schedule_next(db, name)
+            db.commit()
+        return True
+    finally:
+        db.close()
+
+
+def run_pending(worker_id: Optional[str] = None) -> int:
+    """Run due jobs until none are left; returns how many were run."""
+    count = 0
+    while run_once(worker_id):
+        count += 1
+    return count
+
+
+def _default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+class JobWorker:
+    """Runs due jobs on a daemon thread, polling between batches."""
+
+    def __init__(self, poll_interval: Optional[float] = None):
+        self.poll_interval = settings.JOBS_POLL_INTERVAL_SECONDS if poll_interval is None else poll_interval
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        load_handlers()
+        self._thread = threading.Thread(target=self.run, name="teamhub-jobs", daemon=True)
+        self._thread.start()
+
+    def run(self) -> None:
+        worker_id = _default_worker_id()
+        scheduled = False
+        while not self._stopping.is_set():
+            try:
+                if not scheduled:
+                    schedule_periodic()
+                    scheduled = True
+                run_pending(worker_id)
+            except Exception:
+                # Database unavailable and the like; try again on the next poll
+                logger.exception("job worker poll failed")
+            _wakeup.wait(self.poll_interval)
+            _wakeup.clear()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        _wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    load_handlers()
+    worker = JobWorker()
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+On-demand request profiling and the slow-request log.
+
+When ``PROFILING_ENABLED`` is set, an admin can profile a single request by
+sending ``X-Profile: store`` (or ``?_profile=store``). While that request
+runs, a sampling thread records the stacks of every busy thread and
+tracemalloc tracks allocations. The result is written to
+``PROFILING_OUTPUT_DIR`` as ``<id>.folded`` (collapsed stacks, readable by
+flamegraph.pl and speedscope) plus ``<id>.alloc.txt``, and the response
+carries ``X-Profile-Id``. ``X-Profile: return`` replaces the response body
+with a JSON document containing the same data instead.
+
+Samples are taken from all threads in the worker, so requests running
+concurrently in the same process show up in the profile too.
+
+Independently, ``SlowRequestLog`` keeps the slowest N requests per route
+template for ``GET /api/admin/slow-requests``.
+"""
+import heapq
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter as Tally
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.deps import principal_from_token
+from app.core.config import settings
+from app.db.database import ReadSessionLocal
+from app.models.user import UserRole
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_PARAM = "_profile"
+TOP_ALLOCATIONS = 25
+
+# A thread whose innermost frame is in one of these modules is waiting, not working
+_IDLE_MODULES = ("threading.py", "queue.py", "selectors.py", "socket.py")
+
+
+class StackSampler:
+    """Periodically samples the stacks of all other threads into collapsed form."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Tally = Tally()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                if frame.f_code.co_filename.endswith(_IDLE_MODULES):
+                    continue
+                self.samples[_collapse(frame)] += 1
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+
+def _collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        filename = os.path.basename(code.co_filename)
+        names.append(f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":"))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def _allocation_report(snapshot: tracemalloc.Snapshot) -> List[str]:
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    return [str(stat) for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]]
+
+
+def _profile_mode(scope: Scope) -> Optional[str]:
+    for name, value in scope.get("headers", []):
+        if name == PROFILE_HEADER:
+            return value.decode("latin-1").strip().lower() or None
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    values = query.get(PROFILE_QUERY_PARAM)
+    return values[0].lower() if values else None
+
+
+def _is_admin_request(scope: Scope) -> bool:
+    """Whether the bearer token belongs to an admin, using the principal cache ``get_current_user`` fills."""
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return False
+            db = ReadSessionLocal()
+            try:
+                user = principal_from_token(token, db)
+            finally:
+                db.close()
+            return user is not None and user.role == UserRole.ADMIN
+    return False
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp, enabled: Optional[bool] = None, output_dir: Optional[str] = None):
+        self.app = app
+        self.enabled = settings.PROFILING_ENABLED if enabled is None else enabled
+        self.output_dir = output_dir or settings.PROFILING_OUTPUT_DIR
+        self.interval = settings.PROFILING_SAMPLE_INTERVAL_MS / 1000.0
+        self._lock = threading.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = _profile_mode(scope)
+        if mode not in ("1", "store", "return") or not await run_in_threadpool(_is_admin_request, scope):
+            await self.app(scope, receive, send)
+            return
+
+        # tracemalloc and the sampler are process-wide; profile one request at a time
+        if not self._lock.acquire(blocking=False):
+            await JSONResponse(
+                {"detail": "Another request is being profiled"},
+                status_code=409,
+            )(scope, receive, send)
+            return
+        try:
+            await self._profile(scope, receive, send, mode)
+        finally:
+            self._lock.release()
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send, mode: str) -> None:
+        profile_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if mode != "return":
+                    message.setdefault("headers", []).append((b"x-profile-id", profile_id.encode()))
+            if mode != "return":
+                await send(message)
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        sampler = StackSampler(self.interval)
+        sampler.start()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            sampler.stop()
+            allocations = _allocation_report(tracemalloc.take_snapshot())
+            if started_tracing:
+                tracemalloc.stop()
+
+        if mode == "return":
+            await JSONResponse({
+                "profile_id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status_code": status_code,
+                "duration_ms": round(duration_ms, 2),
+                "folded": sampler.folded(),
+                "allocations": allocations,
+            })(scope, receive, send)
+        else:
+            await run_in_threadpool(self._store, profile_id, scope, duration_ms, sampler, allocations)
+
+    def _store(self, profile_id: str, scope: Scope, duration_ms: float, sampler: StackSampler, allocations: List[str]) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, profile_id)
+        with open(f"{base}.folded", "w") as f:
+            f.write(sampler.folded() + "\n")
+        with open(f"{base}.alloc.txt", "w") as f:
+            f.write(f"# {scope['method']} {scope['path']} {duration_ms:.1f}ms\n")
+            f.write("\n".join(allocations) + "\n")
+
+
+class SlowRequestLog:
+    """Keeps the ``size`` slowest requests seen for each route template (default from settings)."""
+
+    def __init__(self, size: Optional[int] = None):
+        self._size = size
+        self._heaps: Dict[str, List[tuple]] = {}
+        self._lock = threading.Lock()
+        self._sequence = 0
+
+    @property
+    def size(self) -> int:
+        if self._size is None:
+            self._size = settings.SLOW_REQUEST_LOG_SIZE
+        return self._size
+
+    def record(self, route: str, duration: float, entry: dict) -> None:
+        if self.size <= 0:
+            return
+        with self._lock:
+            heap = self._heaps.setdefault(route, [])
+            # fast path: not slower than the fastest request we already keep
+            if len(heap) >= self.size and duration <= heap[0][0]:
+                return
+            self._sequence += 1
+            item = (duration, self._sequence, entry)
+            if len(heap) < self.size:
+                heapq.heappush(heap, item)
+            else:
+                heapq.heapreplace(heap, item)
+
+    def snapshot(self) -> Dict[str, List[dict]]:
+        with self._lock:
+            return {
+                route: [entry for _, _, entry in sorted(heap, key=lambda item: item[0], reverse=True)]
+                for route, heap in sorted(self._heaps.items())
+            }
+
+
+slow_requests = SlowRequestLog()
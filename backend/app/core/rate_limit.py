@@ -0,0 +1,265 @@
+"""
+Admission control for the API.
+
+Two independent guards run before a request reaches the routers:
+
+* a token bucket per (route class, user) so a single client cannot monopolise
+  the database pool, and
+* a global cap on in-flight requests with a short queue timeout, so overload
+  is answered with a fast 503 instead of an ever-growing latency cliff.
+
+Buckets live in-process by default. Set ``RATE_LIMIT_STORE_URL`` to a Redis
+URL to share them between uvicorn workers.
+"""
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional
+from urllib.parse import parse_qs
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import Counter
+from app.core.security import decode_access_token
+
+
+AUTH = "auth"
+HEAVY_READ = "heavy_read"
+WRITE = "write"
+READ = "read"
+
+EXEMPT_PATHS = {"/", "/health", "/ready", "/metrics", "/docs", "/redoc", "/openapi.json"}
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Scope key under which the middleware leaves itself for POST /api/batch
+ADMISSION_SCOPE_KEY = "teamhub.admission_control"
+
+REQUESTS_REJECTED = Counter(
+    "teamhub_requests_rejected_total",
+    "Requests rejected by admission control.",
+    ("reason", "route_class"),
+)
+
+
+class RouteLimit(NamedTuple):
+    capacity: float
+    refill_per_second: float
+
+
+def default_limits() -> Dict[str, RouteLimit]:
+    def per_minute(count: int) -> RouteLimit:
+        return RouteLimit(capacity=count, refill_per_second=count / 60.0)
+
+    return {
+        AUTH: per_minute(settings.RATE_LIMIT_AUTH_PER_MINUTE),
+        HEAVY_READ: per_minute(settings.RATE_LIMIT_HEAVY_READ_PER_MINUTE),
+        WRITE: per_minute(settings.RATE_LIMIT_WRITE_PER_MINUTE),
+        READ: per_minute(settings.RATE_LIMIT_READ_PER_MINUTE),
+    }
+
+
+class InMemoryRateLimitStore:
+    """
+    Token buckets kept in this process only. At most ``max_keys`` buckets are
+    kept; the least recently used is dropped first, which only forgets a
+    client that has been idle (and so has mostly refilled) the longest.
+    """
+
+    def __init__(self, max_keys: Optional[int] = None):
+        self.max_keys = settings.RATE_LIMIT_MAX_KEYS if max_keys is None else max_keys
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def take(self, key: str, limit: RouteLimit, cost: float = 1) -> float:
+        """Consume ``cost`` tokens. Returns 0 when allowed, otherwise seconds to wait."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (limit.capacity, now))
+            tokens = min(limit.capacity, tokens + (now - updated) * limit.refill_per_second)
+            allowed = tokens >= cost
+            self._buckets[key] = (tokens - cost if allowed else tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            if allowed:
+                return 0.0
+            return (cost - tokens) / limit.refill_per_second
+
+
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+  tokens = tokens - cost
+else
+  wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisRateLimitStore:
+    """Token buckets shared by every worker through Redis."""
+
+    def __init__(self, url: str, prefix: str = "teamhub:ratelimit:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError("RATE_LIMIT_STORE_URL requires the 'redis' package") from exc
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(_TAKE_SCRIPT)
+        self._prefix = prefix
+
+    async def take(self, key: str, limit: RouteLimit, cost: float = 1) -> float:
+        wait = await self._script(
+            keys=[self._prefix + key],
+            args=[limit.capacity, limit.refill_per_second, time.time(), cost],
+        )
+        return float(wait)
+
+
+def create_store(url: Optional[str] = None):
+    url = url or settings.RATE_LIMIT_STORE_URL
+    if url:
+        return RedisRateLimitStore(url)
+    return InMemoryRateLimitStore()
+
+
+def classify_request(scope: Scope) -> str:
+    path = scope["path"]
+    method = scope["method"]
+
+    if path.startswith("/api/auth/") and path != "/api/auth/me":
+        return AUTH
+    if method not in SAFE_METHODS:
+        return WRITE
+
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    if path.startswith("/api/dashboard/"):
+        return HEAVY_READ
+    if path.rstrip("/") == "/api/tasks" and "project_id" not in query:
+        return HEAVY_READ
+    if path.rstrip("/") == "/api/tasks/export":
+        return HEAVY_READ
+    if path.rstrip("/") == "/api/projects" and "workspace_id" not in query:
+        return HEAVY_READ
+    return READ
+
+
+def identify_client(scope: Scope) -> str:
+    """Key buckets by authenticated user when a valid token is present, else by IP."""
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                payload = decode_access_token(token)
+                if payload and payload.get("sub"):
+                    return f"user:{payload['sub']}"
+            break
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class AdmissionControlMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        store=None,
+        limits: Optional[Dict[str, RouteLimit]] = None,
+        max_in_flight: Optional[int] = None,
+        queue_timeout: Optional[float] = None,
+        rate_limit_enabled: Optional[bool] = None,
+    ):
+        self.app = app
+        self.rate_limit_enabled = (
+            settings.RATE_LIMIT_ENABLED if rate_limit_enabled is None else rate_limit_enabled
+        )
+        self.store = store or create_store()
+        self.limits = limits or default_limits()
+        self.max_in_flight = settings.MAX_IN_FLIGHT_REQUESTS if max_in_flight is None else max_in_flight
+        self.queue_timeout = (
+            settings.ADMISSION_QUEUE_TIMEOUT_SECONDS if queue_timeout is None else queue_timeout
+        )
+        self._slots = asyncio.Semaphore(self.max_in_flight) if self.max_in_flight > 0 else None
+        self._waiting = 0
+
+    async def charge(self, scope: Scope) -> float:
+        """
+        Take a token for ``scope`` from the bucket of its route class and
+        client. Returns 0 when allowed, otherwise seconds to wait.
+        """
+        if not self.rate_limit_enabled:
+            return 0.0
+        route_class = classify_request(scope)
+        retry_after = await self.store.take(f"{route_class}:{identify_client(scope)}", self.limits[route_class])
+        if retry_after > 0:
+            REQUESTS_REJECTED.inc(reason="rate_limited", route_class=route_class)
+        return retry_after
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        route_class = classify_request(scope)
+        # The outermost instance is the one POST /api/batch charges its items to
+        scope.setdefault(ADMISSION_SCOPE_KEY, self)
+
+        retry_after = await self.charge(scope)
+        if retry_after > 0:
+            await _reject(scope, receive, send, 429, "Rate limit exceeded", retry_after)
+            return
+
+        if self._slots is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Bound the queue as well: once as many requests are waiting as can run,
+        # a new arrival would only time out later, so fail it now.
+        if self._slots.locked() and self._waiting >= self.max_in_flight:
+            REQUESTS_REJECTED.inc(reason="queue_full", route_class=route_class)
+            await _reject(scope, receive, send, 503, "Server is busy, try again shortly", 1)
+            return
+
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            REQUESTS_REJECTED.inc(reason="queue_timeout", route_class=route_class)
+            await _reject(scope, receive, send, 503, "Server is busy, try again shortly", 1)
+            return
+        finally:
+            self._waiting -= 1
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._slots.release()
+
+
+def retry_after_header(retry_after: float) -> str:
+    return str(max(1, math.ceil(retry_after)))
+
+
+async def _reject(scope: Scope, receive: Receive, send: Send, status_code: int, detail: str, retry_after: float):
+    response = JSONResponse(
+        {"detail": detail},
+        status_code=status_code,
+        headers={"Retry-After": retry_after_header(retry_after)},
+    )
+    await response(scope, receive, send)
@@ -0,0 +1,120 @@
+"""
+The append-only activity log behind workspace feeds and the dashboard.
+
+Write paths call ``record`` in the same transaction as the change it
+describes, so an event exists exactly when its change commits. Events are
+never updated. Feeds read a workspace's newest events through the
+``(workspace_id, created_at)`` index instead of scanning its tasks.
+``prune_activity`` runs daily as a background job and removes events older
+than ``ACTIVITY_RETENTION_DAYS``; with ``ACTIVITY_PARTITION_BY_MONTH`` on
+Postgres it drops whole monthly partitions and creates the upcoming ones.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import insert, select, union_all
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.jobs import job
+from app.db.database import SessionLocal
+from app.db.partitioning import drop_activity_partitions_before, ensure_activity_partitions
+from app.db.purge import delete_in_batches
+from app.models.activity import ActivityEvent
+from app.models.user import User
+from app.schemas.activity import ActivityEventResponse
+
+
+def activity_row(
+    workspace_id: int,
+    actor_id: Optional[int],
+    verb: str,
+    subject_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    **data
+) -> dict:
+    return {
+        "workspace_id": workspace_id,
+        "actor_id": actor_id,
+        "verb": verb,
+        "subject_id": subject_id,
+        "project_id": project_id,
+        "data": data,
+        # Set here rather than by the server: microsecond timestamps on every
+        # backend keep the (created_at, id) feed cursor exact
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+def record_all(db: Session, rows: List[dict]) -> None:
+    """Append ``activity_row`` events in one INSERT, as part of ``db``'s transaction."""
+    if rows:
+        db.execute(insert(ActivityEvent).values(rows))
+
+
+def record(
+    db: Session,
+    workspace_id: int,
+    actor_id: Optional[int],
+    verb: str,
+    subject_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    **data
+) -> None:
+    record_all(db, [activity_row(workspace_id, actor_id, verb, subject_id, project_id, **data)])
+
+
+def feed_order():
+    return ActivityEvent.created_at.desc(), ActivityEvent.id.desc()
+
+
+def to_response(event: ActivityEvent, actor_name: Optional[str]) -> ActivityEventResponse:
+    return ActivityEventResponse(
+        id=event.id,
+        workspace_id=event.workspace_id,
+        actor_id=event.actor_id,
+        actor_name=actor_name,
+        verb=event.verb,
+        subject_id=event.subject_id,
+        project_id=event.project_id,
+        data=event.data,
+        created_at=event.created_at
+    )
+
+
+def recent_activity(db: Session, workspace_ids: Iterable[int], limit: int) -> Dict[int, List[ActivityEventResponse]]:
+    """The newest ``limit`` events of each workspace, each read as its own index top-N."""
+    newest = [
+        select(ActivityEvent.id).where(ActivityEvent.workspace_id == workspace_id)
+        .order_by(*feed_order()).limit(limit).subquery()
+        for workspace_id in workspace_ids
+    ]
+    if not newest:
+        return {}
+    ids = union_all(*(select(subquery.c.id) for subquery in newest))
+    rows = db.execute(
+        select(ActivityEvent, User.display_name)
+        .outerjoin(User, User.id == ActivityEvent.actor_id)
+        .where(ActivityEvent.id.in_(ids))
+        .order_by(*feed_order())
+    ).all()
+    feeds: Dict[int, List[ActivityEventResponse]] = {}
+    for event, actor_name in rows:
+        feeds.setdefault(event.workspace_id, []).append(to_response(event, actor_name))
+    return feeds
+
+
+@job("prune_activity", every=24 * 60 * 60)
+def prune_activity() -> int:
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=settings.ACTIVITY_RETENTION_DAYS)
+    db = SessionLocal()
+    try:
+        if settings.ACTIVITY_PARTITION_BY_MONTH and db.get_bind().dialect.name == "postgresql":
+            ensure_activity_partitions(db.connection(), now)
+            drop_activity_partitions_before(db.connection(), cutoff)
+            db.commit()
+        # Whatever is left before the cutoff, e.g. in the month straddling it
+        return delete_in_batches(db, ActivityEvent, ActivityEvent.created_at < cutoff)
+    finally:
+        db.close()
@@ -0,0 +1,93 @@
+"""
+Counter-cache columns: ``Workspace.project_count``, ``Project.task_count``,
+``Task.comment_count`` and the subtask rollups ``Task.subtask_count`` and
+``Task.subtasks_done`` (kept by app.db.subtasks).
+
+Write paths adjust a counter with a relative ``UPDATE ... SET n = n + 1`` in
+the same transaction that adds or removes the child row, so concurrent
+writers never lose an increment and a rollback undoes both. ``repair``
+recomputes every counter from the child tables; run it after bulk loads, or
+whenever a counter is suspected to have drifted:
+
+    python -m app.db.counters
+"""
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session, aliased
+
+from app.db.database import SessionLocal
+from app.models.workspace import Workspace
+from app.models.project import Project
+from app.models.task import Task, TaskClosure, TaskStatus
+from app.models.comment import Comment
+
+
+def adjust_project_count(db: Session, workspace_id: int, delta: int) -> None:
+    db.execute(
+        update(Workspace).where(Workspace.id == workspace_id)
+        .values(project_count=Workspace.project_count + delta)
+    )
+
+
+def adjust_task_count(db: Session, project_id: int, delta: int) -> None:
+    db.execute(
+        update(Project).where(Project.id == project_id)
+        .values(task_count=Project.task_count + delta)
+    )
+
+
+def adjust_comment_count(db: Session, workspace_id: int, task_id: int, delta: int) -> None:
+    db.execute(
+        update(Task).where(Task.workspace_id == workspace_id, Task.id == task_id)
+        .values(comment_count=Task.comment_count + delta)
+    )
+
+
+def _reconcile(db: Session, column, actual) -> int:
+    """Set ``column`` to ``actual`` on every row where they differ; returns rows fixed."""
+    model = column.class_
+    result = db.execute(
+        update(model).where(column != actual).values({column: actual})
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def repair(db: Session) -> int:
+    """Recompute every counter from its child rows. Returns the number of rows corrected."""
+    fixed = _reconcile(db, Workspace.project_count, select(func.count(Project.id)).where(
+        Project.workspace_id == Workspace.id,
+        Project.deleted_at.is_(None)
+    ).scalar_subquery())
+    fixed += _reconcile(db, Project.task_count, select(func.count(Task.id)).where(
+        Task.workspace_id == Project.workspace_id,
+        Task.project_id == Project.id
+    ).scalar_subquery())
+    fixed += _reconcile(db, Task.comment_count, select(func.count(Comment.id)).where(
+        Comment.workspace_id == Task.workspace_id,
+        Comment.task_id == Task.id
+    ).scalar_subquery())
+    descendant = aliased(Task)
+    fixed += _reconcile(db, Task.subtask_count, select(func.count()).select_from(TaskClosure).where(
+        TaskClosure.ancestor_id == Task.id
+    ).scalar_subquery())
+    fixed += _reconcile(db, Task.subtasks_done, select(func.count()).select_from(TaskClosure).join(
+        descendant, descendant.id == TaskClosure.descendant_id
+    ).where(
+        TaskClosure.ancestor_id == Task.id,
+        descendant.status == TaskStatus.DONE
+    ).scalar_subquery())
+    db.commit()
+    return fixed
+
+
+def main():
+    db = SessionLocal()
+    try:
+        fixed = repair(db)
+    finally:
+        db.close()
+    print(f"Repaired {fixed} counter(s)")
+
+
+if __name__ == "__main__":
+    main()
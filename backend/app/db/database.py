@@ -1,25 +1,221 @@
-from sqlalchemy import create_engine
+import contextvars
+import itertools
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
 
-# Convert postgres:// to postgresql:// (Render uses postgres://)
-database_url = settings.DATABASE_URL
-if database_url.startswith("postgres://"):
-    database_url = database_url.replace("postgres://", "postgresql+psycopg://", 1)
-elif database_url.startswith("postgresql://"):
-    database_url = database_url.replace("postgresql://", "postgresql+psycopg://", 1)
 
-engine = create_engine(database_url)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _database_url(url: str) -> str:
+    # Convert postgres:// to postgresql:// (Render uses postgres://)
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql+psycopg://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+psycopg://", 1)
+    return url
+
+
+def _create_engine(url: str) -> Engine:
+    url = _database_url(url)
+    kwargs = {}
+    if not url.startswith("sqlite"):
+        kwargs.update(pool_size=settings.DB_POOL_SIZE, max_overflow=settings.DB_MAX_OVERFLOW)
+    if url.startswith("postgresql+psycopg"):
+        # psycopg prepares a statement server-side once it has run this many times on a connection
+        threshold = settings.DB_PREPARE_THRESHOLD
+        kwargs["connect_args"] = {"prepare_threshold": threshold if threshold >= 0 else None}
+    engine = create_engine(url, **kwargs)
+    if url.startswith("sqlite"):
+        # Deletes rely on the ON DELETE CASCADE foreign keys, which SQLite ignores by default
+        @event.listens_for(engine, "connect")
+        def _enable_foreign_keys(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA foreign_keys=ON")
+            cursor.close()
+    return engine
+
+
+@lru_cache()
+def get_engine() -> Engine:
+    """The engine is created on first use so importing the app never touches the database."""
+    return _create_engine(settings.DATABASE_URL)
+
+
+class _Replica:
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.checked_at = float("-inf")
+        self.healthy = False
+
+
+class ReplicaSet:
+    """
+    Read replicas used round-robin. A replica is probed with ``SELECT 1`` at
+    most once per ``DATABASE_REPLICA_RETRY_SECONDS``; while a probe fails it
+    is skipped and reads go to another replica or the primary.
+    """
+
+    def __init__(self, urls: List[str], retry_seconds: float):
+        self.replicas = [_Replica(_create_engine(url)) for url in urls]
+        self.retry_seconds = retry_seconds
+        self._order = itertools.cycle(range(len(self.replicas)))
+        self._lock = threading.Lock()
+
+    @property
+    def engines(self) -> List[Engine]:
+        return [replica.engine for replica in self.replicas]
+
+    def _available(self, replica: _Replica) -> bool:
+        now = time.monotonic()
+        if now - replica.checked_at < self.retry_seconds:
+            return replica.healthy
+        replica.checked_at = now
+        try:
+            with replica.engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            replica.healthy = True
+        except Exception:
+            replica.healthy = False
+        return replica.healthy
+
+    def pick(self) -> Optional[Engine]:
+        for _ in range(len(self.replicas)):
+            with self._lock:
+                replica = self.replicas[next(self._order)]
+            if self._available(replica):
+                return replica.engine
+        return None
+
+    def dispose(self) -> None:
+        for replica in self.replicas:
+            replica.engine.dispose()
+
+
+@lru_cache()
+def get_replica_set() -> ReplicaSet:
+    urls = [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+    return ReplicaSet(urls, settings.DATABASE_REPLICA_RETRY_SECONDS)
+
+
+# Set per request by ReadReplicaMiddleware; only then may a session read from a replica
+reads_from_replica: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "reads_from_replica", default=False
+)
+
+# Set by POST /api/batch; its write sub-requests all run in this one session
+batch_session: contextvars.ContextVar[Optional[Session]] = contextvars.ContextVar(
+    "batch_session", default=None
+)
+
+
+_read_only_engines: Dict[Engine, Engine] = {}
 
-Base = declarative_base()
+
+def _read_only(engine: Engine) -> Engine:
+    """``engine`` with its transactions marked READ ONLY, DEFERRABLE where the database supports it."""
+    if engine.dialect.name != "postgresql":
+        return engine
+    if engine not in _read_only_engines:
+        _read_only_engines[engine] = engine.execution_options(
+            postgresql_readonly=True, postgresql_deferrable=True
+        )
+    return _read_only_engines[engine]
+
+
+def read_engine() -> Engine:
+    """The engine a read-only session would use: a healthy replica when the request may read from one."""
+    engine = None
+    if reads_from_replica.get():
+        engine = get_replica_set().pick()
+    return _read_only(engine or get_engine())
+
+
+class LazyEngineSession(Session):
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.info.get("read_only"):
+            return read_engine()
+        if self._flushing or getattr(clause, "is_dml", False):
+            self.info["wrote"] = True
+        if reads_from_replica.get() and not self.info.get("wrote"):
+            replica = get_replica_set().pick()
+            if replica is not None:
+                return replica
+        return get_engine()
+
+
+# Objects stay loaded after commit: responses are built from what was just
+# written instead of re-reading every row.
+SessionLocal = sessionmaker(
+    class_=LazyEngineSession, autocommit=False, autoflush=False, expire_on_commit=False
+)
+
+ReadSessionLocal = sessionmaker(
+    class_=LazyEngineSession, autocommit=False, autoflush=False, expire_on_commit=False,
+    info={"read_only": True},
+)
+
+
+@event.listens_for(ReadSessionLocal, "do_orm_execute")
+def _release_connection_after_read(orm_execute_state):
+    """
+    Read sessions hold a connection only while a statement runs: the rows
+    are buffered and the (read-only) transaction ends straight away, so the
+    connection is back in the pool before the handler builds its response.
+    """
+    if not orm_execute_state.is_select:
+        return None
+    frozen = orm_execute_state.invoke_statement().freeze()
+    orm_execute_state.session.commit()
+    return frozen()
+
+
+class _ModelBase:
+    # Fetch server-generated columns (ids, created_at, updated_at) with
+    # RETURNING as part of the INSERT or UPDATE itself. Models give
+    # updated_at an explicit NULL insert default so it is returned too
+    # rather than fetched by a separate SELECT.
+    __mapper_args__ = {"eager_defaults": True}
+
+
+Base = declarative_base(cls=_ModelBase)
+
+
+def __getattr__(name):
+    # `from app.db.database import engine` keeps working, resolved lazily
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_db():
+    shared = batch_session.get()
+    if shared is not None:
+        # The batch endpoint owns (and closes) the shared session
+        yield shared
+        return
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def get_read_db():
+    """
+    ``get_db`` for handlers that only read. No connection is taken until the
+    first query, each query runs in its own read-only transaction, and the
+    connection is returned to the pool as soon as its rows are fetched.
+    Separate statements do not share a snapshot.
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
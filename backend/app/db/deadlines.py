@@ -0,0 +1,78 @@
+"""
+Materialised deadline state for open tasks.
+
+``sweep_deadlines`` runs every few minutes as a background job. It range
+scans the partial index on open tasks' due dates and moves each task's
+``deadline_state`` forward, from on_track to due_soon (due within
+``DUE_SOON_DAYS``) to overdue, appending a ``task.due_soon`` or
+``task.overdue`` activity event for every task that crosses a threshold.
+Write paths set the state back to on_track when the due date changes or the
+task is closed or reopened, so the sweeper reminds again if need be.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.jobs import job
+from app.db.activity import activity_row, record_all
+from app.db.database import SessionLocal
+from app.db.purge import pending_project_ids
+from app.models.task import DeadlineState, Task, TaskStatus, open_with_due_date
+
+SWEEP_INTERVAL_SECONDS = 5 * 60
+SWEEP_BATCH_SIZE = 500
+
+
+def rearm_reminders(task: Task, previous_status: TaskStatus, previous_due_date: Optional[datetime]) -> None:
+    """Reset ``task``'s deadline state after a write that moved its due date or closed/reopened it."""
+    reopened_or_closed = task.status != previous_status and TaskStatus.DONE in (task.status, previous_status)
+    if task.due_date != previous_due_date or reopened_or_closed:
+        task.deadline_state = DeadlineState.ON_TRACK
+
+
+def _advance(db: Session, state: DeadlineState, verb: str, due_before: datetime, *current_states) -> int:
+    batch = select(Task.id).where(
+        open_with_due_date(),
+        Task.due_date < due_before,
+        Task.deadline_state.in_(current_states),
+        Task.project_id.not_in(pending_project_ids())
+    ).limit(SWEEP_BATCH_SIZE).scalar_subquery()
+    crossed = 0
+    while True:
+        rows = db.execute(
+            update(Task).where(Task.id.in_(batch)).values(deadline_state=state)
+            .returning(Task.id, Task.workspace_id, Task.project_id, Task.title, Task.assignee_id, Task.due_date)
+            .execution_options(synchronize_session=False)
+        ).all()
+        record_all(db, [
+            activity_row(
+                row.workspace_id, None, verb, row.id, row.project_id,
+                title=row.title, assignee_id=row.assignee_id, due_date=row.due_date.isoformat()
+            )
+            for row in rows
+        ])
+        db.commit()
+        crossed += len(rows)
+        if len(rows) < SWEEP_BATCH_SIZE:
+            return crossed
+
+
+@job("sweep_deadlines", every=SWEEP_INTERVAL_SECONDS)
+def sweep_deadlines() -> int:
+    """Advance deadline states; returns the number of tasks that crossed a threshold."""
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        crossed = _advance(
+            db, DeadlineState.OVERDUE, "task.overdue", now, DeadlineState.ON_TRACK, DeadlineState.DUE_SOON
+        )
+        crossed += _advance(
+            db, DeadlineState.DUE_SOON, "task.due_soon", now + timedelta(days=settings.DUE_SOON_DAYS),
+            DeadlineState.ON_TRACK
+        )
+        return crossed
+    finally:
+        db.close()
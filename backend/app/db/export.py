@@ -0,0 +1,219 @@
+"""
+Streaming exports of tasks for analytics.
+
+Tasks are read through a server-side cursor (``stream_results``) in batches
+of ``EXPORT_BATCH_SIZE`` rows. Each batch is turned into columns and written
+out before the next one is fetched, so memory stays flat however many tasks
+are exported. Every row carries its project, workspace and assignee, plus,
+from the status history where there is one, when the task was started and
+completed. CSV needs nothing extra; Parquet (one row group per batch) needs
+the ``pyarrow`` package. Nightly exports run outside the API with
+
+    python -m app.db.export tasks.parquet [--workspace ID ...]
+"""
+import argparse
+import csv
+import enum
+import io
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy import case, func, select
+from sqlalchemy.engine import Connection
+
+from app.db.database import read_engine
+from app.models.flow import TaskStatusTransition
+from app.models.project import Project
+from app.models.task import Task, TaskStatus
+from app.models.user import User
+from app.models.workspace import Workspace
+
+EXPORT_BATCH_SIZE = 5000
+
+
+class ExportFormat(str, enum.Enum):
+    CSV = "csv"
+    PARQUET = "parquet"
+
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+}
+
+_TASK_COLUMNS = (
+    Task.id, Task.title, Task.description, Task.status, Task.priority, Task.due_date,
+    Task.position, Task.comment_count, Task.created_by, Task.created_at, Task.updated_at,
+    Task.project_id, Project.name.label("project_name"),
+    Task.workspace_id, Workspace.name.label("workspace_name"),
+    Task.assignee_id, User.email.label("assignee_email"), User.display_name.label("assignee_name"),
+    Task.parent_id, Task.subtask_count, Task.subtasks_done,
+)
+_HISTORY_COLUMNS = ("started_at", "completed_at", "status_changes")
+
+COLUMNS = (*(column.key for column in _TASK_COLUMNS), *_HISTORY_COLUMNS)
+
+
+def _tasks_query(workspace_ids: Optional[Sequence[int]]):
+    query = select(*_TASK_COLUMNS).join(
+        Project, Project.id == Task.project_id
+    ).join(
+        Workspace, Workspace.id == Task.workspace_id
+    ).outerjoin(
+        User, User.id == Task.assignee_id
+    ).where(
+        Project.deleted_at.is_(None), Workspace.deleted_at.is_(None)
+    ).order_by(Task.id)
+    if workspace_ids is not None:
+        query = query.where(Task.workspace_id.in_(workspace_ids))
+    return query
+
+
+def _history(connection: Connection, task_ids: List[int]) -> Dict[int, tuple]:
+    """(started_at, completed_at, status_changes) for the tasks in ``task_ids`` that have history."""
+    started = case(
+        (TaskStatusTransition.to_status.is_not(None) & (TaskStatusTransition.to_status != TaskStatus.TODO),
+         TaskStatusTransition.created_at)
+    )
+    completed = case((TaskStatusTransition.to_status == TaskStatus.DONE, TaskStatusTransition.created_at))
+    rows = connection.execute(
+        select(
+            TaskStatusTransition.task_id,
+            func.min(started),
+            func.max(completed),
+            func.count(TaskStatusTransition.from_status)
+        ).where(
+            TaskStatusTransition.task_id.in_(task_ids)
+        ).group_by(TaskStatusTransition.task_id)
+    )
+    return {task_id: history for task_id, *history in rows}
+
+
+def _plain(value):
+    return value.value if isinstance(value, enum.Enum) else value
+
+
+def iter_batches(
+    connection: Connection, workspace_ids: Optional[Sequence[int]] = None, batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[Dict[str, list]]:
+    """
+    Yield the export as ``{column: [values]}`` batches of up to ``batch_size``
+    tasks, in id order. ``workspace_ids`` limits it to those workspaces.
+    """
+    result = connection.execution_options(yield_per=batch_size).execute(_tasks_query(workspace_ids))
+    no_history = (None,) * (len(_HISTORY_COLUMNS) - 1) + (0,)
+    for rows in result.partitions():
+        history = _history(connection, [row.id for row in rows])
+        rows = [(*row, *history.get(row.id, no_history)) for row in rows]
+        yield {name: [_plain(value) for value in values] for name, values in zip(COLUMNS, zip(*rows))}
+
+
+def write_csv(batches: Iterable[Dict[str, list]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for batch in batches:
+        writer.writerows(
+            [value.isoformat() if isinstance(value, datetime) else value for value in row]
+            for row in zip(*(batch[name] for name in COLUMNS))
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands what was written since the last ``drain`` back as bytes."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise RuntimeError("Parquet export requires the 'pyarrow' package") from exc
+    return pyarrow, pyarrow.parquet
+
+
+def write_parquet(batches: Iterable[Dict[str, list]]) -> Iterator[bytes]:
+    pa, pq = require_pyarrow()
+    timestamp = pa.timestamp("us", tz="UTC")
+    types = {
+        "id": pa.int64(), "title": pa.string(), "description": pa.string(),
+        "status": pa.dictionary(pa.int8(), pa.string()), "priority": pa.dictionary(pa.int8(), pa.string()),
+        "due_date": timestamp, "position": pa.int32(), "comment_count": pa.int32(),
+        "created_by": pa.int64(), "created_at": timestamp, "updated_at": timestamp,
+        "project_id": pa.int64(), "project_name": pa.string(),
+        "workspace_id": pa.int64(), "workspace_name": pa.string(),
+        "assignee_id": pa.int64(), "assignee_email": pa.string(), "assignee_name": pa.string(),
+        "parent_id": pa.int64(), "subtask_count": pa.int32(), "subtasks_done": pa.int32(),
+        "started_at": timestamp, "completed_at": timestamp, "status_changes": pa.int32(),
+    }
+    schema = pa.schema([(name, types[name]) for name in COLUMNS])
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for batch in batches:
+            writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+WRITERS = {ExportFormat.CSV: write_csv, ExportFormat.PARQUET: write_parquet}
+
+
+def export_tasks(
+    export_format: ExportFormat, workspace_ids: Optional[Sequence[int]] = None, batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[bytes]:
+    """
+    The export as a stream of bytes. The engine (a replica when the request
+    may read from one) is picked now; its connection is opened on the first
+    ``next()`` and held until the stream is exhausted or closed.
+    """
+    engine = read_engine()
+
+    def stream() -> Iterator[bytes]:
+        with engine.connect() as connection:
+            yield from WRITERS[export_format](iter_batches(connection, workspace_ids, batch_size))
+
+    return stream()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export tasks as CSV or Parquet.")
+    parser.add_argument("output", help="file to write; the format follows the extension unless --format is given")
+    parser.add_argument("--format", choices=[f.value for f in ExportFormat])
+    parser.add_argument("--workspace", type=int, action="append", help="limit to this workspace (repeatable)")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    export_format = ExportFormat(args.format or ("parquet" if args.output.endswith(".parquet") else "csv"))
+    with open(args.output, "wb") as output:
+        for chunk in export_tasks(export_format, args.workspace, args.batch_size):
+            output.write(chunk)
+    print(f"Exported tasks to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
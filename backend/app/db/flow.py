@@ -0,0 +1,168 @@
+"""
+Task status history and the daily per-project rollups behind the flow
+analytics (cumulative flow, burndown, cycle time).
+
+Write paths call ``record_transition`` in the transaction that creates,
+moves or deletes a task. ``rollup_transitions`` runs as a periodic job:
+it claims the transitions not yet rolled up, folds them into
+``project_daily_flow`` with one upsert per batch, and marks them done in the
+same transaction, so each transition is counted exactly once. Cycle time is
+measured from the first time a task left TODO to its completion.
+
+Tasks created before history was recorded have no transitions; give them
+one (their creation, in their current status) and roll everything up with
+
+    python -m app.db.flow
+"""
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.jobs import job
+from app.db.database import SessionLocal
+from app.db.upsert import insert_or_increment
+from app.models.flow import ProjectDailyFlow, TaskStatusTransition
+from app.models.task import Task, TaskStatus
+
+ROLLUP_INTERVAL_SECONDS = 10 * 60
+ROLLUP_BATCH_SIZE = 1000
+
+_STATUS_COLUMNS = {
+    TaskStatus.TODO: "todo",
+    TaskStatus.IN_PROGRESS: "in_progress",
+    TaskStatus.REVIEW: "review",
+    TaskStatus.DONE: "done",
+}
+_COUNTER_COLUMNS = (*_STATUS_COLUMNS.values(), "completed", "cycle_time_seconds", "cycle_time_count")
+
+
+def record_transition(
+    db: Session, task: Task, from_status: Optional[TaskStatus], to_status: Optional[TaskStatus], actor_id: Optional[int]
+) -> None:
+    db.execute(insert(TaskStatusTransition).values(
+        workspace_id=task.workspace_id,
+        project_id=task.project_id,
+        task_id=task.id,
+        from_status=from_status,
+        to_status=to_status,
+        actor_id=actor_id,
+        created_at=datetime.now(timezone.utc)
+    ))
+
+
+def _started_at(db: Session, task_ids) -> Dict[int, Tuple[int, datetime]]:
+    """(transition id, time) at which each task first entered a status other than TODO."""
+    first = select(
+        TaskStatusTransition.task_id,
+        TaskStatusTransition.id,
+        TaskStatusTransition.created_at,
+        func.row_number().over(
+            partition_by=TaskStatusTransition.task_id,
+            order_by=(TaskStatusTransition.created_at, TaskStatusTransition.id)
+        ).label("n")
+    ).where(
+        TaskStatusTransition.task_id.in_(task_ids),
+        TaskStatusTransition.to_status.is_not(None),
+        TaskStatusTransition.to_status != TaskStatus.TODO
+    ).subquery()
+    rows = db.execute(select(first.c.task_id, first.c.id, first.c.created_at).where(first.c.n == 1)).all()
+    return {task_id: (transition_id, created_at) for task_id, transition_id, created_at in rows}
+
+
+def _utc_day(value: datetime) -> date:
+    """The UTC day of ``value``; naive datetimes (sqlite) are already UTC."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+def _rollup_batch(db: Session) -> int:
+    batch = select(TaskStatusTransition.id).where(
+        ~TaskStatusTransition.rolled_up
+    ).order_by(TaskStatusTransition.id).limit(ROLLUP_BATCH_SIZE).scalar_subquery()
+    transitions = db.execute(
+        update(TaskStatusTransition)
+        .where(TaskStatusTransition.id.in_(batch), ~TaskStatusTransition.rolled_up)
+        .values(rolled_up=True)
+        .returning(
+            TaskStatusTransition.id, TaskStatusTransition.workspace_id, TaskStatusTransition.project_id,
+            TaskStatusTransition.task_id, TaskStatusTransition.from_status, TaskStatusTransition.to_status,
+            TaskStatusTransition.created_at
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    completed = {t.task_id for t in transitions if t.to_status == TaskStatus.DONE}
+    started = _started_at(db, completed) if completed else {}
+
+    days: Dict[tuple, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(_COUNTER_COLUMNS, 0))
+    for t in transitions:
+        counters = days[(t.workspace_id, t.project_id, _utc_day(t.created_at))]
+        if t.from_status is not None:
+            counters[_STATUS_COLUMNS[t.from_status]] -= 1
+        if t.to_status is not None:
+            counters[_STATUS_COLUMNS[t.to_status]] += 1
+        if t.to_status == TaskStatus.DONE:
+            counters["completed"] += 1
+            start = started.get(t.task_id)
+            # Done straight from TODO (or with no earlier history): no cycle time
+            if start is not None and start[0] != t.id:
+                counters["cycle_time_seconds"] += int((t.created_at - start[1]).total_seconds())
+                counters["cycle_time_count"] += 1
+
+    insert_or_increment(
+        db, ProjectDailyFlow,
+        [
+            {"workspace_id": workspace_id, "project_id": project_id, "day": day, **counters}
+            for (workspace_id, project_id, day), counters in days.items()
+        ],
+        conflict_columns=("project_id", "day"),
+        increment_columns=_COUNTER_COLUMNS
+    )
+    db.commit()
+    return len(transitions)
+
+
+@job("rollup_transitions", every=ROLLUP_INTERVAL_SECONDS)
+def rollup_transitions() -> int:
+    """Fold every pending transition into the daily rollups; returns how many were folded."""
+    db = SessionLocal()
+    try:
+        total = 0
+        while True:
+            folded = _rollup_batch(db)
+            total += folded
+            if folded < ROLLUP_BATCH_SIZE:
+                return total
+    finally:
+        db.close()
+
+
+def seed_history(db: Session) -> int:
+    """Give every task without history a creation transition into its current status."""
+    untracked = select(
+        Task.workspace_id, Task.project_id, Task.id, Task.status, Task.created_at
+    ).where(
+        ~select(TaskStatusTransition.id).where(TaskStatusTransition.task_id == Task.id).exists()
+    )
+    result = db.execute(insert(TaskStatusTransition).from_select(
+        ["workspace_id", "project_id", "task_id", "to_status", "created_at"], untracked
+    ))
+    db.commit()
+    return result.rowcount
+
+
+def main():
+    db = SessionLocal()
+    try:
+        seeded = seed_history(db)
+    finally:
+        db.close()
+    print(f"Seeded history for {seeded} task(s), rolled up {rollup_transitions()} transition(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Pre-built statements for the lookups nearly every request runs.
+
+Each lookup is a ``lambda_stmt``: SQLAlchemy constructs the statement and
+its cache key once per call site, and later calls only extract the new
+parameter values instead of rebuilding the query the way ``db.query(...)``
+does on every call. The compiled SQL then comes from the engine's compiled
+cache, and on Postgres psycopg prepares it server-side once it has run
+``DB_PREPARE_THRESHOLD`` times on a connection.
+"""
+from typing import Optional, Tuple
+
+from sqlalchemy import and_, lambda_stmt, select
+from sqlalchemy.orm import Session, joinedload
+
+from app.models.user import User
+from app.models.workspace import Workspace, WorkspaceMember
+from app.models.project import Project
+from app.models.task import Task
+from app.models.comment import Comment
+from app.models.document import Document
+
+
+def user_by_id(db: Session, user_id: int) -> Optional[User]:
+    return db.execute(lambda_stmt(
+        lambda: select(User).where(User.id == user_id)
+    )).scalars().first()
+
+
+def workspace_by_id(db: Session, workspace_id: int) -> Optional[Workspace]:
+    return db.execute(lambda_stmt(
+        lambda: select(Workspace).where(Workspace.id == workspace_id, Workspace.deleted_at.is_(None))
+    )).scalars().first()
+
+
+def project_by_id(db: Session, project_id: int) -> Optional[Project]:
+    return db.execute(lambda_stmt(
+        lambda: select(Project).where(Project.id == project_id, Project.deleted_at.is_(None))
+    )).scalars().first()
+
+
+def task_by_id(db: Session, workspace_id: Optional[int], task_id: int) -> Optional[Task]:
+    return db.execute(lambda_stmt(
+        lambda: select(Task).where(Task.workspace_id == workspace_id, Task.id == task_id)
+    )).scalars().first()
+
+
+def task_with_people_by_id(db: Session, workspace_id: Optional[int], task_id: int) -> Optional[Task]:
+    """Like ``task_by_id``, with the assignee and creator loaded in the same query."""
+    return db.execute(lambda_stmt(
+        lambda: select(Task).options(
+            joinedload(Task.assignee), joinedload(Task.creator)
+        ).where(Task.workspace_id == workspace_id, Task.id == task_id)
+    )).scalars().first()
+
+
+def comment_by_id(db: Session, workspace_id: Optional[int], comment_id: int) -> Optional[Comment]:
+    return db.execute(lambda_stmt(
+        lambda: select(Comment).where(Comment.workspace_id == workspace_id, Comment.id == comment_id)
+    )).scalars().first()
+
+
+def comment_with_author_by_id(db: Session, workspace_id: Optional[int], comment_id: int) -> Optional[Comment]:
+    """Like ``comment_by_id``, with the author loaded in the same query."""
+    return db.execute(lambda_stmt(
+        lambda: select(Comment).options(
+            joinedload(Comment.user)
+        ).where(Comment.workspace_id == workspace_id, Comment.id == comment_id)
+    )).scalars().first()
+
+
+def document_by_id(db: Session, workspace_id: Optional[int], document_id: int) -> Optional[Document]:
+    return db.execute(lambda_stmt(
+        lambda: select(Document).where(Document.workspace_id == workspace_id, Document.id == document_id)
+    )).scalars().first()
+
+
+def document_with_creator_by_id(db: Session, workspace_id: Optional[int], document_id: int) -> Optional[Document]:
+    """Like ``document_by_id``, with the creator loaded in the same query."""
+    return db.execute(lambda_stmt(
+        lambda: select(Document).options(
+            joinedload(Document.created_by_user)
+        ).where(Document.workspace_id == workspace_id, Document.id == document_id)
+    )).scalars().first()
+
+
+def membership(db: Session, workspace_id: int, user_id: int) -> Optional[WorkspaceMember]:
+    return db.execute(lambda_stmt(
+        lambda: select(WorkspaceMember).where(
+            WorkspaceMember.workspace_id == workspace_id,
+            WorkspaceMember.user_id == user_id
+        )
+    )).scalars().first()
+
+
+def project_workspace_id(db: Session, project_id: int) -> Optional[int]:
+    return db.execute(lambda_stmt(
+        lambda: select(Project.workspace_id).where(Project.id == project_id, Project.deleted_at.is_(None))
+    )).scalar()
+
+
+def task_project_id(db: Session, task_id: int) -> Optional[int]:
+    return db.execute(lambda_stmt(
+        lambda: select(Task.project_id).where(Task.id == task_id)
+    )).scalar()
+
+
+def comment_workspace_id(db: Session, comment_id: int) -> Optional[int]:
+    return db.execute(lambda_stmt(
+        lambda: select(Comment.workspace_id).where(Comment.id == comment_id)
+    )).scalar()
+
+
+def document_workspace_id(db: Session, document_id: int) -> Optional[int]:
+    return db.execute(lambda_stmt(
+        lambda: select(Document.workspace_id).where(Document.id == document_id)
+    )).scalar()
+
+
+def workspace_owner_and_membership(
+    db: Session, workspace_id: int, user_id: int
+) -> Optional[Tuple[int, Optional[int]]]:
+    """``(owner_id, membership id or None)``, or ``None`` if the workspace does not exist (or is deleted)."""
+    return db.execute(lambda_stmt(
+        lambda: select(Workspace.owner_id, WorkspaceMember.id).outerjoin(
+            WorkspaceMember,
+            and_(
+                WorkspaceMember.workspace_id == Workspace.id,
+                WorkspaceMember.user_id == user_id
+            )
+        ).where(Workspace.id == workspace_id, Workspace.deleted_at.is_(None))
+    )).first()
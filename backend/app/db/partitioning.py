@@ -0,0 +1,124 @@
+"""
+Optional hash partitioning of the per-tenant tables on Postgres.
+
+With ``DB_WORKSPACE_PARTITIONS=N`` (N > 0), ``tasks``, ``comments`` and
+``documents`` are created as ``PARTITION BY HASH (workspace_id)`` tables with
+N partitions each, so queries filtered on ``workspace_id`` touch one
+partition and one set of indexes. Postgres requires the partition key in
+every primary key and unique constraint, so in the DDL the primary keys
+become ``(id, workspace_id)``. Every foreign key to a task (comments,
+parent tasks, the subtask closure) pairs the task id with ``workspace_id``,
+for example ``(task_id, workspace_id)``. The ORM keeps addressing rows by ``id``.
+
+With ``ACTIVITY_PARTITION_BY_MONTH``, ``activity_events`` is instead
+``PARTITION BY RANGE (created_at)`` with one partition per month (primary key
+``(id, created_at)``), so retention drops whole months rather than deleting
+rows. ``ensure_activity_partitions`` creates the upcoming months; a default
+partition catches anything outside them.
+
+The DDL is built from a copy of the metadata, so the mapped tables are left
+untouched. Partitioning only applies when the tables are first created; an
+existing database has to be migrated by hand.
+"""
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import DDL, ForeignKeyConstraint, MetaData, PrimaryKeyConstraint, event, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.db.database import Base
+
+PARTITIONED_TABLES = ("tasks", "comments", "documents")
+ACTIVITY_TABLE = "activity_events"
+
+
+def partitioned_metadata(partitions: int, activity_by_month: bool = False) -> MetaData:
+    metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        table.to_metadata(metadata)
+
+    if partitions > 0:
+        _partition_by_workspace(metadata, partitions)
+    if activity_by_month:
+        table = metadata.tables[ACTIVITY_TABLE]
+        table.c.id.autoincrement = True
+        table.c.created_at.primary_key = True
+        table.append_constraint(PrimaryKeyConstraint(table.c.id, table.c.created_at))
+        table.dialect_kwargs["postgresql_partition_by"] = "RANGE (created_at)"
+        event.listen(table, "after_create", DDL(
+            f"CREATE TABLE {ACTIVITY_TABLE}_default PARTITION OF {ACTIVITY_TABLE} DEFAULT"
+        ))
+    return metadata
+
+
+def _partition_by_workspace(metadata: MetaData, partitions: int) -> None:
+    for name in PARTITIONED_TABLES:
+        table = metadata.tables[name]
+        table.c.id.autoincrement = True
+        table.c.workspace_id.primary_key = True
+        table.append_constraint(PrimaryKeyConstraint(table.c.id, table.c.workspace_id))
+        table.dialect_kwargs["postgresql_partition_by"] = "HASH (workspace_id)"
+        for remainder in range(partitions):
+            event.listen(table, "after_create", DDL(
+                f"CREATE TABLE {name}_p{remainder} PARTITION OF {name} "
+                f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+            ))
+
+    # Every reference to a task carries the task's workspace_id too
+    for table in metadata.sorted_tables:
+        for constraint in list(table.foreign_key_constraints):
+            if constraint.referred_table.name != "tasks":
+                continue
+            table.constraints.discard(constraint)
+            for element in constraint.elements:
+                element.parent.foreign_keys.discard(element)
+            table.append_constraint(ForeignKeyConstraint(
+                [constraint.column_keys[0], "workspace_id"], ["tasks.id", "tasks.workspace_id"],
+                ondelete=constraint.ondelete
+            ))
+
+
+def create_partitioned_tables(engine: Engine, partitions: int, activity_by_month: bool = False) -> None:
+    partitioned_metadata(partitions, activity_by_month).create_all(bind=engine)
+    if activity_by_month:
+        with engine.begin() as connection:
+            ensure_activity_partitions(connection, datetime.utcnow())
+
+
+def _month_start(moment: datetime) -> datetime:
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+
+
+def _next_month(month: datetime) -> datetime:
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+def ensure_activity_partitions(connection: Connection, now: datetime, months_ahead: int = 2) -> None:
+    """Create the monthly ``activity_events`` partitions from ``now``'s month on."""
+    month = _month_start(now)
+    for _ in range(months_ahead + 1):
+        following = _next_month(month)
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {ACTIVITY_TABLE}_{month:%Y%m} PARTITION OF {ACTIVITY_TABLE} "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{following:%Y-%m-%d}')"
+        ))
+        month = following
+
+
+def drop_activity_partitions_before(connection: Connection, cutoff: datetime) -> List[str]:
+    """Drop the monthly partitions that end before ``cutoff``; returns their names."""
+    names = connection.scalars(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "WHERE parent.relname = :table"
+    ), {"table": ACTIVITY_TABLE}).all()
+    dropped = []
+    for name in sorted(names):
+        suffix = name.rpartition("_")[2]
+        if not suffix.isdigit():
+            continue  # the default partition
+        if _next_month(datetime.strptime(suffix, "%Y%m")) <= _month_start(cutoff):
+            connection.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    return dropped
@@ -0,0 +1,122 @@
+"""
+Removing deleted workspaces and projects.
+
+With ``SOFT_DELETE_CONTAINERS`` (the default) deleting a workspace or project
+only stamps ``deleted_at``: lookups and lists stop returning it straight
+away, and the request returns without touching the rows underneath. The
+purge functions here then remove those rows children-first in batches of
+``PURGE_BATCH_SIZE``, one short transaction per batch, so no single
+statement has to cascade through (and lock) a whole workspace. They run as
+background jobs enqueued by the delete request; anything left behind is
+picked up by
+
+    python -m app.db.purge
+"""
+from typing import Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.jobs import job
+from app.db.database import SessionLocal
+from app.models.workspace import Workspace, WorkspaceMember
+from app.models.project import Project
+from app.models.task import Task
+from app.models.comment import Comment
+from app.models.document import Document
+from app.models.activity import ActivityEvent
+from app.models.flow import ProjectDailyFlow, TaskStatusTransition
+
+
+def pending_project_ids(*criteria):
+    """Ids of soft-deleted projects matching ``criteria``; their tasks must not be listed."""
+    return select(Project.id).where(Project.deleted_at.is_not(None), *criteria)
+
+
+def delete_in_batches(db: Session, model, *criteria, batch_size: Optional[int] = None) -> int:
+    """Delete ``model`` rows matching ``criteria``, committing every ``batch_size`` rows."""
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    batch = select(model.id).where(*criteria).limit(batch_size).scalar_subquery()
+    removed = 0
+    while True:
+        result = db.execute(
+            delete(model).where(model.id.in_(batch)).execution_options(synchronize_session=False)
+        )
+        db.commit()
+        removed += result.rowcount
+        if result.rowcount < batch_size:
+            return removed
+
+
+def _purge_project(db: Session, project_id: int, workspace_id: int) -> int:
+    tasks = select(Task.id).where(Task.workspace_id == workspace_id, Task.project_id == project_id)
+    removed = delete_in_batches(db, Comment, Comment.workspace_id == workspace_id, Comment.task_id.in_(tasks))
+    removed += delete_in_batches(
+        db, Document, Document.workspace_id == workspace_id, Document.project_id == project_id
+    )
+    removed += delete_in_batches(db, Task, Task.workspace_id == workspace_id, Task.project_id == project_id)
+    for model in (TaskStatusTransition, ProjectDailyFlow):
+        removed += delete_in_batches(db, model, model.workspace_id == workspace_id, model.project_id == project_id)
+    removed += delete_in_batches(db, Project, Project.id == project_id)
+    return removed
+
+
+def _purge_workspace(db: Session, workspace_id: int) -> int:
+    removed = 0
+    for model in (
+        ActivityEvent, TaskStatusTransition, ProjectDailyFlow, Comment, Document, Task, Project, WorkspaceMember
+    ):
+        removed += delete_in_batches(db, model, model.workspace_id == workspace_id)
+    removed += delete_in_batches(db, Workspace, Workspace.id == workspace_id)
+    return removed
+
+
+@job("purge_project")
+def purge_project(project_id: int) -> int:
+    db = SessionLocal()
+    try:
+        workspace_id = db.scalar(
+            select(Project.workspace_id).where(Project.id == project_id, Project.deleted_at.is_not(None))
+        )
+        if workspace_id is None:
+            return 0
+        return _purge_project(db, project_id, workspace_id)
+    finally:
+        db.close()
+
+
+@job("purge_workspace")
+def purge_workspace(workspace_id: int) -> int:
+    db = SessionLocal()
+    try:
+        if db.scalar(select(Workspace.id).where(
+            Workspace.id == workspace_id, Workspace.deleted_at.is_not(None)
+        )) is None:
+            return 0
+        return _purge_workspace(db, workspace_id)
+    finally:
+        db.close()
+
+
+def purge_deleted() -> int:
+    """Purge every soft-deleted workspace and project. Returns the number of rows removed."""
+    db = SessionLocal()
+    try:
+        workspace_ids = db.scalars(select(Workspace.id).where(Workspace.deleted_at.is_not(None))).all()
+        projects = db.execute(
+            select(Project.id, Project.workspace_id).where(Project.deleted_at.is_not(None))
+        ).all()
+    finally:
+        db.close()
+    removed = sum(purge_workspace(workspace_id) for workspace_id in workspace_ids)
+    removed += sum(purge_project(project_id) for project_id, workspace_id in projects if workspace_id not in workspace_ids)
+    return removed
+
+
+def main():
+    print(f"Purged {purge_deleted()} row(s)")
+
+
+if __name__ == "__main__":
+    main()
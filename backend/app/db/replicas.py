@@ -0,0 +1,59 @@
+"""
+Routes read-only requests to the read replicas.
+
+GET and HEAD requests read from a replica when ``DATABASE_REPLICA_URLS`` is
+set; every other request, and any session that has written, uses the
+primary. Replication lags, so after a write the client is kept on the
+primary for ``READ_YOUR_WRITES_SECONDS``: the response sets a short-lived
+cookie, and clients that do not keep cookies can send ``X-Read-Primary: 1``
+themselves.
+"""
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.db.database import get_replica_set, reads_from_replica
+
+PRIMARY_COOKIE = "teamhub_read_primary"
+PRIMARY_HEADER = b"x-read-primary"
+READ_METHODS = {"GET", "HEAD"}
+
+
+def _pinned_to_primary(scope: Scope) -> bool:
+    for name, value in scope.get("headers", []):
+        if name == PRIMARY_HEADER and value.strip() not in (b"", b"0"):
+            return True
+        if name == b"cookie" and f"{PRIMARY_COOKIE}=".encode() in value:
+            return True
+    return False
+
+
+class ReadReplicaMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not get_replica_set().replicas:
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] in READ_METHODS:
+            token = reads_from_replica.set(not _pinned_to_primary(scope))
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                reads_from_replica.reset(token)
+            return
+
+        if scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        max_age = int(settings.READ_YOUR_WRITES_SECONDS)
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and max_age > 0 and message["status"] < 400:
+                cookie = f"{PRIMARY_COOKIE}=1; Max-Age={max_age}; Path=/; HttpOnly; SameSite=Lax"
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
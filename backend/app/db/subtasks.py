@@ -0,0 +1,147 @@
+"""
+The subtask tree.
+
+``Task.parent_id`` holds the tree; ``task_closure`` holds every
+ancestor/descendant pair in it, so a task's whole subtree, or its whole
+chain of ancestors, is one read on an index, however deep the tree.
+
+Each task also carries two rollups over its subtree, ``subtask_count`` and
+``subtasks_done``. The write paths keep them current in the same
+transaction, with relative updates. Adding, moving or removing a task shifts
+the counts of every ancestor by the size of the subtree involved. A status
+change into or out of DONE shifts them by one. Tasks outside any tree cost
+none of this: they have no closure rows, and their writes skip the tree
+entirely. ``python -m app.db.counters`` recomputes the rollups.
+
+Changes to a project's tree take a row lock on the project (``lock_tree``),
+so two concurrent moves cannot each pass the cycle check and together form
+a loop. Writes to an existing task take it with ``lock_task_tree`` before
+reading the task's row, so its parent, status and rollups cannot change
+between the read and the commit.
+"""
+from sqlalchemy import delete, insert, literal, select, true, union_all, update
+from sqlalchemy.orm import Session
+
+from app.models.project import Project
+from app.models.task import Task, TaskClosure, TaskStatus
+
+
+def _done(status) -> int:
+    return 1 if status == TaskStatus.DONE else 0
+
+
+def ancestor_ids(task_id: int):
+    return select(TaskClosure.ancestor_id).where(TaskClosure.descendant_id == task_id)
+
+
+def descendant_ids(task_id: int):
+    return select(TaskClosure.descendant_id).where(TaskClosure.ancestor_id == task_id)
+
+
+def lock_tree(db: Session, project_id: int) -> None:
+    """Serialise changes to ``project_id``'s tree until the transaction ends (no-op on SQLite)."""
+    db.execute(select(Project.id).where(Project.id == project_id).with_for_update())
+
+
+def lock_task_tree(db: Session, task_id: int) -> None:
+    """``lock_tree`` for the project of ``task_id``, in one statement; take it before reading the task."""
+    db.execute(select(Project.id).where(
+        Project.id == select(Task.project_id).where(Task.id == task_id).scalar_subquery()
+    ).with_for_update())
+
+
+def is_in_subtree(db: Session, task_id: int, other_id: int) -> bool:
+    """Whether ``other_id`` is ``task_id`` or one of its subtasks, at any depth."""
+    if other_id == task_id:
+        return True
+    return db.scalar(select(TaskClosure.depth).where(
+        TaskClosure.ancestor_id == task_id, TaskClosure.descendant_id == other_id
+    )) is not None
+
+
+def _adjust_ancestors(db: Session, task: Task, total: int, done: int) -> None:
+    if not (total or done):
+        return
+    db.execute(
+        update(Task).where(Task.workspace_id == task.workspace_id, Task.id.in_(ancestor_ids(task.id)))
+        .values(subtask_count=Task.subtask_count + total, subtasks_done=Task.subtasks_done + done)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _subtree_size(task: Task):
+    return 1 + task.subtask_count, _done(task.status) + task.subtasks_done
+
+
+def add_to_tree(db: Session, task: Task) -> None:
+    """Link ``task``, and any subtree below it, under ``task.parent_id`` and count it in its ancestors."""
+    above = union_all(
+        select(literal(task.parent_id).label("id"), literal(0).label("depth")),
+        select(TaskClosure.ancestor_id, TaskClosure.depth).where(TaskClosure.descendant_id == task.parent_id)
+    ).subquery()
+    below = select(literal(task.id).label("id"), literal(0).label("depth"))
+    if task.subtask_count:
+        below = union_all(below, select(TaskClosure.descendant_id, TaskClosure.depth).where(
+            TaskClosure.ancestor_id == task.id
+        ))
+    below = below.subquery()
+    db.execute(insert(TaskClosure).from_select(
+        ["ancestor_id", "descendant_id", "workspace_id", "depth"],
+        select(above.c.id, below.c.id, literal(task.workspace_id), above.c.depth + below.c.depth + 1)
+        .select_from(above).join(below, true())
+    ))
+    _adjust_ancestors(db, task, *_subtree_size(task))
+
+
+def _take_out_of_tree(db: Session, task: Task) -> None:
+    """Unlink ``task`` and its subtree from everything above it, uncounting it there."""
+    total, done = _subtree_size(task)
+    _adjust_ancestors(db, task, -total, -done)
+    subtree = union_all(select(literal(task.id)), descendant_ids(task.id))
+    db.execute(
+        delete(TaskClosure).where(
+            TaskClosure.descendant_id.in_(subtree), TaskClosure.ancestor_id.in_(ancestor_ids(task.id))
+        ).execution_options(synchronize_session=False)
+    )
+
+
+def move_in_tree(db: Session, task: Task, parent_id) -> None:
+    """Move ``task`` with its subtree under ``parent_id`` (None: to the top level)."""
+    if task.parent_id is not None:
+        _take_out_of_tree(db, task)
+    task.parent_id = parent_id
+    if parent_id is not None:
+        add_to_tree(db, task)
+
+
+def rollup_status_change(db: Session, task: Task, previous_status) -> None:
+    """Count ``task`` entering or leaving DONE in its ancestors' rollups."""
+    if task.parent_id is not None:
+        _adjust_ancestors(db, task, 0, _done(task.status) - _done(previous_status))
+
+
+def remove_from_tree(db: Session, task: Task) -> None:
+    """
+    Unlink ``task`` before it is deleted. Its subtasks move up to its parent
+    (or to the top level), keeping their own subtrees. ``task`` must have
+    been read under ``lock_task_tree``.
+    """
+    if task.parent_id is None and not task.subtask_count:
+        return
+    _adjust_ancestors(db, task, -1, -_done(task.status))
+    if task.subtask_count:
+        db.execute(
+            update(TaskClosure).where(
+                TaskClosure.ancestor_id.in_(ancestor_ids(task.id)),
+                TaskClosure.descendant_id.in_(descendant_ids(task.id))
+            ).values(depth=TaskClosure.depth - 1).execution_options(synchronize_session=False)
+        )
+        db.execute(
+            update(Task).where(Task.workspace_id == task.workspace_id, Task.parent_id == task.id)
+            .values(parent_id=task.parent_id).execution_options(synchronize_session=False)
+        )
+    db.execute(
+        delete(TaskClosure).where(
+            (TaskClosure.ancestor_id == task.id) | (TaskClosure.descendant_id == task.id)
+        ).execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,51 @@
+"""
+Multi-row INSERT ... ON CONFLICT for the databases we run on.
+"""
+from typing import List, Sequence
+
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+
+def _insert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"ON CONFLICT is not supported on {dialect}")
+    return insert
+
+
+def insert_ignoring_conflicts(
+    db: Session, model, rows: List[dict], conflict_columns: Sequence[str], returning: Sequence
+) -> List[Row]:
+    """
+    Insert ``rows`` in one statement, skipping any that collide on the
+    unique ``conflict_columns``. Returns ``returning`` for the inserted rows.
+    """
+    if not rows:
+        return []
+    statement = _insert(db)(model).values(rows).on_conflict_do_nothing(
+        index_elements=list(conflict_columns)
+    ).returning(*returning)
+    return db.execute(statement).all()
+
+
+def insert_or_increment(
+    db: Session, model, rows: List[dict], conflict_columns: Sequence[str], increment_columns: Sequence[str]
+) -> None:
+    """
+    Insert ``rows`` in one statement; where a row collides on the unique
+    ``conflict_columns``, add its ``increment_columns`` to the existing row's.
+    """
+    if not rows:
+        return
+    statement = _insert(db)(model).values(rows)
+    table = model.__table__
+    statement = statement.on_conflict_do_update(
+        index_elements=list(conflict_columns),
+        set_={name: table.c[name] + statement.excluded[name] for name in increment_columns}
+    )
+    db.execute(statement)
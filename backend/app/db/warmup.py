@@ -0,0 +1,73 @@
+"""
+Startup work run from the application lifespan, never at import.
+
+``warm_up`` configures the mappers, optionally opens pool connections ahead
+of traffic, and runs each hot lookup once so SQLAlchemy's compiled-statement
+cache is populated before the first real request. Other modules can add
+their own cache warmers with ``register_warmup``.
+"""
+from typing import Callable, List
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, configure_mappers
+
+from app.core.config import settings
+from app.db import lookups
+from app.db.database import Base, SessionLocal, get_engine
+from app.db.partitioning import create_partitioned_tables
+
+# Never a real primary key; lookups with it compile and run without matching rows
+_MISSING_ID = 0
+
+_warmers: List[Callable[[Session], None]] = []
+
+
+def register_warmup(func: Callable[[Session], None]) -> Callable[[Session], None]:
+    _warmers.append(func)
+    return func
+
+
+def create_tables(engine: Engine) -> None:
+    partitioned = settings.DB_WORKSPACE_PARTITIONS > 0 or settings.ACTIVITY_PARTITION_BY_MONTH
+    if partitioned and engine.dialect.name == "postgresql":
+        create_partitioned_tables(
+            engine, settings.DB_WORKSPACE_PARTITIONS, settings.ACTIVITY_PARTITION_BY_MONTH
+        )
+    else:
+        Base.metadata.create_all(bind=engine)
+
+
+def prefill_pool(engine: Engine, count: int) -> None:
+    count = min(count, settings.DB_POOL_SIZE)
+    connections = [engine.connect() for _ in range(count)]
+    for connection in connections:
+        connection.close()
+
+
+def precompile_hot_statements(db: Session) -> None:
+    lookups.user_by_id(db, _MISSING_ID)
+    lookups.workspace_by_id(db, _MISSING_ID)
+    lookups.project_by_id(db, _MISSING_ID)
+    lookups.task_by_id(db, _MISSING_ID, _MISSING_ID)
+    lookups.task_with_people_by_id(db, _MISSING_ID, _MISSING_ID)
+    lookups.membership(db, _MISSING_ID, _MISSING_ID)
+    lookups.project_workspace_id(db, _MISSING_ID)
+    lookups.task_project_id(db, _MISSING_ID)
+    lookups.workspace_owner_and_membership(db, _MISSING_ID, _MISSING_ID)
+
+
+def warm_up() -> None:
+    engine = get_engine()
+    configure_mappers()
+    if settings.AUTO_CREATE_TABLES:
+        create_tables(engine)
+    if settings.DB_POOL_PREFILL > 0:
+        prefill_pool(engine, settings.DB_POOL_PREFILL)
+
+    db = SessionLocal()
+    try:
+        precompile_hot_statements(db)
+        for warmer in _warmers:
+            warmer(db)
+    finally:
+        db.close()
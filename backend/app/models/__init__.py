@@ -1,9 +1,12 @@
 from app.models.user import User, UserRole
 from app.models.workspace import Workspace, WorkspaceMember, MemberRole
 from app.models.project import Project
-from app.models.task import Task, TaskStatus, TaskPriority
+from app.models.task import Task, TaskClosure, TaskStatus, TaskPriority
 from app.models.comment import Comment
 from app.models.document import Document
+from app.models.job import Job, JobStatus
+from app.models.activity import ActivityEvent
+from app.models.flow import TaskStatusTransition, ProjectDailyFlow
 
 __all__ = [
     "User",
@@ -13,8 +16,14 @@ __all__ = [
     "MemberRole",
     "Project",
     "Task",
+    "TaskClosure",
     "TaskStatus",
     "TaskPriority",
     "Comment",
     "Document",
+    "Job",
+    "JobStatus",
+    "ActivityEvent",
+    "TaskStatusTransition",
+    "ProjectDailyFlow",
 ]
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Index
+from sqlalchemy.sql import func
+
+from app.db.database import Base
+
+
+class ActivityEvent(Base):
+    """One entry of a workspace's append-only activity log; rows are never updated."""
+    __tablename__ = "activity_events"
+
+    id = Column(Integer, primary_key=True)
+    workspace_id = Column(Integer, ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False)
+    actor_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    # "<subject>.<action>", e.g. "task.created" or "member.removed"
+    verb = Column(String(50), nullable=False)
+    # No foreign keys: events outlive the tasks, comments and documents they describe
+    subject_id = Column(Integer, nullable=True)
+    project_id = Column(Integer, nullable=True)
+    data = Column(JSON, nullable=False, default=dict)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        # Feeds read a workspace's newest events first
+        Index("ix_activity_events_workspace_created", "workspace_id", "created_at"),
+    )
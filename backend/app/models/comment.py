@@ -1,20 +1,35 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Text, Index, event, select
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, null
 
 from app.db.database import Base
+from app.models.task import Task
 
 
 class Comment(Base):
     __tablename__ = "comments"
 
     id = Column(Integer, primary_key=True, index=True)
+    # Denormalised from the task so tenant queries and partitions key on it
+    workspace_id = Column(Integer, ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False)
     task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     content = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), default=null(), onupdate=func.now())
 
     # Relationships
     task = relationship("Task", back_populates="comments")
     user = relationship("User", back_populates="comments")
+
+    __table_args__ = (
+        Index("ix_comments_workspace_task_created", "workspace_id", "task_id", "created_at"),
+    )
+
+
+@event.listens_for(Comment, "before_insert")
+def _fill_workspace_id(mapper, connection, target):
+    if target.workspace_id is None:
+        target.workspace_id = connection.scalar(
+            select(Task.workspace_id).where(Task.id == target.task_id)
+        )
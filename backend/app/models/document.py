@@ -1,21 +1,36 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index, event, select
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, null
 
 from app.db.database import Base
+from app.models.project import Project
 
 
 class Document(Base):
     __tablename__ = "documents"
 
     id = Column(Integer, primary_key=True, index=True)
+    # Denormalised from the project so tenant queries and partitions key on it
+    workspace_id = Column(Integer, ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False)
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
     title = Column(String(200), nullable=False)
     content = Column(Text, nullable=True)  # Rich text content stored as HTML/JSON
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), default=null(), onupdate=func.now())
 
     # Relationships
     project = relationship("Project", back_populates="documents")
     created_by_user = relationship("User", back_populates="documents")
+
+    __table_args__ = (
+        Index("ix_documents_workspace_project", "workspace_id", "project_id"),
+    )
+
+
+@event.listens_for(Document, "before_insert")
+def _fill_workspace_id(mapper, connection, target):
+    if target.workspace_id is None:
+        target.workspace_id = connection.scalar(
+            select(Project.workspace_id).where(Project.id == target.project_id)
+        )
@@ -0,0 +1,60 @@
+from sqlalchemy import (
+    Boolean, Column, Date, DateTime, Enum, ForeignKey, Index, Integer, UniqueConstraint, text
+)
+from sqlalchemy.sql import func
+
+from app.db.database import Base
+from app.models.task import TaskStatus
+
+
+class TaskStatusTransition(Base):
+    """A task entering a status; from_status is NULL on creation, to_status NULL on deletion."""
+    __tablename__ = "task_status_transitions"
+
+    id = Column(Integer, primary_key=True)
+    workspace_id = Column(Integer, ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    # No foreign key: the history outlives deleted tasks
+    task_id = Column(Integer, nullable=False)
+    from_status = Column(Enum(TaskStatus), nullable=True)
+    to_status = Column(Enum(TaskStatus), nullable=True)
+    actor_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Set once the transition has been folded into project_daily_flow
+    rolled_up = Column(Boolean, nullable=False, default=False, server_default=text("false"))
+
+    __table_args__ = (
+        Index("ix_task_status_transitions_task", "task_id", "created_at"),
+        # The rollup job's queue: only transitions not yet rolled up
+        Index(
+            "ix_task_status_transitions_pending", "id",
+            postgresql_where=text("NOT rolled_up"), sqlite_where=text("NOT rolled_up")
+        ),
+    )
+
+
+class ProjectDailyFlow(Base):
+    """
+    One project's status changes over one (UTC) day. The per-status columns
+    are net changes, so a status's count on a day is the sum of its column
+    over every day up to and including it.
+    """
+    __tablename__ = "project_daily_flow"
+
+    id = Column(Integer, primary_key=True)
+    workspace_id = Column(Integer, ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+    todo = Column(Integer, nullable=False, default=0)
+    in_progress = Column(Integer, nullable=False, default=0)
+    review = Column(Integer, nullable=False, default=0)
+    done = Column(Integer, nullable=False, default=0)
+    # Throughput: transitions into DONE that day
+    completed = Column(Integer, nullable=False, default=0)
+    # Over the completions whose task was started (left TODO) before being done
+    cycle_time_seconds = Column(Integer, nullable=False, default=0)
+    cycle_time_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("project_id", "day", name="uq_project_daily_flow_project_day"),
+    )
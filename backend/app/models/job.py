@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, DateTime, Enum, Text, JSON, Index
+from sqlalchemy.sql import func
+import enum
+
+from app.db.database import Base
+
+
+class JobStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    # Enqueueing the same key twice is a no-op while the first job row exists
+    idempotency_key = Column(String(200), nullable=True, unique=True)
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(DateTime(timezone=True), nullable=False)
+    locked_by = Column(String(100), nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Workers claim the oldest due job
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+        # Retention deletes finished jobs by age
+        Index("ix_jobs_finished_at", "finished_at"),
+    )
@@ -1,6 +1,6 @@
 from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, null
 
 from app.db.database import Base
 
@@ -12,10 +12,12 @@ class Project(Base):
     workspace_id = Column(Integer, ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False)
     name = Column(String(100), nullable=False)
     description = Column(String(500), nullable=True)
+    task_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), default=null(), onupdate=func.now())
+    deleted_at = Column(DateTime(timezone=True), nullable=True)  # set while the project awaits purging
 
-    # Relationships
+    # Relationships; children are removed by the ON DELETE CASCADE foreign keys, never loaded to delete them
     workspace = relationship("Workspace", back_populates="projects")
-    tasks = relationship("Task", back_populates="project", cascade="all, delete-orphan")
-    documents = relationship("Document", back_populates="project", cascade="all, delete-orphan")
+    tasks = relationship("Task", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
+    documents = relationship("Document", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
@@ -1,9 +1,12 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text
+from sqlalchemy import (
+    Column, Integer, String, DateTime, ForeignKey, Enum, Text, Index, and_, case, event, literal, select, text
+)
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, null
 import enum
 
 from app.db.database import Base
+from app.models.project import Project
 
 
 class TaskStatus(str, enum.Enum):
@@ -20,10 +23,26 @@ class TaskPriority(str, enum.Enum):
     URGENT = "urgent"
 
 
+class DeadlineState(str, enum.Enum):
+    ON_TRACK = "on_track"
+    DUE_SOON = "due_soon"
+    OVERDUE = "overdue"
+
+
+# Rows covered by the partial indexes: open tasks, and open tasks that have a due date
+_OPEN = "status != 'DONE'"
+_OPEN_WITH_DUE_DATE = f"{_OPEN} AND due_date IS NOT NULL"
+
+# Most urgent first
+PRIORITY_RANK = {TaskPriority.URGENT: 0, TaskPriority.HIGH: 1, TaskPriority.MEDIUM: 2, TaskPriority.LOW: 3}
+
+
 class Task(Base):
     __tablename__ = "tasks"
 
     id = Column(Integer, primary_key=True, index=True)
+    # Denormalised from the project so tenant queries and partitions key on it
+    workspace_id = Column(Integer, ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False)
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
     title = Column(String(200), nullable=False)
     description = Column(Text, nullable=True)
@@ -33,11 +52,84 @@ class Task(Base):
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     due_date = Column(DateTime(timezone=True), nullable=True)
     position = Column(Integer, default=0)  # For ordering within a status column
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Advanced by the deadline sweeper (app.db.deadlines), reset when the due date changes
+    deadline_state = Column(
+        Enum(DeadlineState), nullable=False, default=DeadlineState.ON_TRACK, server_default=DeadlineState.ON_TRACK.name
+    )
+    # Subtask tree (app.db.subtasks); the counts cover every task below this one, at any depth
+    parent_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=True)
+    subtask_count = Column(Integer, nullable=False, default=0, server_default="0")
+    subtasks_done = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), default=null(), onupdate=func.now())
 
     # Relationships
     project = relationship("Project", back_populates="tasks")
     assignee = relationship("User", back_populates="assigned_tasks", foreign_keys=[assignee_id])
     creator = relationship("User", back_populates="created_tasks", foreign_keys=[created_by])
-    comments = relationship("Comment", back_populates="task", cascade="all, delete-orphan")
+    comments = relationship("Comment", back_populates="task", cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        Index("ix_tasks_workspace_project_position", "workspace_id", "project_id", "position"),
+        # Subtasks of a task, and the parent_id foreign key's ON DELETE check
+        Index(
+            "ix_tasks_parent_id", "parent_id",
+            postgresql_where=text("parent_id IS NOT NULL"), sqlite_where=text("parent_id IS NOT NULL")
+        ),
+        # Deadline counts per workspace and the sweeper
+        Index(
+            "ix_tasks_open_workspace_due_date", "workspace_id", "due_date",
+            postgresql_where=text(_OPEN_WITH_DUE_DATE), sqlite_where=text(_OPEN_WITH_DUE_DATE)
+        ),
+        # Each user's open tasks by due date (undated last): "my tasks" and their deadlines
+        Index(
+            "ix_tasks_open_assignee_due_date", "assignee_id", "due_date",
+            postgresql_where=text(_OPEN), sqlite_where=text(_OPEN)
+        ),
+    )
+
+
+class TaskClosure(Base):
+    """
+    One row per (ancestor, descendant) pair in the subtask tree, at any depth
+    (1 for a direct subtask). Tasks are not paired with themselves, so tasks
+    outside any tree have no rows.
+    """
+    __tablename__ = "task_closure"
+
+    ancestor_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    workspace_id = Column(Integer, ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False)
+    depth = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        # Ancestors of a task; the primary key serves its descendants
+        Index("ix_task_closure_descendant", "descendant_id", "depth"),
+    )
+
+
+def is_open():
+    """
+    The partial indexes' status predicate. The status is rendered inline
+    rather than bound, so that cached and prepared plans can still prove it
+    matches.
+    """
+    return Task.status != literal(TaskStatus.DONE, Task.status.type, literal_execute=True)
+
+
+def open_with_due_date():
+    return and_(is_open(), Task.due_date.is_not(None))
+
+
+def priority_rank():
+    """0 for urgent tasks up to 3 for low priority ones."""
+    return case(*((Task.priority == priority, rank) for priority, rank in PRIORITY_RANK.items()))
+
+
+@event.listens_for(Task, "before_insert")
+def _fill_workspace_id(mapper, connection, target):
+    if target.workspace_id is None:
+        target.workspace_id = connection.scalar(
+            select(Project.workspace_id).where(Project.id == target.project_id)
+        )
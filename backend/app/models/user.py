@@ -1,6 +1,6 @@
 from sqlalchemy import Column, Integer, String, DateTime, Enum
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, null
 import enum
 
 from app.db.database import Base
@@ -22,7 +22,7 @@ class User(Base):
     avatar_url = Column(String(500), nullable=True)
     role = Column(Enum(UserRole), default=UserRole.MEMBER)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), default=null(), onupdate=func.now())
 
     # Relationships
     owned_workspaces = relationship("Workspace", back_populates="owner")
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, UniqueConstraint
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, null
 import enum
 
 from app.db.database import Base
@@ -19,13 +19,17 @@ class Workspace(Base):
     name = Column(String(100), nullable=False)
     description = Column(String(500), nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    project_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), default=null(), onupdate=func.now())
+    deleted_at = Column(DateTime(timezone=True), nullable=True)  # set while the workspace awaits purging
 
-    # Relationships
+    # Relationships; children are removed by the ON DELETE CASCADE foreign keys, never loaded to delete them
     owner = relationship("User", back_populates="owned_workspaces")
-    members = relationship("WorkspaceMember", back_populates="workspace", cascade="all, delete-orphan")
-    projects = relationship("Project", back_populates="workspace", cascade="all, delete-orphan")
+    members = relationship(
+        "WorkspaceMember", back_populates="workspace", cascade="all, delete-orphan", passive_deletes=True
+    )
+    projects = relationship("Project", back_populates="workspace", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class WorkspaceMember(Base):
@@ -40,3 +44,7 @@ class WorkspaceMember(Base):
     # Relationships
     workspace = relationship("Workspace", back_populates="members")
     user = relationship("User", back_populates="workspace_memberships")
+
+    __table_args__ = (
+        UniqueConstraint("workspace_id", "user_id", name="uq_workspace_members_workspace_user"),
+    )
@@ -4,16 +4,26 @@ from app.schemas.workspace import (
     WorkspaceMemberCreate, WorkspaceMemberResponse, WorkspaceDetailResponse
 )
 from app.schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse
-from app.schemas.task import TaskCreate, TaskUpdate, TaskResponse, TaskPositionUpdate
+from app.schemas.task import (
+    TaskCreate, TaskUpdate, TaskResponse, TaskPositionUpdate, SubtaskResponse, DeadlineTask, TaskDeadlines,
+    MyTasks
+)
 from app.schemas.comment import CommentCreate, CommentUpdate, CommentResponse
 from app.schemas.document import DocumentCreate, DocumentUpdate, DocumentResponse
+from app.schemas.batch import BatchRequest, BatchResponse
+from app.schemas.activity import ActivityEventResponse, ActivityPage
+from app.schemas.analytics import CumulativeFlow, Burndown, CycleTime
 
 __all__ = [
     "UserCreate", "UserUpdate", "UserResponse", "UserLogin", "Token", "TokenData",
     "WorkspaceCreate", "WorkspaceUpdate", "WorkspaceResponse",
     "WorkspaceMemberCreate", "WorkspaceMemberResponse", "WorkspaceDetailResponse",
     "ProjectCreate", "ProjectUpdate", "ProjectResponse",
-    "TaskCreate", "TaskUpdate", "TaskResponse", "TaskPositionUpdate",
+    "TaskCreate", "TaskUpdate", "TaskResponse", "TaskPositionUpdate", "SubtaskResponse",
+    "DeadlineTask", "TaskDeadlines", "MyTasks",
     "CommentCreate", "CommentUpdate", "CommentResponse",
     "DocumentCreate", "DocumentUpdate", "DocumentResponse",
+    "BatchRequest", "BatchResponse",
+    "ActivityEventResponse", "ActivityPage",
+    "CumulativeFlow", "Burndown", "CycleTime",
 ]
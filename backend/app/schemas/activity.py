@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+
+MAX_ACTIVITY_PAGE_SIZE = 100
+
+
+class ActivityEventResponse(BaseModel):
+    id: int
+    workspace_id: int
+    actor_id: Optional[int] = None
+    actor_name: Optional[str] = None
+    verb: str
+    subject_id: Optional[int] = None
+    project_id: Optional[int] = None
+    data: Dict[str, Any]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ActivityPage(BaseModel):
+    items: List[ActivityEventResponse]
+    next_cursor: Optional[str] = None  # pass as ?cursor= to fetch older events
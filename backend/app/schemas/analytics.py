@@ -0,0 +1,42 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date
+
+MAX_ANALYTICS_DAYS = 366
+
+
+class FlowDay(BaseModel):
+    day: date
+    todo: int
+    in_progress: int
+    review: int
+    done: int
+
+
+class CumulativeFlow(BaseModel):
+    project_id: int
+    days: List[FlowDay]
+
+
+class BurndownDay(BaseModel):
+    day: date
+    remaining: int  # open tasks at the end of the day
+    completed: int  # done tasks at the end of the day
+    scope: int  # remaining + completed
+
+
+class Burndown(BaseModel):
+    project_id: int
+    days: List[BurndownDay]
+
+
+class CycleTimeDay(BaseModel):
+    day: date
+    throughput: int  # tasks completed that day
+    average_cycle_time_hours: Optional[float] = None
+
+
+class CycleTime(BaseModel):
+    project_id: int
+    days: List[CycleTimeDay]
+    average_cycle_time_hours: Optional[float] = None  # over the whole range
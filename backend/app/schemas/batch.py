@@ -0,0 +1,23 @@
+from pydantic import BaseModel, Field
+from typing import Any, List, Literal, Optional
+
+MAX_BATCH_REQUESTS = 20
+
+
+class BatchRequestItem(BaseModel):
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"]
+    path: str  # e.g. "/api/tasks/?project_id=3"
+    body: Optional[Any] = None
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchRequestItem] = Field(min_length=1, max_length=MAX_BATCH_REQUESTS)
+
+
+class BatchResponseItem(BaseModel):
+    status: int
+    body: Optional[Any] = None
+
+
+class BatchResponse(BaseModel):
+    responses: List[BatchResponseItem]
@@ -0,0 +1,46 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+from datetime import datetime
+from app.models.task import TaskStatus, TaskPriority
+from app.schemas.project import ProjectResponse
+
+MAX_BOARD_COLUMN_LIMIT = 500
+
+
+class BoardCard(BaseModel):
+    id: int
+    title: str
+    description: Optional[str] = None
+    priority: TaskPriority
+    due_date: Optional[datetime] = None
+    position: int
+    assignee_id: Optional[int] = None
+    created_by: int
+    comment_count: int = 0
+    created_at: datetime
+    parent_id: Optional[int] = None
+    subtask_count: int = 0
+    subtasks_done: int = 0
+
+    class Config:
+        from_attributes = True
+
+
+class BoardColumn(BaseModel):
+    tasks: List[BoardCard]
+    next_cursor: Optional[str] = None  # pass as ?column=<status>&cursor= for the rest of the column
+
+
+class BoardUser(BaseModel):
+    id: int
+    display_name: str
+    avatar_url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class BoardResponse(BaseModel):
+    project: ProjectResponse
+    columns: Dict[TaskStatus, BoardColumn]
+    users: Dict[int, BoardUser]  # every assignee and creator on the returned cards, once
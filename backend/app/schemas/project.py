@@ -20,6 +20,7 @@ class ProjectUpdate(BaseModel):
 class ProjectResponse(ProjectBase):
     id: int
     workspace_id: int
+    task_count: int = 0
     created_at: datetime
 
     class Config:
@@ -1,7 +1,10 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
-from app.models.task import TaskStatus, TaskPriority
+from app.models.task import DeadlineState, TaskStatus, TaskPriority
+
+MAX_DEADLINE_LIMIT = 200
+MAX_MY_TASKS_LIMIT = 200
 
 
 class TaskBase(BaseModel):
@@ -15,6 +18,7 @@ class TaskBase(BaseModel):
 class TaskCreate(TaskBase):
     project_id: int
     assignee_id: Optional[int] = None
+    parent_id: Optional[int] = None  # a task in the same project
 
 
 class TaskUpdate(BaseModel):
@@ -25,6 +29,7 @@ class TaskUpdate(BaseModel):
     assignee_id: Optional[int] = None
     due_date: Optional[datetime] = None
     position: Optional[int] = None
+    parent_id: Optional[int] = None  # null moves the task (with its subtasks) to the top level
 
 
 class TaskResponse(TaskBase):
@@ -36,6 +41,10 @@ class TaskResponse(TaskBase):
     created_at: datetime
     assignee_name: Optional[str] = None
     creator_name: Optional[str] = None
+    comment_count: int = 0
+    parent_id: Optional[int] = None
+    subtask_count: int = 0  # every task below this one, at any depth
+    subtasks_done: int = 0
 
     class Config:
         from_attributes = True
@@ -44,3 +53,70 @@ class TaskResponse(TaskBase):
 class TaskPositionUpdate(BaseModel):
     status: TaskStatus
     position: int
+
+
+class SubtaskResponse(BaseModel):
+    id: int
+    title: str
+    status: TaskStatus
+    priority: TaskPriority
+    due_date: Optional[datetime] = None
+    assignee_id: Optional[int] = None
+    position: int
+    parent_id: Optional[int] = None
+    depth: int  # 1 for a direct subtask (or the parent, listing ancestors)
+    subtask_count: int
+    subtasks_done: int
+
+    class Config:
+        from_attributes = True
+
+
+class DeadlineTask(BaseModel):
+    id: int
+    title: str
+    status: TaskStatus
+    priority: TaskPriority
+    due_date: datetime
+    project_id: int
+    workspace_id: int
+    deadline_state: DeadlineState
+
+    class Config:
+        from_attributes = True
+
+
+class TaskDeadlines(BaseModel):
+    overdue: List[DeadlineTask]  # most overdue first
+    due_soon: List[DeadlineTask]  # soonest first
+
+
+class MyTask(BaseModel):
+    id: int
+    title: str
+    status: TaskStatus
+    priority: TaskPriority
+    due_date: Optional[datetime] = None
+    position: int
+    parent_id: Optional[int] = None
+    subtask_count: int = 0
+    subtasks_done: int = 0
+    comment_count: int = 0
+    deadline_state: DeadlineState
+
+    class Config:
+        from_attributes = True
+
+
+class MyTaskGroup(BaseModel):
+    project_id: int
+    project_name: str
+    workspace_id: int
+    workspace_name: str
+    tasks: List[MyTask]
+
+
+class MyTasks(BaseModel):
+    # Projects in the order of their first task; a project can appear again on the next page
+    projects: List[MyTaskGroup]
+    next_cursor: Optional[str] = None
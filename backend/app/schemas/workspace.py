@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 from app.models.workspace import MemberRole
@@ -42,6 +42,7 @@ class WorkspaceMemberResponse(BaseModel):
 class WorkspaceResponse(WorkspaceBase):
     id: int
     owner_id: int
+    project_count: int = 0
     created_at: datetime
 
     class Config:
@@ -49,4 +50,24 @@ class WorkspaceResponse(WorkspaceBase):
 
 
 class WorkspaceDetailResponse(WorkspaceResponse):
-    members: List[WorkspaceMemberResponse] = []
+    member_count: int
+
+
+class WorkspaceMemberPage(BaseModel):
+    items: List[WorkspaceMemberResponse]
+    next_cursor: Optional[int] = None  # pass as ?cursor= to fetch the next page
+
+
+MAX_BULK_MEMBERS = 1000
+
+
+class WorkspaceMembersBulkUpdate(BaseModel):
+    add: List[WorkspaceMemberCreate] = Field(default_factory=list, max_length=MAX_BULK_MEMBERS)
+    remove: List[int] = Field(default_factory=list, max_length=MAX_BULK_MEMBERS)
+
+
+class WorkspaceMembersBulkResult(BaseModel):
+    added: List[WorkspaceMemberResponse]
+    removed: List[int]
+    already_members: List[int]
+    unknown_users: List[int]
@@ -0,0 +1,9 @@
+# Benchmark suite
+import os
+
+# Settings are read from the environment the first time the app uses them;
+# set usable defaults for benchmark runs before that happens.
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("MAX_IN_FLIGHT_REQUESTS", "0")
@@ -0,0 +1,52 @@
+"""
+Compare two benchmark result files.
+
+    python -m bench.compare bench/results/abc1234-....json bench/results/def5678-....json
+
+Prints throughput and latency percentiles per endpoint for every worker
+count present in both files, with the relative change from base to head.
+"""
+import argparse
+import json
+from pathlib import Path
+
+METRICS = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def _change(base: float, head: float) -> str:
+    if not base:
+        return "n/a"
+    return f"{(head - base) / base * 100:+.1f}%"
+
+
+def compare(base: dict, head: dict) -> None:
+    base_runs = {(r["mode"], r["workers"]): r for r in base["runs"]}
+    head_runs = {(r["mode"], r["workers"]): r for r in head["runs"]}
+    print(f"base: {base['meta'].get('commit')} ({base['meta']['scale']})  "
+          f"head: {head['meta'].get('commit')} ({head['meta']['scale']})")
+
+    for key in sorted(set(base_runs) & set(head_runs)):
+        base_run, head_run = base_runs[key], head_runs[key]
+        print(f"\n{key[0]} x{key[1]}: {base_run['throughput_rps']} -> {head_run['throughput_rps']} req/s "
+              f"({_change(base_run['throughput_rps'], head_run['throughput_rps'])})")
+        print(f"{'endpoint':<18}" + "".join(f"{m:>24}" for m in METRICS))
+        for name in sorted(set(base_run["endpoints"]) | set(head_run["endpoints"])):
+            b = base_run["endpoints"].get(name, {})
+            h = head_run["endpoints"].get(name, {})
+            cells = []
+            for metric in METRICS:
+                bv, hv = b.get(metric, 0), h.get(metric, 0)
+                cells.append(f"{bv:>8} -> {hv:<8}{_change(bv, hv):>6}")
+            print(f"{name:<18}" + "".join(f"{c:>24}" for c in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("base", type=Path)
+    parser.add_argument("head", type=Path)
+    args = parser.parse_args()
+    compare(json.loads(args.base.read_text()), json.loads(args.head.read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Synthetic dataset generator for benchmarks.
+
+Rows are built in Python with explicit primary keys and written with Core
+``executemany`` inserts in chunks, so even the large preset seeds in seconds.
+
+    DATABASE_URL=sqlite:///./bench.db python -m bench.datagen --scale medium
+"""
+import argparse
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.security import get_password_hash
+from app.db.counters import repair
+from app.db.database import Base, _database_url
+from app.models import Comment, Document, MemberRole, Project, Task, TaskPriority, TaskStatus, User, Workspace, WorkspaceMember
+
+BENCH_PASSWORD = "bench-password"
+CHUNK_SIZE = 5000
+
+
+class Scale(NamedTuple):
+    users: int
+    workspaces: int
+    members_per_workspace: int
+    projects_per_workspace: int
+    tasks_per_project: int
+    comments_per_task: int
+    documents_per_project: int
+
+
+SCALES = {
+    "small": Scale(50, 5, 10, 4, 50, 2, 5),
+    "medium": Scale(500, 50, 20, 8, 200, 3, 10),
+    "large": Scale(5000, 200, 50, 10, 500, 3, 20),
+}
+
+STATUS_WEIGHTS = {
+    TaskStatus.TODO: 35,
+    TaskStatus.IN_PROGRESS: 20,
+    TaskStatus.REVIEW: 10,
+    TaskStatus.DONE: 35,
+}
+PRIORITY_WEIGHTS = {
+    TaskPriority.LOW: 20,
+    TaskPriority.MEDIUM: 45,
+    TaskPriority.HIGH: 25,
+    TaskPriority.URGENT: 10,
+}
+NO_DUE_DATE_RATIO = 0.3
+UNASSIGNED_RATIO = 0.15
+
+
+class Dataset(NamedTuple):
+    users: Dict[int, str]  # user id -> email
+    user_projects: Dict[int, List[int]]  # user id -> accessible project ids
+    project_tasks: Dict[int, List[int]]  # project id -> task ids
+    counts: Dict[str, int]
+
+
+def _insert(engine: Engine, model, rows: List[dict]) -> None:
+    with engine.begin() as conn:
+        for start in range(0, len(rows), CHUNK_SIZE):
+            conn.execute(model.__table__.insert(), rows[start:start + CHUNK_SIZE])
+
+
+def _weighted(rng: random.Random, weights: dict):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def generate(database_url: str, scale: Scale, seed: int = 42) -> Dataset:
+    """Drop and recreate the schema at ``database_url`` and fill it at ``scale``."""
+    rng = random.Random(seed)
+    engine = create_engine(_database_url(database_url))
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    now = datetime.utcnow()
+    password_hash = get_password_hash(BENCH_PASSWORD)
+
+    def past(days: int) -> datetime:
+        return now - timedelta(seconds=rng.randint(0, days * 86400))
+
+    users = [
+        {
+            "id": i,
+            "email": f"user{i}@bench.local",
+            "password_hash": password_hash,
+            "display_name": f"Bench User {i}",
+            "created_at": past(365),
+        }
+        for i in range(1, scale.users + 1)
+    ]
+    user_ids = [u["id"] for u in users]
+
+    workspaces, memberships = [], []
+    workspace_members: Dict[int, List[int]] = {}
+    for ws_id in range(1, scale.workspaces + 1):
+        members = rng.sample(user_ids, min(scale.members_per_workspace, len(user_ids)))
+        owner_id = members[0]
+        workspaces.append({
+            "id": ws_id,
+            "name": f"Workspace {ws_id}",
+            "owner_id": owner_id,
+            "created_at": past(180),
+        })
+        for user_id in members:
+            memberships.append({
+                "id": len(memberships) + 1,
+                "workspace_id": ws_id,
+                "user_id": user_id,
+                "role": MemberRole.ADMIN if user_id == owner_id else MemberRole.MEMBER,
+                "joined_at": past(180),
+            })
+        workspace_members[ws_id] = members
+
+    projects, tasks, comments, documents = [], [], [], []
+    user_projects: Dict[int, List[int]] = {user_id: [] for user_id in user_ids}
+    project_tasks: Dict[int, List[int]] = {}
+    for ws_id, members in workspace_members.items():
+        for _ in range(scale.projects_per_workspace):
+            project_id = len(projects) + 1
+            projects.append({
+                "id": project_id,
+                "workspace_id": ws_id,
+                "name": f"Project {project_id}",
+                "created_at": past(120),
+            })
+            for user_id in members:
+                user_projects[user_id].append(project_id)
+
+            positions = {task_status: 0 for task_status in TaskStatus}
+            project_tasks[project_id] = []
+            for _ in range(scale.tasks_per_project):
+                task_id = len(tasks) + 1
+                task_status = _weighted(rng, STATUS_WEIGHTS)
+                positions[task_status] += 1
+                due_date = None
+                if rng.random() >= NO_DUE_DATE_RATIO:
+                    due_date = now + timedelta(days=rng.uniform(-20, 40))
+                tasks.append({
+                    "id": task_id,
+                    "workspace_id": ws_id,
+                    "project_id": project_id,
+                    "title": f"Task {task_id}",
+                    "description": "Synthetic benchmark task",
+                    "status": task_status,
+                    "priority": _weighted(rng, PRIORITY_WEIGHTS),
+                    "assignee_id": None if rng.random() < UNASSIGNED_RATIO else rng.choice(members),
+                    "created_by": rng.choice(members),
+                    "due_date": due_date,
+                    "position": positions[task_status],
+                    "created_at": past(90),
+                })
+                project_tasks[project_id].append(task_id)
+                for _ in range(scale.comments_per_task):
+                    comments.append({
+                        "id": len(comments) + 1,
+                        "workspace_id": ws_id,
+                        "task_id": task_id,
+                        "user_id": rng.choice(members),
+                        "content": "Synthetic benchmark comment",
+                        "created_at": past(60),
+                    })
+
+            for _ in range(scale.documents_per_project):
+                documents.append({
+                    "id": len(documents) + 1,
+                    "workspace_id": ws_id,
+                    "project_id": project_id,
+                    "title": f"Document {len(documents) + 1}",
+                    "content": "<p>Synthetic benchmark document</p>" * 20,
+                    "created_by": rng.choice(members),
+                    "created_at": past(90),
+                })
+
+    for model, rows in (
+        (User, users),
+        (Workspace, workspaces),
+        (WorkspaceMember, memberships),
+        (Project, projects),
+        (Task, tasks),
+        (Comment, comments),
+        (Document, documents),
+    ):
+        _insert(engine, model, rows)
+
+    # Explicit ids bypass Postgres sequences; move them past the seeded rows.
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            for model in (User, Workspace, WorkspaceMember, Project, Task, Comment, Document):
+                table = model.__tablename__
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"COALESCE((SELECT MAX(id) FROM {table}), 1))"
+                ))
+    # The bulk inserts bypass the API, so fill the counter columns afterwards
+    with Session(engine) as session:
+        repair(session)
+    engine.dispose()
+
+    return Dataset(
+        users={u["id"]: u["email"] for u in users},
+        user_projects={user_id: ids for user_id, ids in user_projects.items() if ids},
+        project_tasks=project_tasks,
+        counts={
+            "users": len(users),
+            "workspaces": len(workspaces),
+            "memberships": len(memberships),
+            "projects": len(projects),
+            "tasks": len(tasks),
+            "comments": len(comments),
+            "documents": len(documents),
+        },
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a synthetic Team Hub dataset.")
+    parser.add_argument("--database-url", default=os.environ["DATABASE_URL"])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    dataset = generate(args.database_url, SCALES[args.scale], seed=args.seed)
+    for name, count in dataset.counts.items():
+        print(f"{name:>12}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Micro-benchmark of the hot lookups: legacy ``db.query(...)`` against the
+cached statements in ``app.db.lookups``.
+
+Runs against an in-memory SQLite database holding one row per table, so the
+database work is close to nothing and the difference is the Python-side cost
+of building, caching and compiling each statement.
+
+    python -m bench.lookups --iterations 20000
+"""
+import argparse
+import time
+from typing import Callable, Dict, Tuple
+
+from sqlalchemy import and_, create_engine
+from sqlalchemy.orm import Session, joinedload
+
+from app.db import lookups
+from app.db.database import Base
+from app.models.project import Project
+from app.models.task import Task
+from app.models.user import User
+from app.models.workspace import MemberRole, Workspace, WorkspaceMember
+
+
+def _seed(db: Session) -> None:
+    user = User(id=1, email="bench@example.com", password_hash="x", display_name="Bench")
+    workspace = Workspace(id=1, name="Bench", owner_id=1)
+    db.add_all([user, workspace])
+    db.flush()
+    db.add_all([
+        WorkspaceMember(workspace_id=1, user_id=1, role=MemberRole.ADMIN),
+        Project(id=1, workspace_id=1, name="Bench"),
+    ])
+    db.flush()
+    db.add(Task(id=1, workspace_id=1, project_id=1, title="Bench", created_by=1, assignee_id=1))
+    db.commit()
+
+
+def _cases(db: Session) -> Dict[str, Tuple[Callable[[], object], Callable[[], object]]]:
+    return {
+        "user_by_id": (
+            lambda: db.query(User).filter(User.id == 1).first(),
+            lambda: lookups.user_by_id(db, 1),
+        ),
+        "workspace_by_id": (
+            lambda: db.query(Workspace).filter(Workspace.id == 1).first(),
+            lambda: lookups.workspace_by_id(db, 1),
+        ),
+        "project_by_id": (
+            lambda: db.query(Project).filter(Project.id == 1).first(),
+            lambda: lookups.project_by_id(db, 1),
+        ),
+        "task_with_people": (
+            lambda: db.query(Task).options(
+                joinedload(Task.assignee), joinedload(Task.creator)
+            ).filter(Task.workspace_id == 1, Task.id == 1).first(),
+            lambda: lookups.task_with_people_by_id(db, 1, 1),
+        ),
+        "membership": (
+            lambda: db.query(WorkspaceMember).filter(
+                WorkspaceMember.workspace_id == 1, WorkspaceMember.user_id == 1
+            ).first(),
+            lambda: lookups.membership(db, 1, 1),
+        ),
+        "workspace_access": (
+            lambda: db.query(Workspace.owner_id, WorkspaceMember.id).outerjoin(
+                WorkspaceMember,
+                and_(WorkspaceMember.workspace_id == Workspace.id, WorkspaceMember.user_id == 1)
+            ).filter(Workspace.id == 1).first(),
+            lambda: lookups.workspace_owner_and_membership(db, 1, 1),
+        ),
+    }
+
+
+def _per_call_us(func: Callable[[], object], iterations: int) -> float:
+    for _ in range(min(iterations, 200)):
+        func()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-lookup overhead: db.query() vs cached statements.")
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        _seed(db)
+
+    print(f"{'lookup':<20}{'query() us':>12}{'cached us':>12}{'saved':>8}")
+    with Session(engine) as db:
+        for name, (legacy, cached) in _cases(db).items():
+            legacy_us = _per_call_us(legacy, args.iterations)
+            cached_us = _per_call_us(cached, args.iterations)
+            print(f"{name:<20}{legacy_us:>12.1f}{cached_us:>12.1f}{1 - cached_us / legacy_us:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Load-test driver.
+
+Seeds a synthetic dataset, then drives the API with concurrent virtual users
+for a fixed duration and records latency per endpoint. Each value in
+``--workers`` starts ``uvicorn --workers N`` against the same data, so the
+results show how throughput scales with worker count. ``--in-process`` skips
+uvicorn and drives the ASGI app directly through httpx.
+
+    python -m bench.run --scale medium --workers 1,2,4 --concurrency 32 --duration 30
+
+Results are written as JSON (see ``bench.compare`` to diff two runs). Use
+Postgres for multi-worker runs; SQLite serialises writers.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+from bench.datagen import BENCH_PASSWORD, SCALES, Dataset, generate
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# Relative frequency of each scenario in the virtual-user mix
+SCENARIO_WEIGHTS = {
+    "login": 2,
+    "dashboard_stats": 10,
+    "task_list": 30,
+    "board_move": 20,
+    "comments": 18,
+    "documents": 20,
+}
+STATUSES = ["todo", "in_progress", "review", "done"]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    async def timed(self, name: str, request) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError:
+            response = None
+        self.latencies.setdefault(name, []).append(time.perf_counter() - started)
+        if response is None or response.status_code >= 400:
+            self.errors[name] = self.errors.get(name, 0) + 1
+        return response
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict[str, dict]:
+    summary = {}
+    for name, values in sorted(recorder.latencies.items()):
+        values = sorted(values)
+        summary[name] = {
+            "count": len(values),
+            "errors": recorder.errors.get(name, 0),
+            "throughput_rps": round(len(values) / elapsed, 2),
+            "mean_ms": round(sum(values) / len(values) * 1000, 2),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+        }
+    return summary
+
+
+async def login(client: httpx.AsyncClient, recorder: Recorder, email: str) -> Optional[str]:
+    response = await recorder.timed("login", client.post(
+        "/api/auth/login", data={"username": email, "password": BENCH_PASSWORD}
+    ))
+    if response is None or response.status_code != 200:
+        return None
+    return response.json()["access_token"]
+
+
+async def virtual_user(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    dataset: Dataset,
+    user_id: int,
+    deadline: float,
+    rng: random.Random,
+) -> None:
+    email = dataset.users[user_id]
+    token = await login(client, recorder, email)
+    if token is None:
+        return
+    headers = {"Authorization": f"Bearer {token}"}
+    projects = dataset.user_projects[user_id]
+    names = list(SCENARIO_WEIGHTS)
+    weights = list(SCENARIO_WEIGHTS.values())
+
+    while time.perf_counter() < deadline:
+        scenario = rng.choices(names, weights=weights)[0]
+        project_id = rng.choice(projects)
+        task_ids = dataset.project_tasks.get(project_id) or [None]
+        task_id = rng.choice(task_ids)
+
+        if scenario == "login":
+            await login(client, recorder, email)
+        elif scenario == "dashboard_stats":
+            await recorder.timed(scenario, client.get("/api/dashboard/stats", headers=headers))
+        elif scenario == "task_list":
+            await recorder.timed(scenario, client.get(
+                "/api/tasks/", params={"project_id": project_id}, headers=headers
+            ))
+        elif scenario == "board_move" and task_id:
+            await recorder.timed(scenario, client.patch(
+                f"/api/tasks/{task_id}/position",
+                json={"status": rng.choice(STATUSES), "position": rng.randint(1, 50)},
+                headers=headers,
+            ))
+        elif scenario == "comments" and task_id:
+            if rng.random() < 0.3:
+                await recorder.timed("comment_create", client.post(
+                    "/api/comments/", json={"task_id": task_id, "content": "bench"}, headers=headers
+                ))
+            else:
+                await recorder.timed("comment_list", client.get(
+                    "/api/comments/", params={"task_id": task_id}, headers=headers
+                ))
+        elif scenario == "documents":
+            await recorder.timed(scenario, client.get(
+                "/api/documents/", params={"project_id": project_id}, headers=headers
+            ))
+
+
+async def drive(client: httpx.AsyncClient, dataset: Dataset, concurrency: int, duration: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    user_ids = list(dataset.user_projects)
+    recorder = Recorder()
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(
+        virtual_user(client, recorder, dataset, rng.choice(user_ids), deadline, random.Random(seed + i))
+        for i in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+    total = sum(len(v) for v in recorder.latencies.values())
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "total_requests": total,
+        "throughput_rps": round(total / elapsed, 2),
+        "endpoints": summarize(recorder, elapsed),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/ready", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not become ready")
+
+
+def run_uvicorn(workers: int, database_url: str, dataset: Dataset, args) -> dict:
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, DATABASE_URL=database_url)
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    try:
+        _wait_until_ready(base_url)
+
+        async def go():
+            limits = httpx.Limits(max_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+                return await drive(client, dataset, args.concurrency, args.duration, args.seed)
+
+        return asyncio.run(go())
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def run_in_process(dataset: Dataset, args) -> dict:
+    from main import app
+
+    async def go():
+        transport = httpx.ASGITransport(app=app)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=30.0) as client:
+                return await drive(client, dataset, args.concurrency, args.duration, args.seed)
+
+    return asyncio.run(go())
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Team Hub API.")
+    parser.add_argument("--database-url", default=os.environ["DATABASE_URL"])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--workers", default="1", help="comma-separated uvicorn worker counts, e.g. 1,2,4")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per run")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--in-process", action="store_true", help="drive the ASGI app without uvicorn")
+    parser.add_argument("--out", type=Path, default=None, help="results file (default: bench/results/<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    if args.in_process and args.database_url != os.environ["DATABASE_URL"]:
+        parser.error("--in-process uses the app's own settings; set DATABASE_URL instead of --database-url")
+
+    print(f"Seeding {args.scale} dataset...", flush=True)
+    dataset = generate(args.database_url, SCALES[args.scale], seed=args.seed)
+
+    runs = []
+    if args.in_process:
+        print("Running in-process...", flush=True)
+        runs.append({"mode": "in-process", "workers": 1, **run_in_process(dataset, args)})
+    else:
+        for workers in [int(w) for w in args.workers.split(",")]:
+            print(f"Running with {workers} uvicorn worker(s)...", flush=True)
+            runs.append({"mode": "uvicorn", "workers": workers, **run_uvicorn(workers, args.database_url, dataset, args)})
+
+    commit = _git_commit()
+    timestamp = datetime.now(timezone.utc)
+    results = {
+        "meta": {
+            "commit": commit,
+            "timestamp": timestamp.isoformat(),
+            "scale": args.scale,
+            "dataset": dataset.counts,
+            "database": args.database_url.split(":", 1)[0],
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "seed": args.seed,
+        },
+        "runs": runs,
+    }
+
+    out = args.out or RESULTS_DIR / f"{commit or 'nocommit'}-{timestamp:%Y%m%dT%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2))
+
+    for run in runs:
+        print(f"\n{run['mode']} x{run['workers']}: {run['throughput_rps']} req/s over {run['elapsed_s']}s")
+        print(f"{'endpoint':<18}{'count':>8}{'errors':>8}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+        for name, stats in run["endpoints"].items():
+            print(
+                f"{name:<18}{stats['count']:>8}{stats['errors']:>8}{stats['throughput_rps']:>9}"
+                f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+            )
+    print(f"\nResults written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,72 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 
-from app.api.routes import auth, users, workspaces, projects, tasks, comments, documents, dashboard
+from app.api.deps import get_current_admin_user
+from app.api.routes import (
+    auth, users, workspaces, projects, tasks, comments, documents, dashboard, admin, batch, analytics
+)
+from app.core.cache import get_cache
 from app.core.config import settings
-from app.db.database import engine, Base
-from app.models import user, workspace, project, task, comment, document
+from app.core.instrumentation import RequestMetricsMiddleware, instrument_engine
+from app.core.jobs import JobWorker
+from app.core.metrics import render_latest
+from app.core.profiling import ProfilingMiddleware
+from app.core.rate_limit import AdmissionControlMiddleware
+from app.db.database import get_engine, get_replica_set
+from app.db.replicas import ReadReplicaMiddleware
+from app.db.warmup import warm_up
+from app.models.user import User
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nothing touches the database at import; connect, create tables and
+    # warm caches here, and only report ready once that is done.
+    app.state.ready = False
+    instrument_engine(get_engine())
+    for replica in get_replica_set().engines:
+        instrument_engine(replica)
+    get_cache()
+    await run_in_threadpool(warm_up)
+    worker = JobWorker() if settings.JOBS_WORKER_ENABLED else None
+    if worker is not None:
+        worker.start()
+    app.state.ready = True
+    yield
+    app.state.ready = False
+    if worker is not None:
+        await run_in_threadpool(worker.stop)
+    get_cache().close()
+    get_cache.cache_clear()
+    get_replica_set().dispose()
+    get_replica_set.cache_clear()
+    get_engine().dispose()
 
-# Create tables on startup
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="Team Hub API",
     description="A collaborative team workspace API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Send GET/HEAD reads to the replicas in DATABASE_REPLICA_URLS, if any
+app.add_middleware(ReadReplicaMiddleware)
+
+# On-demand profiling of single requests (admins only, off unless PROFILING_ENABLED)
+app.add_middleware(ProfilingMiddleware)
+
+# Admission control - per-user rate limits and a global in-flight cap.
+# Added before CORS so rejections still carry CORS headers.
+app.add_middleware(AdmissionControlMiddleware)
+
+# Per-route latency and SQL metrics, exported at /metrics and as Server-Timing
+app.add_middleware(RequestMetricsMiddleware)
+
 # CORS middleware - allow all origins
 app.add_middleware(
     CORSMiddleware,
@@ -29,10 +81,13 @@ app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
 app.include_router(workspaces.router, prefix="/api/workspaces", tags=["Workspaces"])
 app.include_router(projects.router, prefix="/api/projects", tags=["Projects"])
+app.include_router(analytics.router, prefix="/api/projects", tags=["Analytics"])
 app.include_router(tasks.router, prefix="/api/tasks", tags=["Tasks"])
 app.include_router(comments.router, prefix="/api/comments", tags=["Comments"])
 app.include_router(documents.router, prefix="/api/documents", tags=["Documents"])
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["Dashboard"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
+app.include_router(batch.router, prefix="/api/batch", tags=["Batch"])
 
 
 @app.get("/")
@@ -42,4 +97,17 @@ def root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+
+@app.get("/ready")
+def readiness_check():
+    if not getattr(app.state, "ready", False):
+        return JSONResponse({"status": "starting"}, status_code=503)
+    return {"status": "ready"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics(current_user: User = Depends(get_current_admin_user)):
+    # Route names, volumes and timings are not for every user; scrape with an admin token
+    return PlainTextResponse(render_latest(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,88 @@
+"""
+Shared fixtures: an in-process app on a throwaway SQLite database.
+
+Run with ``--strict-lazy`` (or ``TEAMHUB_STRICT_LAZY=1``) to make every
+relationship that is not eagerly loaded raise instead of lazy loading.
+"""
+import os
+import tempfile
+
+_tmpdir = tempfile.mkdtemp(prefix="teamhub-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmpdir}/test.db")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("MAX_IN_FLIGHT_REQUESTS", "0")
+os.environ.setdefault("JOBS_WORKER_ENABLED", "false")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import raiseload
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+
+from app.core.cache import get_cache
+from app.db.database import Base, LazyEngineSession, SessionLocal, engine
+from main import app
+from tests.utils import QueryCounter
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--strict-lazy",
+        action="store_true",
+        default=False,
+        help="Raise on any relationship lazy load (lazy='raise' everywhere).",
+    )
+
+
+def _raise_on_lazy_load(orm_execute_state):
+    if not orm_execute_state.is_select:
+        return
+    statement = orm_execute_state.statement
+    if isinstance(statement, StatementLambdaElement):
+        # Options on the resolved statement would drop the lambda's bound values
+        orm_execute_state.statement = statement.add_criteria(lambda s: s.options(raiseload("*")))
+    else:
+        orm_execute_state.statement = statement.options(raiseload("*"))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def strict_lazy(request):
+    enabled = request.config.getoption("--strict-lazy") or os.environ.get("TEAMHUB_STRICT_LAZY") == "1"
+    if not enabled:
+        yield False
+        return
+    # On the class both session factories build from, so one registration covers
+    # them. insert=True: read sessions run the statement in their own hook, so
+    # this must come first
+    event.listen(LazyEngineSession, "do_orm_execute", _raise_on_lazy_load, insert=True)
+    yield True
+    event.remove(LazyEngineSession, "do_orm_execute", _raise_on_lazy_load)
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    get_cache().flush()
+    yield
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def query_counter():
+    return QueryCounter(engine)
@@ -0,0 +1,130 @@
+"""
+The activity log: written by the write paths, read as paginated feeds, pruned by a periodic job.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from app.core.jobs import run_pending, schedule_periodic
+from app.db.activity import prune_activity, record
+from app.db.partitioning import partitioned_metadata
+from app.models.activity import ActivityEvent
+from app.models.job import Job, JobStatus
+from app.models.user import User
+from tests.utils import auth_headers, seed_workspace
+
+
+def test_write_paths_append_events_to_the_feed(client, db):
+    seeded = seed_workspace(db, 2)
+    headers = auth_headers(seeded["owner"])
+    workspace_id = seeded["workspace_id"]
+
+    task = client.post("/api/tasks/", json={"project_id": seeded["project_id"], "title": "Ship"}, headers=headers).json()
+    client.patch(f"/api/tasks/{task['id']}/position", json={"status": "in_progress", "position": 1}, headers=headers)
+    client.patch(f"/api/tasks/{task['id']}", json={"title": "Ship it"}, headers=headers)
+    comment = client.post("/api/comments/", json={"task_id": task["id"], "content": "On it"}, headers=headers).json()
+    client.patch(f"/api/comments/{comment['id']}", json={"content": "On it now"}, headers=headers)
+    document = client.post("/api/documents/", json={"project_id": seeded["project_id"], "title": "Notes"}, headers=headers).json()
+    client.delete(f"/api/documents/{document['id']}", headers=headers)
+
+    response = client.get(f"/api/workspaces/{workspace_id}/activity", headers=headers)
+    assert response.status_code == 200
+    events = response.json()["items"]
+    assert [e["verb"] for e in events] == [
+        "document.deleted", "document.created", "comment.updated", "comment.created",
+        "task.updated", "task.status_changed", "task.created",
+    ]
+    assert events[2]["data"] == {"task_id": task["id"], "fields": ["content"]}
+    status_change = events[5]
+    assert status_change["data"] == {"title": "Ship", "previous": "todo", "status": "in_progress"}
+    assert status_change["actor_name"] == seeded["owner"].display_name
+    assert all(e["project_id"] == seeded["project_id"] for e in events)
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 4} if cursor is None else {"limit": 4, "cursor": cursor}
+        page = client.get(f"/api/workspaces/{workspace_id}/activity", params=params, headers=headers).json()
+        pages.append([e["id"] for e in page["items"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == [[e["id"] for e in events[:4]], [e["id"] for e in events[4:]]]
+
+    bad = client.get(f"/api/workspaces/{workspace_id}/activity", params={"cursor": "nope"}, headers=headers)
+    assert bad.status_code == 400
+
+
+def test_membership_changes_are_recorded(client, db):
+    seeded = seed_workspace(db, 2)
+    headers = auth_headers(seeded["owner"])
+    workspace_id = seeded["workspace_id"]
+    member_id = db.query(User.id).filter(User.email == "user0@example.com").scalar()
+
+    client.delete(f"/api/workspaces/{workspace_id}/members/{member_id}", headers=headers)
+    client.post(f"/api/workspaces/{workspace_id}/members/bulk", json={"add": [{"user_id": member_id}]}, headers=headers)
+
+    events = client.get(f"/api/workspaces/{workspace_id}/activity", headers=headers).json()["items"]
+    assert [(e["verb"], e["subject_id"]) for e in events] == [
+        ("member.added", member_id), ("member.removed", member_id)
+    ]
+    assert events[0]["data"] == {"role": "member"}
+
+
+def test_feed_requires_workspace_access(client, db):
+    seeded = seed_workspace(db, 1)
+    outsider = User(email="outsider@example.com", password_hash="x", display_name="Outsider")
+    db.add(outsider)
+    db.commit()
+    response = client.get(f"/api/workspaces/{seeded['workspace_id']}/activity", headers=auth_headers(outsider))
+    assert response.status_code == 403
+
+
+def test_dashboard_recent_activity_reads_the_log(client, db):
+    seeded = seed_workspace(db, 3)
+    headers = auth_headers(seeded["owner"])
+    for index in range(7):
+        record(db, seeded["workspace_id"], seeded["owner"].id, "task.updated", seeded["task_id"], title=f"v{index}")
+    db.commit()
+
+    stats = client.get(f"/api/dashboard/workspace/{seeded['workspace_id']}/stats", headers=headers).json()
+    assert [e["data"]["title"] for e in stats["recent_activity"]] == [f"v{i}" for i in range(6, -1, -1)]
+    dashboard = client.get("/api/dashboard/stats", headers=headers).json()
+    assert [e["data"]["title"] for e in dashboard["workspaces"][0]["recent_activity"]] == ["v6", "v5", "v4", "v3", "v2"]
+
+
+def test_prune_runs_daily_and_drops_expired_events(db):
+    seeded = seed_workspace(db, 1)
+    for age in (200, 100, 1):
+        db.add(ActivityEvent(
+            workspace_id=seeded["workspace_id"], verb="task.updated", data={},
+            created_at=datetime.utcnow() - timedelta(days=age)
+        ))
+    db.commit()
+
+    schedule_periodic()
+    schedule_periodic()  # every worker schedules it; the slot key keeps one job
+    scheduled = db.query(Job).filter(Job.name == "prune_activity").one()
+    assert scheduled.run_at > datetime.utcnow()
+    assert run_pending() == 0
+
+    # Pretend a day has passed: the job is due and its slot is over
+    db.query(Job).filter(Job.name == "prune_activity").update({
+        "run_at": datetime.utcnow() - timedelta(seconds=1), "idempotency_key": "prune_activity:0"
+    })
+    db.commit()
+    assert run_pending() == 1
+    db.expire_all()
+    assert db.query(ActivityEvent).count() == 1
+    # The run enqueued the next day's
+    jobs = db.query(Job).filter(Job.name == "prune_activity").order_by(Job.id).all()
+    assert [job.status for job in jobs] == [JobStatus.DONE, JobStatus.PENDING]
+    assert prune_activity() == 0
+
+
+def test_monthly_partition_ddl():
+    metadata = partitioned_metadata(0, activity_by_month=True)
+    ddl = str(CreateTable(metadata.tables["activity_events"]).compile(dialect=postgresql.dialect()))
+    assert "PARTITION BY RANGE (created_at)" in ddl
+    assert "PRIMARY KEY (id, created_at)" in ddl
+    assert "PARTITION BY" not in str(CreateTable(metadata.tables["tasks"]).compile(dialect=postgresql.dialect()))
@@ -0,0 +1,63 @@
+"""
+POST /api/batch: sub-requests share the caller and report their own status.
+"""
+from fastapi.testclient import TestClient
+
+from app.core.instrumentation import REQUESTS_TOTAL
+from app.core.rate_limit import AUTH, HEAVY_READ, READ, WRITE, AdmissionControlMiddleware, RouteLimit
+from main import app
+from tests.utils import auth_headers, seed_workspace
+
+
+def test_batch_runs_items_in_order(client, db):
+    seeded = seed_workspace(db, 3)
+    headers = auth_headers(seeded["owner"])
+    task_id = seeded["task_id"]
+
+    response = client.post("/api/batch/", json={"requests": [
+        {"method": "GET", "path": f"/api/projects/{seeded['project_id']}"},
+        {"method": "GET", "path": f"/api/tasks/?project_id={seeded['project_id']}"},
+        {"method": "POST", "path": "/api/comments/", "body": {"task_id": task_id, "content": "batched"}},
+        {"method": "GET", "path": f"/api/comments/?task_id={task_id}"},
+        {"method": "GET", "path": "/api/tasks/999999"},
+        {"method": "POST", "path": "/api/comments/", "body": {"task_id": task_id}},
+        {"method": "PATCH", "path": f"/api/tasks/{task_id}", "body": {"title": "Renamed"}},
+        {"method": "GET", "path": "/api/batch/"},
+    ]}, headers=headers)
+    assert response.status_code == 200, response.text
+    items = response.json()["responses"]
+
+    assert [item["status"] for item in items] == [200, 200, 201, 200, 404, 422, 200, 400]
+    assert items[0]["body"]["id"] == seeded["project_id"]
+    assert len(items[1]["body"]) == 3
+    assert items[3]["body"][-1]["content"] == "batched"
+    assert items[4]["body"] == {"detail": "Task not found"}
+    assert items[6]["body"]["title"] == "Renamed"
+    assert client.get(f"/api/tasks/{task_id}", headers=headers).json()["title"] == "Renamed"
+
+
+def test_batch_requires_authentication(client):
+    response = client.post("/api/batch/", json={"requests": [{"method": "GET", "path": "/api/workspaces/"}]})
+    assert response.status_code == 401
+
+
+def test_batch_items_are_rate_limited_and_measured(db):
+    seeded = seed_workspace(db, 2)
+    headers = auth_headers(seeded["owner"])
+    limits = {name: RouteLimit(3, 0.01) for name in (AUTH, HEAVY_READ, READ)}
+    limits[WRITE] = RouteLimit(100, 1)
+    limited = AdmissionControlMiddleware(app, limits=limits, max_in_flight=0, rate_limit_enabled=True)
+    route = "/api/projects/{project_id}"
+    before = REQUESTS_TOTAL.value(method="GET", route=route, status="200")
+    reads = {"requests": [{"method": "GET", "path": f"/api/projects/{seeded['project_id']}"}] * 2}
+
+    with TestClient(limited) as client:
+        first = client.post("/api/batch/", json=reads, headers=headers)
+        assert [item["status"] for item in first.json()["responses"]] == [200, 200]
+        # One read token left: a two-item batch no longer fits, though it is a single request
+        second = client.post("/api/batch/", json=reads, headers=headers)
+        assert second.status_code == 429
+        assert int(second.headers["retry-after"]) > 1
+        assert client.get(f"/api/projects/{seeded['project_id']}", headers=headers).status_code == 429
+
+    assert REQUESTS_TOTAL.value(method="GET", route=route, status="200") == before + 2
@@ -0,0 +1,76 @@
+"""
+GET /api/projects/{id}/board: the Kanban board in a fixed number of queries.
+"""
+from app.models.task import Task, TaskStatus
+from tests.utils import auth_headers, seed_workspace
+
+
+def test_board_groups_cards_by_status(client, db, query_counter):
+    seeded = seed_workspace(db, 8)
+    headers = auth_headers(seeded["owner"])
+    path = f"/api/projects/{seeded['project_id']}/board"
+    # Warm the principal and permission caches
+    assert client.get(f"/api/documents/?project_id={seeded['project_id']}", headers=headers).status_code == 200
+
+    with query_counter:
+        board = client.get(path, headers=headers).json()
+    assert query_counter.count == 3, "\n".join(query_counter.statements)
+
+    assert board["project"]["id"] == seeded["project_id"]
+    assert list(board["columns"]) == [s.value for s in TaskStatus]
+    for column in board["columns"].values():
+        positions = [card["position"] for card in column["tasks"]]
+        assert positions == sorted(positions) and column["next_cursor"] is None
+    assert sum(len(c["tasks"]) for c in board["columns"].values()) == 8
+    # seed_workspace gives every card a distinct assignee, and creators are the same eight users
+    assert len(board["users"]) == 8
+    card = board["columns"]["todo"]["tasks"][0]
+    assert board["users"][str(card["assignee_id"])]["display_name"] == "User 0"
+
+    # Served from the board cache until the project changes
+    with query_counter:
+        assert client.get(path, headers=headers).json() == board
+    assert query_counter.count == 0
+
+
+def test_board_pages_each_column(client, db):
+    seeded = seed_workspace(db, 12)  # three cards per status
+    headers = auth_headers(seeded["owner"])
+    path = f"/api/projects/{seeded['project_id']}/board"
+
+    board = client.get(path, params={"limit": 2}, headers=headers).json()
+    todo = board["columns"]["todo"]
+    assert len(todo["tasks"]) == 2 and todo["next_cursor"]
+    assert all(len(c["tasks"]) == 2 for c in board["columns"].values())
+    assert set(board["users"]) == {
+        str(user_id) for c in board["columns"].values() for card in c["tasks"]
+        for user_id in (card["assignee_id"], card["created_by"])
+    }
+
+    rest = client.get(path, params={
+        "limit": 2, "column": "todo", "cursor": todo["next_cursor"]
+    }, headers=headers).json()
+    assert list(rest["columns"]) == ["todo"]
+    assert len(rest["columns"]["todo"]["tasks"]) == 1 and rest["columns"]["todo"]["next_cursor"] is None
+    assert rest["columns"]["todo"]["tasks"][0]["id"] not in {card["id"] for card in todo["tasks"]}
+
+    assert client.get(path, params={"cursor": "1:2"}, headers=headers).status_code == 400
+    assert client.get(path, params={"column": "todo", "cursor": "x"}, headers=headers).status_code == 400
+
+
+def test_tasks_without_a_status_are_shown_as_todo(client, db):
+    seeded = seed_workspace(db, 8)
+    headers = auth_headers(seeded["owner"])
+    task = db.query(Task).filter(Task.project_id == seeded["project_id"], Task.status == TaskStatus.DONE).first()
+    task.status = None
+    db.commit()
+    path = f"/api/projects/{seeded['project_id']}/board"
+
+    board = client.get(path, headers=headers)
+    assert board.status_code == 200
+    todo = [card["id"] for card in board.json()["columns"]["todo"]["tasks"]]
+    assert task.id in todo and len(todo) == 3
+
+    first = client.get(path, params={"column": "todo", "limit": 2}, headers=headers).json()["columns"]["todo"]
+    rest = client.get(path, params={"column": "todo", "limit": 2, "cursor": first["next_cursor"]}, headers=headers).json()
+    assert [card["id"] for card in first["tasks"] + rest["columns"]["todo"]["tasks"]] == todo
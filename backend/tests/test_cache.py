@@ -0,0 +1,148 @@
+"""
+Cache behaviour, including invalidation across workers through a shared
+store (``LocalRedis`` stands in for Redis).
+"""
+import time
+
+from app.api.permissions import check_workspace_access, forget_membership, forget_workspace
+from app.core.cache import Cache, LocalRedis, MemoryBackend, RedisBackend
+from app.core.config import get_settings
+from app.db import lookups
+from app.models.workspace import MemberRole, Workspace, WorkspaceMember
+from tests.utils import auth_headers, seed_workspace
+
+
+def _workers(count=2):
+    server = LocalRedis()
+    return [Cache(RedisBackend(server)) for _ in range(count)]
+
+
+def test_lru_evicts_least_recently_used():
+    backend = MemoryBackend(max_entries=2)
+    backend.set("a", 1)
+    backend.set("b", 2)
+    backend.get("a")
+    backend.set("c", 3)
+    assert backend.get("a") == 1
+    assert backend.get("c") == 3
+    assert backend.get("b") != 2
+
+
+def test_entries_expire_after_ttl():
+    cache = Cache()
+    ns = cache.namespace("short", ttl=0.05)
+    ns.set("k", "v")
+    assert ns.get("k") == "v"
+    time.sleep(0.1)
+    assert ns.get("k") is None
+
+
+def test_value_written_by_one_worker_is_visible_to_another():
+    first, second = _workers()
+    first.namespace("principals", 60).set("1", {"id": 1})
+    assert second.namespace("principals", 60).get("1") == {"id": 1}
+
+
+def test_delete_in_one_worker_drops_near_copies_in_others():
+    first, second = _workers()
+    first.namespace("permissions", 60).set("access:1:2", True)
+    assert second.namespace("permissions", 60).get("access:1:2") is True  # now in second's near cache
+
+    first.namespace("permissions", 60).delete("access:1:2")
+    assert second.namespace("permissions", 60).get("access:1:2") is None
+
+
+def test_namespace_clear_and_version_bump_propagate():
+    first, second = _workers()
+    first.namespace("board", 60).set("7", ["task"])
+    assert second.namespace("board", 60).get("7") == ["task"]
+    before = second.versions("project:7")
+
+    first.namespace("board", 60).clear()
+    first.bump("project:7")
+
+    assert second.namespace("board", 60).get("7") is None
+    assert second.versions("project:7") != before
+
+
+def test_local_versions_are_bounded_and_never_reused():
+    cache = Cache(near_entries=2)
+    before = cache.version("task:1")
+    cache.bump("task:2")
+    cache.bump("task:3")  # evicts task:1
+
+    assert len(cache._local_versions._data) == 2
+    assert cache.version("task:1") != before
+
+
+def test_board_cache_is_invalidated_by_task_writes(client, db):
+    seeded = seed_workspace(db, 3)
+    headers = auth_headers(seeded["owner"])
+    path = f"/api/tasks/?project_id={seeded['project_id']}"
+
+    before = client.get(path, headers=headers).json()
+    client.patch(f"/api/tasks/{seeded['task_id']}", json={"title": "Renamed"}, headers=headers)
+    after = client.get(path, headers=headers).json()
+
+    assert [t["title"] for t in before if t["id"] == seeded["task_id"]] == ["Task 0"]
+    assert [t["title"] for t in after if t["id"] == seeded["task_id"]] == ["Renamed"]
+
+
+def _member(db, seeded):
+    return db.query(WorkspaceMember).filter(
+        WorkspaceMember.workspace_id == seeded["workspace_id"],
+        WorkspaceMember.user_id != seeded["owner"].id
+    ).first()
+
+
+def test_revoke_during_a_permission_load_is_not_overwritten(db, monkeypatch):
+    seeded = seed_workspace(db, 2)
+    member = _member(db, seeded)
+    load = lookups.workspace_owner_and_membership
+
+    def load_then_revoke(db, workspace_id, user_id):
+        row = load(db, workspace_id, user_id)
+        # Another request removes the member after the row was read
+        db.query(WorkspaceMember).filter(WorkspaceMember.id == member.id).delete()
+        db.commit()
+        forget_membership(workspace_id, user_id)
+        return row
+
+    monkeypatch.setattr(lookups, "workspace_owner_and_membership", load_then_revoke)
+    assert check_workspace_access(db, seeded["workspace_id"], member.user_id) is True
+    monkeypatch.setattr(lookups, "workspace_owner_and_membership", load)
+    assert check_workspace_access(db, seeded["workspace_id"], member.user_id) is False
+
+
+def test_unshared_permission_entries_expire_quickly(db, monkeypatch):
+    monkeypatch.setattr(get_settings(), "CACHE_NEAR_TTL_SECONDS", 0.05)
+    seeded = seed_workspace(db, 2)
+    member = _member(db, seeded)
+    assert check_workspace_access(db, seeded["workspace_id"], member.user_id) is True
+
+    # Revoked by another worker: this one never sees the bump, only the TTL
+    db.query(WorkspaceMember).filter(WorkspaceMember.id == member.id).delete()
+    db.commit()
+    assert check_workspace_access(db, seeded["workspace_id"], member.user_id) is True
+    time.sleep(0.1)
+    assert check_workspace_access(db, seeded["workspace_id"], member.user_id) is False
+
+
+def test_forget_workspace_keeps_other_workspaces_cached(db):
+    seeded = seed_workspace(db, 2)
+    member = _member(db, seeded)
+    other = Workspace(name="Other", owner_id=seeded["owner"].id)
+    db.add(other)
+    db.flush()
+    db.add(WorkspaceMember(workspace_id=other.id, user_id=member.user_id, role=MemberRole.MEMBER))
+    db.commit()
+    assert check_workspace_access(db, seeded["workspace_id"], member.user_id) is True
+    assert check_workspace_access(db, other.id, member.user_id) is True
+
+    # Rows gone without a per-member forget: only the workspace-wide one runs
+    db.query(WorkspaceMember).filter(WorkspaceMember.user_id == member.user_id).delete()
+    db.commit()
+    forget_workspace(seeded["workspace_id"])
+
+    assert check_workspace_access(db, seeded["workspace_id"], member.user_id) is False
+    assert check_workspace_access(db, other.id, member.user_id) is True  # still served from the cache
@@ -0,0 +1,52 @@
+"""
+Counter-cache columns: kept in step by the write paths, rebuilt by repair.
+"""
+from app.db.counters import repair
+from app.models.project import Project
+from app.models.task import Task
+from app.models.workspace import Workspace
+from tests.utils import auth_headers, seed_workspace
+
+
+def test_write_paths_maintain_counters(client, db):
+    seeded = seed_workspace(db, 4)
+    headers = auth_headers(seeded["owner"])
+    assert repair(db) > 0  # the seeder writes rows directly and leaves counters at zero
+
+    project = client.post("/api/projects/", json={
+        "workspace_id": seeded["workspace_id"], "name": "Counted"
+    }, headers=headers).json()
+    task = client.post("/api/tasks/", json={"project_id": project["id"], "title": "One"}, headers=headers).json()
+    client.post("/api/tasks/", json={"project_id": project["id"], "title": "Two"}, headers=headers)
+    comment = client.post("/api/comments/", json={"task_id": task["id"], "content": "a"}, headers=headers).json()
+    client.post("/api/comments/", json={"task_id": task["id"], "content": "b"}, headers=headers)
+    client.delete(f"/api/comments/{comment['id']}", headers=headers)
+
+    workspaces = client.get("/api/workspaces/", headers=headers).json()
+    assert workspaces[0]["project_count"] == 2
+    assert client.get(f"/api/projects/{project['id']}", headers=headers).json()["task_count"] == 2
+    assert client.get(f"/api/tasks/{task['id']}", headers=headers).json()["comment_count"] == 1
+    board = client.get("/api/tasks/", params={"project_id": project["id"]}, headers=headers).json()
+    assert {t["title"]: t["comment_count"] for t in board} == {"One": 1, "Two": 0}
+
+    client.delete(f"/api/tasks/{task['id']}", headers=headers)
+    assert client.get(f"/api/projects/{project['id']}", headers=headers).json()["task_count"] == 1
+    client.delete(f"/api/projects/{project['id']}", headers=headers)
+    assert client.get("/api/workspaces/", headers=headers).json()[0]["project_count"] == 1
+
+    assert repair(db) == 0
+
+
+def test_repair_fixes_drifted_counters(db):
+    seeded = seed_workspace(db, 4)
+    repair(db)
+    db.query(Project).filter(Project.id == seeded["project_id"]).update({"task_count": 99})
+    db.query(Task).filter(Task.id == seeded["task_id"]).update({"comment_count": -1})
+    db.query(Workspace).update({"project_count": 0})
+    db.commit()
+
+    assert repair(db) == 3
+    db.expire_all()
+    assert db.get(Project, seeded["project_id"]).task_count == 4
+    assert db.get(Task, seeded["task_id"]).comment_count == 4
+    assert db.get(Workspace, seeded["workspace_id"]).project_count == 1
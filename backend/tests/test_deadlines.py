@@ -0,0 +1,75 @@
+"""
+Deadlines: the caller's overdue / due-soon tasks, and the sweeper that advances deadline state.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects import sqlite
+
+from app.db.deadlines import sweep_deadlines
+from app.models.activity import ActivityEvent
+from app.models.task import DeadlineState, Task, TaskStatus, open_with_due_date
+from tests.utils import auth_headers, seed_workspace
+
+
+def _set_due_dates(db, seeded, offsets):
+    """Assign the first tasks to the owner, due ``offsets`` (in days) from now."""
+    tasks = db.query(Task).filter(Task.workspace_id == seeded["workspace_id"]).order_by(Task.id).all()
+    now = datetime.utcnow()
+    for task, offset in zip(tasks, offsets):
+        task.assignee_id = seeded["owner"].id
+        task.status = TaskStatus.TODO
+        task.due_date = now + timedelta(days=offset)
+    db.commit()
+    return [task.id for task in tasks[:len(offsets)]]
+
+
+def test_deadlines_list_callers_open_tasks(client, db):
+    seeded = seed_workspace(db, 6)
+    headers = auth_headers(seeded["owner"])
+    very_late, late, soon, later, far, closed = _set_due_dates(db, seeded, (-5, -1, 1, 3, 30, -2))
+    db.query(Task).filter(Task.id == closed).update({"status": TaskStatus.DONE})
+    db.commit()
+
+    response = client.get("/api/tasks/deadlines", headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert [t["id"] for t in body["overdue"]] == [very_late, late]
+    assert [t["id"] for t in body["due_soon"]] == [soon, later]
+
+    limited = client.get("/api/tasks/deadlines", params={"limit": 1}, headers=headers).json()
+    assert [t["id"] for t in limited["overdue"]] == [very_late]
+
+    stats = client.get("/api/dashboard/stats", headers=headers).json()
+    assert (stats["overdue_tasks"], stats["tasks_due_soon"]) == (2, 2)
+
+
+def test_deadline_queries_use_the_partial_index(db):
+    query = select(Task.id).where(
+        Task.assignee_id == 1, open_with_due_date(), Task.due_date < datetime.utcnow()
+    ).order_by(Task.due_date)
+    sql = str(query.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+    plan = " ".join(str(row[-1]) for row in db.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+    assert "ix_tasks_open_assignee_due_date" in plan, plan
+
+
+def test_sweeper_advances_state_and_reminds_once(client, db):
+    seeded = seed_workspace(db, 4)
+    headers = auth_headers(seeded["owner"])
+    late, soon, far = _set_due_dates(db, seeded, (-1, 2, 30))
+
+    assert sweep_deadlines() == 2
+    db.expire_all()
+    states = {task.id: task.deadline_state for task in db.query(Task).filter(Task.id.in_((late, soon, far)))}
+    assert states == {late: DeadlineState.OVERDUE, soon: DeadlineState.DUE_SOON, far: DeadlineState.ON_TRACK}
+    events = db.query(ActivityEvent.verb, ActivityEvent.subject_id).order_by(ActivityEvent.id).all()
+    assert events == [("task.overdue", late), ("task.due_soon", soon)]
+
+    assert sweep_deadlines() == 0
+
+    # Moving the due date re-arms the reminder; the next sweep fires it again
+    new_due = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+    client.patch(f"/api/tasks/{far}", json={"due_date": new_due}, headers=headers)
+    client.patch(f"/api/tasks/{late}", json={"title": "Still late"}, headers=headers)
+    assert sweep_deadlines() == 1
+    assert db.query(ActivityEvent).filter(ActivityEvent.verb == "task.overdue").count() == 2
@@ -0,0 +1,96 @@
+"""
+Deleting workspaces and projects: database cascades, soft delete and batched purge.
+"""
+from datetime import datetime
+
+from app.core.config import get_settings
+from app.core.jobs import run_pending
+from app.db.purge import purge_deleted
+from app.models.comment import Comment
+from app.models.document import Document
+from app.models.project import Project
+from app.models.task import Task
+from app.models.workspace import Workspace, WorkspaceMember
+from tests.utils import auth_headers, seed_workspace
+
+
+def _remaining(db, workspace_id):
+    return {
+        model.__tablename__: db.query(model).filter(model.workspace_id == workspace_id).count()
+        for model in (Project, Task, Comment, Document, WorkspaceMember)
+    }
+
+
+def test_project_delete_is_soft_then_purged(client, db, monkeypatch):
+    monkeypatch.setattr(get_settings(), "PURGE_BATCH_SIZE", 2)
+    seeded = seed_workspace(db, 8)
+    headers = auth_headers(seeded["owner"])
+    project_id = seeded["project_id"]
+
+    response = client.delete(f"/api/projects/{project_id}", headers=headers)
+    assert response.status_code == 204
+    assert client.get(f"/api/projects/{project_id}", headers=headers).status_code == 404
+
+    assert run_pending() == 1
+    assert client.get(f"/api/projects/{project_id}", headers=headers).status_code == 404
+    assert client.get(f"/api/tasks/{seeded['task_id']}", headers=headers).status_code in (403, 404)
+    remaining = _remaining(db, seeded["workspace_id"])
+    assert remaining["tasks"] == remaining["comments"] == remaining["documents"] == 0
+    assert remaining["projects"] == 1  # seed_workspace(8) makes two projects
+
+
+def test_soft_deleted_containers_are_hidden_until_purged(client, db):
+    seeded = seed_workspace(db, 4)
+    headers = auth_headers(seeded["owner"])
+    other = Workspace(name="Other", owner_id=seeded["owner"].id)
+    db.add(other)
+    db.flush()
+    db.add(Project(workspace_id=other.id, name="Elsewhere"))
+    db.query(Project).filter(Project.id == seeded["project_id"]).update({"deleted_at": datetime.utcnow()})
+    db.query(Workspace).filter(Workspace.id == other.id).update({"deleted_at": datetime.utcnow()})
+    db.commit()
+
+    assert [w["id"] for w in client.get("/api/workspaces/", headers=headers).json()] == [seeded["workspace_id"]]
+    assert client.get(f"/api/workspaces/{other.id}", headers=headers).status_code in (403, 404)
+    assert client.get("/api/projects/", headers=headers).json() == []
+    assert client.get("/api/tasks/", headers=headers).json() == []
+    stats = client.get("/api/dashboard/stats", headers=headers).json()
+    assert stats["total_projects"] == 0 and stats["total_tasks"] == 0
+
+    assert purge_deleted() > 0
+    assert db.query(Workspace).count() == 1
+    assert _remaining(db, seeded["workspace_id"])["tasks"] == 0
+    assert purge_deleted() == 0
+
+
+def test_workspace_delete_does_not_load_children(client, db, query_counter):
+    seeded = seed_workspace(db, 12)
+    headers = auth_headers(seeded["owner"])
+    workspace_id = seeded["workspace_id"]
+    db.expunge_all()
+
+    with query_counter:
+        response = client.delete(f"/api/workspaces/{workspace_id}", headers=headers)
+    assert response.status_code == 204
+    # No SELECT of projects, tasks, comments, documents or members to delete them one by one
+    loads = [s for s in query_counter.statements if s.lstrip().startswith("SELECT") and "FROM workspaces" not in s]
+    assert not [s for s in loads if "FROM projects" in s or "FROM tasks" in s], loads
+
+    assert run_pending() == 1
+
+    assert db.query(Workspace).filter(Workspace.id == workspace_id).count() == 0
+    assert set(_remaining(db, workspace_id).values()) == {0}
+
+
+def test_hard_delete_relies_on_database_cascade(client, db, query_counter, monkeypatch):
+    monkeypatch.setattr(get_settings(), "SOFT_DELETE_CONTAINERS", False)
+    seeded = seed_workspace(db, 12)
+    headers = auth_headers(seeded["owner"])
+    db.expunge_all()
+
+    with query_counter:
+        response = client.delete(f"/api/workspaces/{seeded['workspace_id']}", headers=headers)
+    assert response.status_code == 204
+    deletes = [s for s in query_counter.statements if s.lstrip().startswith("DELETE")]
+    assert len(deletes) == 1, deletes
+    assert set(_remaining(db, seeded["workspace_id"]).values()) == {0}
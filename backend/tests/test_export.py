@@ -0,0 +1,89 @@
+"""
+Streaming task exports: CSV (and Parquet where pyarrow is installed), batch by batch.
+"""
+import csv
+import io
+
+from app.db.database import engine
+from app.db.export import COLUMNS, ExportFormat, export_tasks, iter_batches, main
+from app.db.flow import seed_history
+from app.models.task import Task
+from app.models.user import User
+from app.models.workspace import Workspace
+from tests.utils import QueryCounter, auth_headers, seed_workspace
+
+
+def test_csv_export_carries_people_and_history(client, db):
+    seeded = seed_workspace(db, 4)
+    headers = auth_headers(seeded["owner"])
+    task_id = seeded["task_id"]
+    seed_history(db)
+    client.patch(f"/api/tasks/{task_id}", json={"status": "in_progress"}, headers=headers)
+    client.patch(f"/api/tasks/{task_id}", json={"status": "done"}, headers=headers)
+
+    response = client.get("/api/tasks/export", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="tasks.csv"' in response.headers["content-disposition"]
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert tuple(rows[0]) == COLUMNS
+    tasks = db.query(Task).filter(Task.workspace_id == seeded["workspace_id"]).order_by(Task.id).all()
+    assert [int(row["id"]) for row in rows] == [task.id for task in tasks]
+
+    exported = next(row for row in rows if int(row["id"]) == task_id)
+    task = db.get(Task, task_id)
+    assert exported["status"] == "done"
+    assert exported["workspace_name"] == db.get(Workspace, seeded["workspace_id"]).name
+    assert exported["assignee_email"] == db.get(User, task.assignee_id).email
+    assert exported["status_changes"] == "2"
+    assert exported["started_at"] and exported["completed_at"] >= exported["started_at"]
+    assert all(row["status_changes"] == "0" for row in rows if row is not exported)
+
+
+def test_export_reads_in_batches(db):
+    seeded = seed_workspace(db, 7)
+    with engine.connect() as connection:
+        with QueryCounter(engine) as counter:
+            batches = list(iter_batches(connection, [seeded["workspace_id"]], batch_size=3))
+    assert [len(batch["id"]) for batch in batches] == [3, 3, 1]
+    # One streamed query for the tasks, one history lookup per batch
+    assert counter.count == 1 + len(batches)
+
+    chunks = list(export_tasks(ExportFormat.CSV, [seeded["workspace_id"]], batch_size=3))
+    assert len(chunks) == 3
+    assert len(list(csv.reader(io.StringIO(b"".join(chunks).decode())))) == 8
+
+
+def test_export_is_limited_to_the_callers_workspaces(client, db):
+    seeded = seed_workspace(db, 2)
+    outsider = User(email="outsider@example.com", password_hash="x", display_name="Outsider")
+    db.add(outsider)
+    db.commit()
+    headers = auth_headers(outsider)
+
+    assert client.get("/api/tasks/export", headers=headers).text.strip() == ",".join(COLUMNS)
+    response = client.get("/api/tasks/export", params={"workspace_id": seeded["workspace_id"]}, headers=headers)
+    assert response.status_code == 403
+
+
+def test_parquet_export(client, db):
+    seeded = seed_workspace(db, 3)
+    headers = auth_headers(seeded["owner"])
+    response = client.get("/api/tasks/export", params={"format": "parquet"}, headers=headers)
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        assert response.status_code == 400
+        return
+    assert response.status_code == 200
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.column_names == list(COLUMNS)
+    assert table.num_rows == db.query(Task).count()
+
+
+def test_cli_writes_the_export(db, tmp_path):
+    seed_workspace(db, 2)
+    output = tmp_path / "tasks.csv"
+    main([str(output)])
+    assert len(output.read_text().splitlines()) == 1 + db.query(Task).count()
@@ -0,0 +1,118 @@
+"""
+Status history and the flow analytics served from its daily rollups.
+"""
+from datetime import date, datetime, timedelta, timezone
+
+from app.db.flow import _utc_day, rollup_transitions, seed_history
+from app.models.flow import ProjectDailyFlow, TaskStatusTransition
+from app.models.task import Task, TaskStatus
+from app.models.user import User
+from tests.utils import auth_headers, seed_workspace
+
+
+def _transition(seeded, task_id, from_status, to_status, days_ago, hours=0):
+    return TaskStatusTransition(
+        workspace_id=seeded["workspace_id"], project_id=seeded["project_id"], task_id=task_id,
+        from_status=from_status, to_status=to_status,
+        created_at=datetime.utcnow() - timedelta(days=days_ago, hours=hours)
+    )
+
+
+def test_status_changes_are_recorded_and_rolled_up_once(client, db):
+    seeded = seed_workspace(db, 1)
+    headers = auth_headers(seeded["owner"])
+    task = client.post("/api/tasks/", json={"project_id": seeded["project_id"], "title": "Flow"}, headers=headers).json()
+    client.patch(f"/api/tasks/{task['id']}/position", json={"status": "in_progress", "position": 1}, headers=headers)
+    client.patch(f"/api/tasks/{task['id']}", json={"title": "Renamed"}, headers=headers)
+    client.patch(f"/api/tasks/{task['id']}", json={"status": "done"}, headers=headers)
+
+    history = db.query(TaskStatusTransition.from_status, TaskStatusTransition.to_status).filter(
+        TaskStatusTransition.task_id == task["id"]
+    ).order_by(TaskStatusTransition.id).all()
+    assert history == [
+        (None, TaskStatus.TODO),
+        (TaskStatus.TODO, TaskStatus.IN_PROGRESS),
+        (TaskStatus.IN_PROGRESS, TaskStatus.DONE),
+    ]
+
+    assert rollup_transitions() == 3
+    assert rollup_transitions() == 0
+    row = db.query(ProjectDailyFlow).one()
+    assert (row.todo, row.in_progress, row.review, row.done) == (0, 0, 0, 1)
+    assert (row.completed, row.cycle_time_count) == (1, 1)
+
+    client.delete(f"/api/tasks/{task['id']}", headers=headers)
+    assert rollup_transitions() == 1
+    db.expire_all()
+    assert db.query(ProjectDailyFlow).one().done == 0
+
+
+def test_series_carry_counts_across_days(client, db):
+    seeded = seed_workspace(db, 1)
+    headers = auth_headers(seeded["owner"])
+    first, second, third = 1001, 1002, 1003
+    db.add_all([
+        _transition(seeded, first, None, TaskStatus.TODO, 10),
+        _transition(seeded, second, None, TaskStatus.TODO, 10),
+        _transition(seeded, third, None, TaskStatus.IN_PROGRESS, 4),
+        _transition(seeded, first, TaskStatus.TODO, TaskStatus.IN_PROGRESS, 3),
+        _transition(seeded, first, TaskStatus.IN_PROGRESS, TaskStatus.DONE, 1),
+        _transition(seeded, second, TaskStatus.TODO, TaskStatus.DONE, 1),
+    ])
+    db.commit()
+    rollup_transitions()
+
+    today = datetime.utcnow().date()
+    params = {"start": str(today - timedelta(days=4)), "end": str(today)}
+    flow = client.get(f"/api/projects/{seeded['project_id']}/analytics/cumulative-flow", params=params, headers=headers)
+    assert flow.status_code == 200
+    assert [(d["todo"], d["in_progress"], d["done"]) for d in flow.json()["days"]] == [
+        (2, 1, 0), (1, 2, 0), (1, 2, 0), (0, 1, 2), (0, 1, 2),
+    ]
+
+    burndown = client.get(f"/api/projects/{seeded['project_id']}/analytics/burndown", params=params, headers=headers)
+    assert [(d["remaining"], d["completed"], d["scope"]) for d in burndown.json()["days"]][-1] == (1, 2, 3)
+
+    cycle = client.get(f"/api/projects/{seeded['project_id']}/analytics/cycle-time", params=params, headers=headers).json()
+    assert [d["throughput"] for d in cycle["days"]] == [0, 0, 0, 2, 0]
+    # Only the first task was started before it was done: two days in progress
+    assert round(cycle["average_cycle_time_hours"]) == 48
+
+
+def test_seed_history_covers_existing_tasks(client, db):
+    seeded = seed_workspace(db, 8)
+    headers = auth_headers(seeded["owner"])
+    assert seed_history(db) == 8
+    assert seed_history(db) == 0
+    rollup_transitions()
+
+    today = datetime.utcnow().date()
+    days = client.get(
+        f"/api/projects/{seeded['project_id']}/analytics/cumulative-flow",
+        params={"start": str(today), "end": str(today)}, headers=headers
+    ).json()["days"]
+    statuses = [status for (status,) in db.query(Task.status).filter(Task.project_id == seeded["project_id"])]
+    assert days[0] == {"day": str(today), **{s.value: statuses.count(s) for s in TaskStatus}}
+
+
+def test_analytics_validate_range_and_access(client, db):
+    seeded = seed_workspace(db, 1)
+    path = f"/api/projects/{seeded['project_id']}/analytics/burndown"
+    headers = auth_headers(seeded["owner"])
+    assert client.get(path, params={"start": "2026-02-01", "end": "2026-01-01"}, headers=headers).status_code == 400
+    assert client.get(path, params={"start": "2024-01-01", "end": "2026-01-01"}, headers=headers).status_code == 400
+    assert len(client.get(path, headers=headers).json()["days"]) == 30
+
+    outsider = User(email="outsider@example.com", password_hash="x", display_name="Outsider")
+    db.add(outsider)
+    db.commit()
+    assert client.get(path, headers=auth_headers(outsider)).status_code == 403
+    assert client.get("/api/projects/999/analytics/burndown", headers=headers).status_code == 404
+
+
+def test_rollup_days_are_utc_days():
+    new_york = timezone(timedelta(hours=-5))
+    # 23:30 in New York is already the next day in UTC
+    assert _utc_day(datetime(2024, 3, 1, 23, 30, tzinfo=new_york)) == date(2024, 3, 2)
+    assert _utc_day(datetime(2024, 3, 1, 23, 30, tzinfo=timezone.utc)) == date(2024, 3, 1)
+    assert _utc_day(datetime(2024, 3, 1, 23, 30)) == date(2024, 3, 1)
@@ -0,0 +1,99 @@
+"""
+Per-route instrumentation: the Server-Timing header and the series exported at /metrics.
+"""
+import re
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.core.instrumentation import RequestStats, _current_stats
+from app.db.database import engine
+from app.models.user import User, UserRole
+from tests.utils import auth_headers, seed_workspace
+
+ROUTE = 'method="GET",route="/api/workspaces/{workspace_id}"'
+
+
+@pytest.fixture
+def admin_headers(db):
+    admin = User(email="admin@example.com", password_hash="x", display_name="admin", role=UserRole.ADMIN)
+    db.add(admin)
+    db.commit()
+    return auth_headers(admin)
+
+
+def _scrape(client, headers):
+    response = client.get("/metrics", headers=headers)
+    assert response.status_code == 200
+    samples = {}
+    for line in response.text.splitlines():
+        if line and not line.startswith("#"):
+            series, value = line.rsplit(" ", 1)
+            samples[series] = float(value)
+    return samples
+
+
+def test_server_timing_reports_the_requests_statements(client, db, query_counter):
+    seeded = seed_workspace(db, 3)
+    headers = auth_headers(seeded["owner"])
+    with query_counter:
+        response = client.get(f"/api/workspaces/{seeded['workspace_id']}", headers=headers)
+    assert response.status_code == 200
+
+    timing = response.headers["server-timing"]
+    match = re.fullmatch(r'db;dur=([\d.]+);desc="(\d+) queries", app;dur=([\d.]+)', timing)
+    assert match, timing
+    db_ms, statements, app_ms = float(match[1]), int(match[2]), float(match[3])
+    assert statements == query_counter.count > 0
+    assert 0 <= db_ms <= app_ms
+
+
+def test_metrics_export_latency_statements_and_db_time_per_route(client, db, query_counter, admin_headers):
+    seeded = seed_workspace(db, 3)
+    headers = auth_headers(seeded["owner"])
+    before = _scrape(client, admin_headers)
+    with query_counter:
+        client.get(f"/api/workspaces/{seeded['workspace_id']}", headers=headers)
+        client.get(f"/api/workspaces/{seeded['workspace_id']}", headers=headers)
+    after = _scrape(client, admin_headers)
+
+    def delta(series):
+        return after[series] - before.get(series, 0)
+
+    assert delta(f"teamhub_http_requests_total{{{ROUTE},status=\"200\"}}") == 2
+    assert delta(f"teamhub_http_request_duration_seconds_count{{{ROUTE}}}") == 2
+    assert delta(f"teamhub_http_request_duration_seconds_sum{{{ROUTE}}}") > 0
+    assert delta(f"teamhub_db_statements_total{{{ROUTE}}}") == query_counter.count
+    assert delta(f"teamhub_db_statements_per_request_count{{{ROUTE}}}") == 2
+    assert delta(f"teamhub_db_statements_per_request_sum{{{ROUTE}}}") == query_counter.count
+    assert delta(f"teamhub_db_time_seconds_total{{{ROUTE}}}") > 0
+    assert after[f'teamhub_db_statements_per_request_bucket{{{ROUTE},le="+Inf"}}'] == (
+        after[f"teamhub_db_statements_per_request_count{{{ROUTE}}}"]
+    )
+
+    client.get("/api/no-such-route", headers=headers)
+    assert 'route="<unmatched>"' in client.get("/metrics", headers=admin_headers).text
+
+
+def test_metrics_are_only_served_to_admins(client, db, admin_headers):
+    seeded = seed_workspace(db, 1)
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers=auth_headers(seeded["owner"])).status_code == 403
+    assert client.get("/metrics", headers=admin_headers).status_code == 200
+
+
+def test_a_failed_statement_does_not_skew_later_timings(client):
+    stats = RequestStats()
+    token = _current_stats.set(stats)
+    try:
+        with engine.connect() as conn:
+            info = repr(conn.info)
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM no_such_table"))
+            conn.execute(text("SELECT 1"))
+            assert repr(conn.info) == info  # nothing left behind by the failure
+    finally:
+        _current_stats.reset(token)
+    assert stats.statements == 1
+    assert 0 < stats.db_time < 1
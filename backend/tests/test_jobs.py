@@ -0,0 +1,156 @@
+"""
+Background jobs: enqueued with the caller's transaction, retried with backoff.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core import jobs
+from app.core.config import get_settings
+from app.core.jobs import JOBS_PROCESSED, enqueue, prune_jobs, run_once, run_pending
+from app.models.job import Job, JobStatus
+
+calls = []
+
+
+@jobs.job("test_record")
+def _record(value):
+    calls.append(value)
+
+
+@jobs.job("test_explode")
+def _explode():
+    raise RuntimeError("boom")
+
+
+@pytest.fixture(autouse=True)
+def _reset_calls():
+    calls.clear()
+
+
+def _make_due(db):
+    db.query(Job).update({"run_at": datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+
+
+def test_job_runs_only_if_enqueuing_transaction_commits(db):
+    enqueue(db, "test_record", {"value": 1})
+    db.rollback()
+    assert run_pending() == 0
+
+    enqueue(db, "test_record", {"value": 2})
+    db.commit()
+    assert run_pending() == 1
+    assert calls == [2]
+    assert db.query(Job).one().status == JobStatus.DONE
+
+
+def test_idempotency_key_deduplicates(db):
+    for _ in range(3):
+        enqueue(db, "test_record", {"value": 1}, key="record:1")
+    db.commit()
+    enqueue(db, "test_record", {"value": 1}, key="record:1")
+    db.commit()
+
+    assert db.query(Job).count() == 1
+    assert run_pending() == 1
+    assert calls == [1]
+
+
+def test_failed_job_is_retried_with_backoff_then_given_up(db, monkeypatch):
+    monkeypatch.setattr(get_settings(), "JOBS_RETRY_BASE_SECONDS", 10.0)
+    failed_before = JOBS_PROCESSED.value(job="test_explode", outcome="failed")
+    enqueue(db, "test_explode", max_attempts=3)
+    db.commit()
+
+    assert run_once() is True
+    job = db.query(Job).one()
+    assert (job.status, job.attempts) == (JobStatus.PENDING, 1)
+    assert "boom" in job.last_error
+    assert run_once() is False  # not due again until the backoff has passed
+
+    for _ in range(2):
+        _make_due(db)
+        assert run_once() is True
+
+    db.expire_all()
+    job = db.query(Job).one()
+    assert (job.status, job.attempts) == (JobStatus.FAILED, 3)
+    assert job.finished_at is not None
+    assert run_pending() == 0
+    assert JOBS_PROCESSED.value(job="test_explode", outcome="failed") == failed_before + 1
+
+
+def test_stale_running_job_is_reclaimed(db, monkeypatch):
+    monkeypatch.setattr(get_settings(), "JOBS_LOCK_TIMEOUT_SECONDS", 60.0)
+    enqueue(db, "test_record", {"value": 7})
+    db.commit()
+    db.query(Job).update({
+        "status": JobStatus.RUNNING,
+        "locked_by": "dead-worker",
+        "locked_at": datetime.utcnow() - timedelta(minutes=5),
+        "attempts": 1,
+    })
+    db.commit()
+
+    assert run_pending() == 1
+    db.expire_all()
+    job = db.query(Job).one()
+    assert (job.status, job.attempts, job.locked_by) == (JobStatus.DONE, 2, None)
+    assert calls == [7]
+
+
+def test_stale_job_on_its_last_attempt_fails_instead_of_rerunning(db, monkeypatch):
+    monkeypatch.setattr(get_settings(), "JOBS_LOCK_TIMEOUT_SECONDS", 60.0)
+    enqueue(db, "test_record", {"value": 8}, max_attempts=2)
+    db.commit()
+    db.query(Job).update({
+        "status": JobStatus.RUNNING,
+        "locked_by": "dead-worker",
+        "locked_at": datetime.utcnow() - timedelta(minutes=5),
+        "attempts": 2,
+    })
+    db.commit()
+
+    assert run_pending() == 0
+    db.expire_all()
+    job = db.query(Job).one()
+    assert (job.status, job.attempts, job.locked_by) == (JobStatus.FAILED, 2, None)
+    assert job.finished_at is not None
+    assert calls == []
+
+
+def test_abandoned_periodic_job_is_scheduled_again(db, monkeypatch):
+    monkeypatch.setattr(get_settings(), "JOBS_LOCK_TIMEOUT_SECONDS", 60.0)
+    monkeypatch.setitem(jobs._periodic, "test_record", 3600)
+    enqueue(db, "test_record", {}, max_attempts=1)
+    db.commit()
+    db.query(Job).update({
+        "status": JobStatus.RUNNING,
+        "locked_by": "dead-worker",
+        "locked_at": datetime.utcnow() - timedelta(minutes=5),
+        "attempts": 1,
+    })
+    db.commit()
+
+    assert run_pending() == 0
+    db.expire_all()
+    statuses = [(job.status, job.attempts) for job in db.query(Job).order_by(Job.id)]
+    assert statuses == [(JobStatus.FAILED, 1), (JobStatus.PENDING, 0)]
+    next_run = db.query(Job).filter(Job.status == JobStatus.PENDING).one()
+    assert next_run.name == "test_record" and next_run.idempotency_key.startswith("test_record:")
+
+
+def test_prune_deletes_only_old_finished_jobs(db, monkeypatch):
+    monkeypatch.setattr(get_settings(), "JOBS_RETENTION_DAYS", 7)
+    old = datetime.utcnow() - timedelta(days=8)
+    for index, (status, finished_at) in enumerate([
+        (JobStatus.DONE, old), (JobStatus.FAILED, old), (JobStatus.DONE, datetime.utcnow()), (JobStatus.PENDING, None),
+    ]):
+        db.add(Job(
+            name="test_record", payload={"value": index}, status=status, run_at=old, finished_at=finished_at
+        ))
+    db.commit()
+
+    assert prune_jobs(batch_size=1) == 2
+    assert sorted(job.payload["value"] for job in db.query(Job)) == [2, 3]
@@ -0,0 +1,48 @@
+"""
+Content negotiation on the list endpoints: JSON, MessagePack and columnar rows.
+"""
+from datetime import datetime
+
+import msgpack
+
+from tests.utils import auth_headers, seed_workspace
+
+
+def _get(client, seeded, accept):
+    headers = {**auth_headers(seeded["owner"]), "Accept": accept}
+    return client.get("/api/tasks/", params={"project_id": seeded["project_id"]}, headers=headers)
+
+
+def test_json_is_the_default(client, db):
+    seeded = seed_workspace(db, 3)
+    response = _get(client, seeded, "text/html, */*;q=0.8")
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["vary"] == "Accept"
+    assert [t["title"] for t in response.json()] == ["Task 0", "Task 1", "Task 2"]
+
+
+def test_msgpack_matches_json(client, db):
+    seeded = seed_workspace(db, 3)
+    as_json = _get(client, seeded, "application/json").json()
+    response = _get(client, seeded, "application/json;q=0.5, application/msgpack")
+
+    assert response.headers["content-type"] == "application/msgpack"
+    items = msgpack.unpackb(response.content, timestamp=3)
+    assert isinstance(items[0]["created_at"], datetime)
+    assert [{**item, "created_at": None, "due_date": None} for item in items] == [
+        {**item, "created_at": None, "due_date": None} for item in as_json
+    ]
+
+
+def test_columnar_shape(client, db):
+    seeded = seed_workspace(db, 3)
+    as_json = _get(client, seeded, "application/json").json()
+
+    columnar = _get(client, seeded, "application/json; shape=columnar")
+    assert columnar.headers["content-type"] == "application/json; shape=columnar"
+    body = columnar.json()
+    assert [dict(zip(body["columns"], row)) for row in body["rows"]] == as_json
+
+    packed = _get(client, seeded, "application/msgpack; shape=columnar")
+    body = msgpack.unpackb(packed.content)
+    assert body["columns"][0] == "title" and len(body["rows"]) == 3
@@ -0,0 +1,83 @@
+"""
+"My tasks": the caller's open tasks across workspaces, by due date and priority, grouped by project.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects import sqlite
+
+from app.models.task import Task, TaskPriority, TaskStatus, is_open
+from app.models.workspace import WorkspaceMember
+from tests.utils import auth_headers, seed_workspace
+
+
+def _assign(db, seeded, specs):
+    """Give the owner the first tasks, each with (due in days or None, priority, status)."""
+    tasks = db.query(Task).filter(Task.workspace_id == seeded["workspace_id"]).order_by(Task.id).all()
+    db.query(Task).update({"assignee_id": None})
+    now = datetime.utcnow()
+    for task, (due_in, priority, task_status) in zip(tasks, specs):
+        task.assignee_id = seeded["owner"].id
+        task.due_date = now + timedelta(days=due_in) if due_in is not None else None
+        task.priority = priority
+        task.status = task_status
+    db.commit()
+    return [task.id for task in tasks[:len(specs)]]
+
+
+def test_my_tasks_are_sorted_grouped_and_paginated(client, db):
+    seeded = seed_workspace(db, 8)
+    headers = auth_headers(seeded["owner"])
+    undated, later_low, later_urgent, soon, closed, other_project = _assign(db, seeded, [
+        (None, TaskPriority.HIGH, TaskStatus.TODO),
+        (3, TaskPriority.LOW, TaskStatus.TODO),
+        (3, TaskPriority.URGENT, TaskStatus.REVIEW),
+        (1, TaskPriority.MEDIUM, TaskStatus.IN_PROGRESS),
+        (2, TaskPriority.HIGH, TaskStatus.DONE),
+        (2, TaskPriority.LOW, TaskStatus.TODO),
+    ])
+    project = client.post("/api/projects/", json={"workspace_id": seeded["workspace_id"], "name": "Side"}, headers=headers).json()
+    db.query(Task).filter(Task.id == other_project).update({"project_id": project["id"]})
+    db.commit()
+
+    response = client.get("/api/tasks/mine", headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["next_cursor"] is None
+    assert [(group["project_id"], [t["id"] for t in group["tasks"]]) for group in body["projects"]] == [
+        (seeded["project_id"], [soon, later_urgent, later_low, undated]),
+        (project["id"], [other_project]),
+    ]
+    assert body["projects"][1]["project_name"] == "Side"
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+        page = client.get("/api/tasks/mine", params=params, headers=headers).json()
+        pages.append([t["id"] for group in page["projects"] for t in group["tasks"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == [[soon, other_project], [later_urgent, later_low], [undated]]
+
+    bad = client.get("/api/tasks/mine", params={"cursor": "soon|x"}, headers=headers)
+    assert bad.status_code == 400
+
+
+def test_my_tasks_need_membership(client, db):
+    seeded = seed_workspace(db, 2)
+    headers = auth_headers(seeded["owner"])
+    _assign(db, seeded, [(1, TaskPriority.HIGH, TaskStatus.TODO)])
+    assert len(client.get("/api/tasks/mine", headers=headers).json()["projects"]) == 1
+
+    # Still assigned, but no longer a member of the workspace
+    db.query(WorkspaceMember).filter(WorkspaceMember.user_id == seeded["owner"].id).delete()
+    db.commit()
+    assert client.get("/api/tasks/mine", headers=headers).json()["projects"] == []
+
+
+def test_my_tasks_use_the_assignee_index(db):
+    query = select(Task.id).where(Task.assignee_id == 1, is_open()).order_by(Task.due_date.asc().nulls_last())
+    sql = str(query.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+    plan = " ".join(str(row[-1]) for row in db.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+    assert "ix_tasks_open_assignee_due_date" in plan, plan
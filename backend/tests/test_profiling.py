@@ -0,0 +1,134 @@
+"""
+On-demand profiling (admins only, one request at a time) and the slow-request log.
+"""
+import os
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.profiling import ProfilingMiddleware, SlowRequestLog, StackSampler
+from app.db.database import engine
+from app.models.user import User, UserRole
+from main import app
+from tests.utils import QueryCounter, auth_headers
+
+
+def _user(db, email, role):
+    user = User(email=email, password_hash="x", display_name=email.split("@")[0], role=role)
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    middleware = ProfilingMiddleware(app, enabled=True, output_dir=str(tmp_path))
+    with TestClient(middleware) as test_client:
+        yield middleware, test_client
+
+
+def test_only_admins_can_profile(profiler, db, tmp_path):
+    middleware, client = profiler
+    member = _user(db, "member@example.com", UserRole.MEMBER)
+    response = client.get("/api/auth/me", headers={**auth_headers(member), "X-Profile": "store"})
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert client.get("/api/auth/me", params={"_profile": "return"}, headers=auth_headers(member)).json()["id"] == member.id
+    assert client.get("/api/auth/me", headers={"X-Profile": "store"}).status_code == 401
+    assert os.listdir(tmp_path) == []
+
+
+def test_store_writes_stacks_and_allocations(profiler, db, tmp_path):
+    middleware, client = profiler
+    admin = _user(db, "admin@example.com", UserRole.ADMIN)
+    response = client.get("/api/auth/me", headers={**auth_headers(admin), "X-Profile": "store"})
+    assert response.status_code == 200
+    assert response.json()["id"] == admin.id
+
+    profile_id = response.headers["x-profile-id"]
+    assert sorted(os.listdir(tmp_path)) == [f"{profile_id}.alloc.txt", f"{profile_id}.folded"]
+    allocations = (tmp_path / f"{profile_id}.alloc.txt").read_text().splitlines()
+    assert allocations[0].startswith("# GET /api/auth/me ")
+    assert len(allocations) > 1 and "size=" in allocations[1]
+
+
+def test_return_replaces_the_body(profiler, db, tmp_path):
+    middleware, client = profiler
+    admin = _user(db, "admin@example.com", UserRole.ADMIN)
+    response = client.get("/api/auth/me", params={"_profile": "return"}, headers=auth_headers(admin))
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["method"], body["path"], body["status_code"]) == ("GET", "/api/auth/me", 200)
+    assert isinstance(body["folded"], str)
+    assert body["allocations"] and all("size=" in line for line in body["allocations"])
+    assert "x-profile-id" not in response.headers
+    assert os.listdir(tmp_path) == []
+
+
+def test_one_profile_at_a_time(profiler, db):
+    middleware, client = profiler
+    admin = _user(db, "admin@example.com", UserRole.ADMIN)
+    headers = {**auth_headers(admin), "X-Profile": "store"}
+    with middleware._lock:
+        assert client.get("/api/auth/me", headers=headers).status_code == 409
+        # Requests that do not ask for a profile are unaffected
+        assert client.get("/api/auth/me", headers=auth_headers(admin)).status_code == 200
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+
+def test_admin_check_reuses_the_cached_principal(profiler, db):
+    middleware, client = profiler
+    admin = _user(db, "admin@example.com", UserRole.ADMIN)
+    headers = auth_headers(admin)
+    client.get("/api/auth/me", headers=headers)
+    with QueryCounter(engine) as counter:
+        response = client.get("/api/auth/me", params={"_profile": "return"}, headers=headers)
+    assert response.json()["status_code"] == 200
+    assert counter.count == 0
+
+
+def test_sampler_collapses_stacks():
+    stop = threading.Event()
+
+    def busy_worker():
+        while not stop.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=busy_worker)
+    worker.start()
+    sampler = StackSampler(0.001)
+    sampler.start()
+    time.sleep(0.05)
+    sampler.stop()
+    stop.set()
+    worker.join()
+
+    lines = sampler.folded().splitlines()
+    stack, count = next(line for line in lines if "busy_worker" in line).rsplit(" ", 1)
+    assert int(count) > 0
+    assert stack.split(";")[-1].startswith("busy_worker (test_profiling.py:")
+
+
+def test_slow_request_log_keeps_the_slowest_per_route():
+    log = SlowRequestLog(size=2)
+    for route, duration in (("GET /a", 0.1), ("GET /a", 0.3), ("GET /b", 0.5), ("GET /a", 0.2), ("GET /a", 0.05)):
+        log.record(route, duration, {"duration": duration})
+    assert log.snapshot() == {
+        "GET /a": [{"duration": 0.3}, {"duration": 0.2}],
+        "GET /b": [{"duration": 0.5}],
+    }
+    assert SlowRequestLog(size=0).snapshot() == {}
+
+
+def test_slow_requests_endpoint_is_admin_only(client, db):
+    admin = _user(db, "admin@example.com", UserRole.ADMIN)
+    member = _user(db, "member@example.com", UserRole.MEMBER)
+    client.get("/api/tasks/42", headers=auth_headers(member))
+
+    assert client.get("/api/admin/slow-requests", headers=auth_headers(member)).status_code == 403
+    response = client.get("/api/admin/slow-requests", headers=auth_headers(admin))
+    assert response.status_code == 200
+    entries = response.json()["GET /api/tasks/{task_id}"]
+    assert any(entry["path"] == "/api/tasks/42" and entry["status"] == 404 for entry in entries)
@@ -0,0 +1,82 @@
+"""
+Query budgets: the number of SQL statements an endpoint issues must not grow
+with the number of rows it returns, and must stay within a fixed ceiling.
+"""
+from collections import Counter
+
+import pytest
+
+from app.core.cache import get_cache
+from app.db.database import Base, engine
+from app.models.task import Task
+from tests.utils import auth_headers, seed_workspace
+
+SMALL = 3
+LARGE = 15
+
+# name -> (path template, max statements per request)
+ENDPOINTS = {
+    "workspace_list": ("/api/workspaces/", 4),
+    "workspace_detail": ("/api/workspaces/{workspace_id}", 4),
+    "workspace_members": ("/api/workspaces/{workspace_id}/members", 4),
+    "project_list": ("/api/projects/?workspace_id={workspace_id}", 4),
+    "project_board": ("/api/projects/{project_id}/board", 6),
+    "project_flow": ("/api/projects/{project_id}/analytics/cumulative-flow", 5),
+    "task_list": ("/api/tasks/?project_id={project_id}", 6),
+    "task_list_all": ("/api/tasks/", 5),
+    "task_detail": ("/api/tasks/{task_id}", 6),
+    "task_mine": ("/api/tasks/mine", 2),
+    "comment_list": ("/api/comments/?task_id={task_id}", 7),
+    "document_list": ("/api/documents/?project_id={project_id}", 6),
+    "dashboard_stats": ("/api/dashboard/stats", 7),
+    "workspace_stats": ("/api/dashboard/workspace/{workspace_id}/stats", 7),
+}
+
+
+def _statements_for(client, db, query_counter, path_template, size):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    get_cache().flush()
+    seeded = seed_workspace(db, size)
+    headers = auth_headers(seeded["owner"])
+    path = path_template.format(**seeded)
+    db.expunge_all()
+
+    with query_counter:
+        response = client.get(path, headers=headers)
+    assert response.status_code == 200, response.text
+    return query_counter.count
+
+
+@pytest.mark.parametrize("name", sorted(ENDPOINTS))
+def test_query_count_is_constant_in_row_count(name, client, db, query_counter):
+    path_template, budget = ENDPOINTS[name]
+
+    small = _statements_for(client, db, query_counter, path_template, SMALL)
+    large = _statements_for(client, db, query_counter, path_template, LARGE)
+
+    assert small == large, (
+        f"{name}: {small} statements for {SMALL} rows but {large} for {LARGE} rows (N+1?)"
+    )
+    assert large <= budget, f"{name}: {large} statements exceeds budget of {budget}"
+
+
+def test_dashboard_counts_tasks_without_loading_them(client, db, query_counter):
+    seeded = seed_workspace(db, LARGE)
+    headers = auth_headers(seeded["owner"])
+    tasks = db.query(Task).filter(Task.workspace_id == seeded["workspace_id"]).all()
+    expected_status = Counter(task.status.value for task in tasks)
+    expected_priority = Counter(task.priority.value for task in tasks)
+    mine = sum(task.assignee_id == seeded["owner"].id for task in tasks)
+
+    with query_counter:
+        dashboard = client.get("/api/dashboard/stats", headers=headers).json()
+        workspace = client.get(f"/api/dashboard/workspace/{seeded['workspace_id']}/stats", headers=headers).json()
+
+    assert not [s for s in query_counter.statements if s.startswith("SELECT tasks.id")]
+    assert (dashboard["total_tasks"], dashboard["my_tasks"]) == (len(tasks), mine)
+    for stats in (dashboard["task_stats"], workspace["task_stats"]):
+        assert stats["total"] == len(tasks)
+        assert {name: stats[name] for name in expected_status} == expected_status
+    assert workspace["priority_stats"] == {name: expected_priority[name] for name in ("low", "medium", "high", "urgent")}
+    assert dashboard["workspaces"][0]["priority_stats"] == workspace["priority_stats"]
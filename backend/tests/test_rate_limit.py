@@ -0,0 +1,144 @@
+"""
+Admission control: per-client token buckets (429) and the in-flight cap with its bounded queue (503).
+"""
+import asyncio
+
+import pytest
+from starlette.responses import JSONResponse
+
+from app.core.rate_limit import (
+    AUTH, HEAVY_READ, READ, REQUESTS_REJECTED, WRITE,
+    AdmissionControlMiddleware, InMemoryRateLimitStore, RouteLimit, classify_request,
+)
+
+
+def _scope(path="/api/tasks/", method="GET", query=b"", client="10.0.0.1"):
+    return {
+        "type": "http", "path": path, "method": method, "query_string": query,
+        "headers": [], "client": (client, 1234),
+    }
+
+
+async def _ok(scope, receive, send):
+    await JSONResponse({"ok": True})(scope, receive, send)
+
+
+async def _call(app, scope):
+    """Run one request through ``app``; returns (status, headers)."""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start = messages[0]
+    return start["status"], {name.decode(): value.decode() for name, value in start["headers"]}
+
+
+def _limits(capacity, refill_per_second):
+    return {name: RouteLimit(capacity, refill_per_second) for name in (AUTH, HEAVY_READ, WRITE, READ)}
+
+
+@pytest.mark.parametrize("method,path,query,expected", [
+    ("POST", "/api/auth/login", b"", AUTH),
+    ("GET", "/api/auth/me", b"", READ),
+    ("PATCH", "/api/tasks/1", b"", WRITE),
+    ("GET", "/api/dashboard/stats", b"", HEAVY_READ),
+    ("GET", "/api/tasks/", b"", HEAVY_READ),
+    ("GET", "/api/tasks/", b"project_id=1", READ),
+    ("GET", "/api/tasks/export", b"", HEAVY_READ),
+    ("GET", "/api/projects", b"", HEAVY_READ),
+    ("GET", "/api/projects", b"workspace_id=1", READ),
+    ("GET", "/api/tasks/7", b"", READ),
+])
+def test_classify_request(method, path, query, expected):
+    assert classify_request(_scope(path, method, query)) == expected
+
+
+def test_rate_limited_requests_get_429_with_retry_after():
+    app = AdmissionControlMiddleware(
+        _ok, store=InMemoryRateLimitStore(), limits=_limits(2, 0.1), max_in_flight=0, rate_limit_enabled=True
+    )
+    before = REQUESTS_REJECTED.value(reason="rate_limited", route_class=HEAVY_READ)
+
+    async def scenario():
+        statuses = [await _call(app, _scope()) for _ in range(3)]
+        other_client = await _call(app, _scope(client="10.0.0.2"))
+        exempt = await _call(app, _scope("/health"))
+        return statuses, other_client, exempt
+
+    statuses, other_client, exempt = asyncio.run(scenario())
+    assert [status for status, _ in statuses] == [200, 200, 429]
+    assert statuses[2][1]["retry-after"] == "10"
+    assert other_client[0] == 200
+    assert exempt[0] == 200
+    assert REQUESTS_REJECTED.value(reason="rate_limited", route_class=HEAVY_READ) == before + 1
+
+
+def test_full_queue_is_rejected_at_once():
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def slow(scope, receive, send):
+            await gate.wait()
+            await _ok(scope, receive, send)
+
+        app = AdmissionControlMiddleware(slow, max_in_flight=1, queue_timeout=5, rate_limit_enabled=False)
+        running = asyncio.ensure_future(_call(app, _scope()))
+        queued = asyncio.ensure_future(_call(app, _scope()))
+        await asyncio.sleep(0.01)
+        rejected = await _call(app, _scope(method="POST"))
+        gate.set()
+        return await running, await queued, rejected
+
+    before = REQUESTS_REJECTED.value(reason="queue_full", route_class=WRITE)
+    running, queued, rejected = asyncio.run(scenario())
+    assert (running[0], queued[0]) == (200, 200)
+    assert rejected[0] == 503
+    assert rejected[1]["retry-after"] == "1"
+    assert REQUESTS_REJECTED.value(reason="queue_full", route_class=WRITE) == before + 1
+
+
+def test_queued_request_times_out_with_503():
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def slow(scope, receive, send):
+            await gate.wait()
+            await _ok(scope, receive, send)
+
+        app = AdmissionControlMiddleware(slow, max_in_flight=1, queue_timeout=0.05, rate_limit_enabled=False)
+        running = asyncio.ensure_future(_call(app, _scope()))
+        await asyncio.sleep(0.01)
+        timed_out = await _call(app, _scope())
+        gate.set()
+        await running
+        admitted = await _call(app, _scope())
+        return timed_out, admitted
+
+    before = REQUESTS_REJECTED.value(reason="queue_timeout", route_class=HEAVY_READ)
+    timed_out, admitted = asyncio.run(scenario())
+    assert timed_out[0] == 503
+    assert admitted[0] == 200
+    assert REQUESTS_REJECTED.value(reason="queue_timeout", route_class=HEAVY_READ) == before + 1
+
+
+def test_in_memory_buckets_are_bounded():
+    store = InMemoryRateLimitStore(max_keys=3)
+    limit = RouteLimit(1, 0.01)
+
+    async def scenario():
+        for key in ("a", "b", "c"):
+            await store.take(key, limit)
+        await store.take("a", limit)  # refreshes "a", so "b" is now the oldest
+        for n in range(100):
+            await store.take(f"rotating:{n % 2}:{n}", limit)
+        return await store.take("a", limit)
+
+    wait = asyncio.run(scenario())
+    assert len(store) == 3
+    # "a" was evicted by the rotating keys, so it starts again with a full bucket
+    assert wait == 0
@@ -0,0 +1,49 @@
+"""
+Read sessions: connections are taken per statement and handed straight back.
+"""
+from fastapi.routing import APIRoute
+from sqlalchemy import create_engine
+
+from app.db.database import ReadSessionLocal, _read_only, engine, get_db
+from app.models.task import Task
+from main import app
+from tests.utils import seed_workspace
+
+
+def _dependencies(dependant):
+    for sub in dependant.dependencies:
+        yield sub.call
+        yield from _dependencies(sub)
+
+
+def test_read_session_returns_connection_after_each_query(db):
+    seeded = seed_workspace(db, 2)
+    read_db = ReadSessionLocal()
+    try:
+        assert engine.pool.checkedout() == 0
+        task = read_db.query(Task).filter(Task.id == seeded["task_id"]).first()
+        assert engine.pool.checkedout() == 0
+        assert not read_db.in_transaction()
+        # Objects stay usable, and the next query takes a connection again and returns it
+        assert task.title == "Task 0"
+        assert read_db.query(Task).count() == 2
+        assert engine.pool.checkedout() == 0
+    finally:
+        read_db.close()
+
+
+def test_get_handlers_never_open_a_read_write_session():
+    offenders = [
+        route.path for route in app.routes
+        if isinstance(route, APIRoute) and "GET" in route.methods
+        and get_db in _dependencies(route.dependant)
+    ]
+    assert offenders == []
+
+
+def test_postgres_read_transactions_are_read_only_and_deferrable():
+    postgres = create_engine("postgresql+psycopg://user@localhost/teamhub")
+    options = _read_only(postgres).get_execution_options()
+    assert options["postgresql_readonly"] is True
+    assert options["postgresql_deferrable"] is True
+    assert _read_only(postgres) is _read_only(postgres)
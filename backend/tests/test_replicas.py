@@ -0,0 +1,63 @@
+"""
+Read-replica routing with a second SQLite file as the replica. The replica
+is never written to, so a read that reaches it sees an empty database.
+"""
+import pytest
+from sqlalchemy import create_engine
+
+from app.core.config import get_settings
+from app.db.database import Base, get_replica_set
+from app.db.replicas import PRIMARY_COOKIE
+from tests.utils import auth_headers, seed_workspace
+
+
+def _use_replicas(urls: str) -> None:
+    get_replica_set().dispose()
+    get_settings().DATABASE_REPLICA_URLS = urls
+    get_replica_set.cache_clear()
+
+
+@pytest.fixture
+def replica(tmp_path):
+    url = f"sqlite:///{tmp_path}/replica.db"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    _use_replicas(url)
+    yield url
+    _use_replicas("")
+
+
+def test_reads_go_to_replica_unless_pinned_to_primary(replica, client, db):
+    headers = auth_headers(seed_workspace(db, 1)["owner"])
+
+    # The user only exists on the primary
+    assert client.get("/api/workspaces/", headers=headers).status_code == 401
+    pinned = client.get("/api/workspaces/", headers={**headers, "X-Read-Primary": "1"})
+    assert pinned.status_code == 200
+    assert [w["name"] for w in pinned.json()] == ["Workspace"]
+
+
+def test_write_keeps_client_on_primary(replica, client, db):
+    headers = auth_headers(seed_workspace(db, 1)["owner"])
+
+    response = client.post("/api/workspaces/", json={"name": "Fresh"}, headers=headers)
+    assert response.status_code == 201
+    assert PRIMARY_COOKIE in response.cookies
+
+    names = [w["name"] for w in client.get("/api/workspaces/", headers=headers).json()]
+    assert sorted(names) == ["Fresh", "Workspace"]
+
+    client.cookies.clear()
+    assert client.get("/api/workspaces/", headers=headers).json() == []
+
+
+def test_unreachable_replica_falls_back_to_primary(tmp_path, client, db):
+    _use_replicas(f"sqlite:///{tmp_path}/missing/replica.db")
+    try:
+        headers = auth_headers(seed_workspace(db, 1)["owner"])
+        response = client.get("/api/workspaces/", headers=headers)
+        assert response.status_code == 200
+        assert [w["name"] for w in response.json()] == ["Workspace"]
+    finally:
+        _use_replicas("")
@@ -0,0 +1,41 @@
+"""
+Startup must be cheap and side-effect free: importing the app may not touch
+the database, and the lifespan reports ready only after warming up.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from main import app
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+IMPORT_BUDGET_SECONDS = 3.0
+
+
+def test_import_does_not_touch_database_and_fits_budget(tmp_path):
+    db_file = tmp_path / "never-created.db"
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_file}", SECRET_KEY="x")
+    code = (
+        "import time; started = time.perf_counter(); import main; "
+        "print(time.perf_counter() - started)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    )
+    elapsed = float(result.stdout.strip().splitlines()[-1])
+
+    assert not db_file.exists(), "importing main connected to the database"
+    assert elapsed < IMPORT_BUDGET_SECONDS, f"import took {elapsed:.2f}s"
+
+
+def test_ready_only_after_lifespan_startup():
+    app.state.ready = False
+    client = TestClient(app)
+    assert client.get("/ready").status_code == 503
+
+    with TestClient(app) as started:
+        assert started.get("/ready").json() == {"status": "ready"}
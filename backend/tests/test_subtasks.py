@@ -0,0 +1,172 @@
+"""
+Subtasks: the closure table, incrementally maintained progress rollups, and cycle prevention.
+"""
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from app.api.routes import tasks as tasks_routes
+from app.db.counters import adjust_task_count, repair
+from app.db.database import SessionLocal
+from app.db.partitioning import partitioned_metadata
+from app.db.subtasks import add_to_tree, lock_task_tree
+from app.models.task import Task, TaskClosure
+from tests.utils import auth_headers, seed_workspace
+
+
+def _tree(client, headers, project_id):
+    """root -> (a -> b), c"""
+    def create(title, parent_id=None):
+        payload = {"project_id": project_id, "title": title, "parent_id": parent_id}
+        response = client.post("/api/tasks/", json=payload, headers=headers)
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+
+    root = create("Epic")
+    a = create("A", root)
+    b = create("B", a)
+    c = create("C", root)
+    return root, a, b, c
+
+
+def _progress(client, headers, task_id):
+    task = client.get(f"/api/tasks/{task_id}", headers=headers).json()
+    return task["subtasks_done"], task["subtask_count"]
+
+
+def test_subtree_and_ancestors_are_single_reads(client, db):
+    seeded = seed_workspace(db, 1)
+    headers = auth_headers(seeded["owner"])
+    root, a, b, c = _tree(client, headers, seeded["project_id"])
+
+    subtasks = client.get(f"/api/tasks/{root}/subtasks", headers=headers).json()
+    assert [(t["id"], t["depth"], t["parent_id"]) for t in subtasks] == [(a, 1, root), (c, 1, root), (b, 2, a)]
+    shallow = client.get(f"/api/tasks/{root}/subtasks", params={"max_depth": 1}, headers=headers).json()
+    assert [t["id"] for t in shallow] == [a, c]
+    ancestors = client.get(f"/api/tasks/{b}/ancestors", headers=headers).json()
+    assert [(t["id"], t["depth"]) for t in ancestors] == [(root, 2), (a, 1)]
+    assert client.get(f"/api/tasks/{c}/subtasks", headers=headers).json() == []
+    assert client.get("/api/tasks/999/subtasks", headers=headers).status_code == 404
+
+
+def test_progress_follows_status_changes(client, db):
+    seeded = seed_workspace(db, 1)
+    headers = auth_headers(seeded["owner"])
+    root, a, b, c = _tree(client, headers, seeded["project_id"])
+    assert _progress(client, headers, root) == (0, 3)
+
+    client.patch(f"/api/tasks/{b}", json={"status": "done"}, headers=headers)
+    client.patch(f"/api/tasks/{c}/position", json={"status": "done", "position": 1}, headers=headers)
+    assert _progress(client, headers, root) == (2, 3)
+    assert _progress(client, headers, a) == (1, 1)
+
+    client.patch(f"/api/tasks/{b}", json={"status": "review", "title": "B again"}, headers=headers)
+    assert _progress(client, headers, root) == (1, 3)
+    assert _progress(client, headers, a) == (0, 1)
+
+    board = client.get(f"/api/projects/{seeded['project_id']}/board", headers=headers).json()
+    cards = {card["id"]: card for column in board["columns"].values() for card in column["tasks"]}
+    assert (cards[root]["subtasks_done"], cards[root]["subtask_count"]) == (1, 3)
+    assert cards[b]["parent_id"] == a
+
+
+def test_reparenting_moves_the_subtree_and_rejects_cycles(client, db):
+    seeded = seed_workspace(db, 1)
+    headers = auth_headers(seeded["owner"])
+    repair(db)  # the seeder leaves counters at zero
+    root, a, b, c = _tree(client, headers, seeded["project_id"])
+    client.patch(f"/api/tasks/{b}", json={"status": "done"}, headers=headers)
+
+    for task_id, parent_id in ((root, b), (a, a), (a, b)):
+        response = client.patch(f"/api/tasks/{task_id}", json={"parent_id": parent_id}, headers=headers)
+        assert response.status_code == 400
+    other = client.post("/api/projects/", json={"workspace_id": seeded["workspace_id"], "name": "Other"}, headers=headers)
+    elsewhere = client.post("/api/tasks/", json={"project_id": other.json()["id"], "title": "X"}, headers=headers).json()
+    assert client.patch(f"/api/tasks/{a}", json={"parent_id": elsewhere["id"]}, headers=headers).status_code == 400
+    assert client.post("/api/tasks/", json={
+        "project_id": seeded["project_id"], "title": "Y", "parent_id": elsewhere["id"]
+    }, headers=headers).status_code == 400
+
+    # A (with B) under C: root now sees B two levels further down
+    moved = client.patch(f"/api/tasks/{a}", json={"parent_id": c}, headers=headers).json()
+    assert (moved["parent_id"], moved["subtasks_done"], moved["subtask_count"]) == (c, 1, 1)
+    assert _progress(client, headers, c) == (1, 2)
+    assert _progress(client, headers, root) == (1, 3)
+    ancestors = client.get(f"/api/tasks/{b}/ancestors", headers=headers).json()
+    assert [(t["id"], t["depth"]) for t in ancestors] == [(root, 3), (c, 2), (a, 1)]
+
+    # ...and out to the top level
+    client.patch(f"/api/tasks/{a}", json={"parent_id": None}, headers=headers)
+    assert _progress(client, headers, root) == (0, 1)
+    assert [t["id"] for t in client.get(f"/api/tasks/{b}/ancestors", headers=headers).json()] == [a]
+    assert repair(db) == 0
+
+
+def test_deleting_a_task_promotes_its_subtasks(client, db):
+    seeded = seed_workspace(db, 1)
+    headers = auth_headers(seeded["owner"])
+    repair(db)
+    root, a, b, c = _tree(client, headers, seeded["project_id"])
+    client.patch(f"/api/tasks/{a}", json={"status": "done"}, headers=headers)
+
+    assert client.delete(f"/api/tasks/{a}", headers=headers).status_code == 204
+    assert client.get(f"/api/tasks/{b}", headers=headers).json()["parent_id"] == root
+    assert [(t["id"], t["depth"]) for t in client.get(f"/api/tasks/{root}/subtasks", headers=headers).json()] == [
+        (b, 1), (c, 1)
+    ]
+    assert _progress(client, headers, root) == (0, 2)
+    assert db.query(TaskClosure).filter((TaskClosure.ancestor_id == a) | (TaskClosure.descendant_id == a)).count() == 0
+
+    db.query(Task).filter(Task.id == root).update({"subtask_count": 7})
+    db.commit()
+    assert repair(db) == 1
+    assert _progress(client, headers, root) == (0, 2)
+
+
+def test_partitioned_closure_references_tasks_with_workspace_id():
+    dialect = postgresql.dialect()
+    metadata = partitioned_metadata(4)
+    closure = str(CreateTable(metadata.tables["task_closure"]).compile(dialect=dialect))
+    assert "FOREIGN KEY(ancestor_id, workspace_id) REFERENCES tasks (id, workspace_id) ON DELETE CASCADE" in closure
+    tasks = str(CreateTable(metadata.tables["tasks"]).compile(dialect=dialect))
+    assert "FOREIGN KEY(parent_id, workspace_id) REFERENCES tasks (id, workspace_id)" in tasks
+
+
+def test_move_reads_the_task_after_taking_the_tree_lock(client, db, monkeypatch):
+    seeded = seed_workspace(db, 1)
+    headers = auth_headers(seeded["owner"])
+    repair(db)
+    root, a, b, c = _tree(client, headers, seeded["project_id"])
+    locked = []
+
+    def lock_while_a_subtask_is_added(db, task_id):
+        # A concurrent request adds a subtask under B and commits while this move waits for the lock
+        if not locked:
+            other = SessionLocal()
+            try:
+                parent = other.get(Task, b)
+                subtask = Task(
+                    workspace_id=parent.workspace_id, project_id=parent.project_id, title="D",
+                    created_by=parent.created_by, parent_id=b
+                )
+                other.add(subtask)
+                other.flush()
+                add_to_tree(other, subtask)
+                adjust_task_count(other, parent.project_id, 1)
+                other.commit()
+                locked.append(subtask.id)
+            finally:
+                other.close()
+        lock_task_tree(db, task_id)
+
+    monkeypatch.setattr(tasks_routes, "lock_task_tree", lock_while_a_subtask_is_added)
+    moved = client.patch(f"/api/tasks/{b}", json={"parent_id": c}, headers=headers).json()
+    d = locked[0]
+
+    # B moved with the subtask it gained while waiting
+    assert (moved["parent_id"], moved["subtask_count"]) == (c, 1)
+    ancestors = client.get(f"/api/tasks/{d}/ancestors", headers=headers).json()
+    assert [t["id"] for t in ancestors] == [root, c, b]
+    assert _progress(client, headers, c) == (0, 2)
+    assert _progress(client, headers, a) == (0, 0)
+    assert _progress(client, headers, root) == (0, 4)
+    assert repair(db) == 0
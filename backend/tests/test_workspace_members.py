@@ -0,0 +1,88 @@
+"""
+Paginated member listing and bulk membership changes.
+"""
+from app.models.user import User
+from app.models.workspace import WorkspaceMember
+from tests.utils import auth_headers, seed_workspace
+
+
+def _new_users(db, count):
+    users = [
+        User(email=f"new{i}@example.com", password_hash="x", display_name=f"New {i}")
+        for i in range(count)
+    ]
+    db.add_all(users)
+    db.commit()
+    return users
+
+
+def test_members_are_paginated_with_a_cursor(client, db):
+    seeded = seed_workspace(db, 5)  # owner + 5 members
+    headers = auth_headers(seeded["owner"])
+    path = f"/api/workspaces/{seeded['workspace_id']}/members"
+
+    first = client.get(path, params={"limit": 4}, headers=headers).json()
+    second = client.get(path, params={"limit": 4, "cursor": first["next_cursor"]}, headers=headers).json()
+
+    assert len(first["items"]) == 4 and first["next_cursor"] == first["items"][-1]["id"]
+    assert len(second["items"]) == 2 and second["next_cursor"] is None
+    names = [m["user_display_name"] for m in first["items"] + second["items"]]
+    assert names == ["Owner"] + [f"User {i}" for i in range(5)]
+
+    detail = client.get(f"/api/workspaces/{seeded['workspace_id']}", headers=headers).json()
+    assert detail["member_count"] == 6
+    assert "members" not in detail
+
+
+def test_bulk_add_and_remove(client, db):
+    seeded = seed_workspace(db, 2)
+    headers = auth_headers(seeded["owner"])
+    workspace_id = seeded["workspace_id"]
+    newcomers = _new_users(db, 3)
+    existing_member = db.query(WorkspaceMember.user_id).filter(
+        WorkspaceMember.workspace_id == workspace_id, WorkspaceMember.user_id != seeded["owner"].id
+    ).first()[0]
+
+    # The newcomer has no access yet (and the denial must not be cached)
+    newcomer_headers = auth_headers(newcomers[0])
+    assert client.get(f"/api/workspaces/{workspace_id}", headers=newcomer_headers).status_code == 403
+
+    response = client.post(f"/api/workspaces/{workspace_id}/members/bulk", json={
+        "add": [{"user_id": u.id, "role": "viewer"} for u in newcomers]
+               + [{"user_id": existing_member}, {"user_id": 9999}],
+        "remove": [existing_member, seeded["owner"].id],
+    }, headers=headers)
+    assert response.status_code == 200, response.text
+    result = response.json()
+
+    assert sorted(m["user_id"] for m in result["added"]) == [u.id for u in newcomers]
+    assert {m["role"] for m in result["added"]} == {"viewer"}
+    assert result["already_members"] == [existing_member]
+    assert result["unknown_users"] == [9999]
+    assert result["removed"] == [existing_member]  # the owner is never removed
+
+    assert client.get(f"/api/workspaces/{workspace_id}", headers=newcomer_headers).status_code == 200
+    detail = client.get(f"/api/workspaces/{workspace_id}", headers=headers).json()
+    assert detail["member_count"] == 1 + 2 - 1 + 3
+
+
+def test_bulk_requires_admin(client, db):
+    seeded = seed_workspace(db, 1)
+    member = db.query(User).filter(User.email == "user0@example.com").one()
+    response = client.post(
+        f"/api/workspaces/{seeded['workspace_id']}/members/bulk",
+        json={"remove": [seeded["owner"].id]},
+        headers=auth_headers(member),
+    )
+    assert response.status_code == 403
+
+
+def test_adding_an_existing_member_is_rejected(client, db):
+    seeded = seed_workspace(db, 1)
+    member = db.query(User).filter(User.email == "user0@example.com").one()
+    response = client.post(
+        f"/api/workspaces/{seeded['workspace_id']}/members",
+        json={"user_id": member.id},
+        headers=auth_headers(seeded["owner"]),
+    )
+    assert response.status_code == 400
@@ -0,0 +1,55 @@
+"""
+Write budgets: statements a write issues once the principal and permission
+caches are warm. Server-generated columns come back with RETURNING and
+objects stay loaded after commit, so no write re-reads what it just wrote.
+Creates also bump the parent's counter column (one relative UPDATE),
+task, comment and document writes append an activity event (one INSERT),
+and task status changes append to the status history (one INSERT) after
+locking the project's subtask tree (one SELECT ... FOR UPDATE).
+"""
+import pytest
+
+from tests.utils import auth_headers, seed_workspace
+
+# name -> (method, path template, json body, max statements per request)
+WRITES = {
+    "workspace_create": ("POST", "/api/workspaces/", {"name": "New"}, 2),
+    "workspace_update": ("PATCH", "/api/workspaces/{workspace_id}", {"name": "Renamed"}, 2),
+    "project_create": ("POST", "/api/projects/", {"workspace_id": "{workspace_id}", "name": "New"}, 2),
+    "project_update": ("PATCH", "/api/projects/{project_id}", {"name": "Renamed"}, 2),
+    "task_create": ("POST", "/api/tasks/", {"project_id": "{project_id}", "title": "New"}, 4),
+    "task_update": ("PATCH", "/api/tasks/{task_id}", {"title": "Renamed", "priority": "high"}, 3),
+    "task_reassign": ("PATCH", "/api/tasks/{task_id}", {"assignee_id": "{owner_id}"}, 4),
+    "task_move": ("PATCH", "/api/tasks/{task_id}/position", {"status": "done", "position": 3}, 5),
+    "comment_create": ("POST", "/api/comments/", {"task_id": "{task_id}", "content": "Hi"}, 3),
+    "document_create": ("POST", "/api/documents/", {"project_id": "{project_id}", "title": "Spec"}, 2),
+}
+
+
+def _fill(value, seeded):
+    if isinstance(value, dict):
+        return {key: _fill(item, seeded) for key, item in value.items()}
+    if isinstance(value, str) and value.startswith("{"):
+        return seeded[value.strip("{}")]
+    return value
+
+
+@pytest.mark.parametrize("name", sorted(WRITES))
+def test_write_stays_within_budget(name, client, db, query_counter):
+    method, path_template, body, budget = WRITES[name]
+    seeded = seed_workspace(db, 3)
+    seeded["owner_id"] = seeded["owner"].id
+    headers = auth_headers(seeded["owner"])
+    # Warm the principal and permission caches
+    assert client.get(f"/api/tasks/{seeded['task_id']}", headers=headers).status_code == 200
+    db.expunge_all()
+
+    with query_counter:
+        response = client.request(
+            method, path_template.format(**seeded), json=_fill(body, seeded), headers=headers
+        )
+    assert response.status_code < 300, response.text
+    assert query_counter.count <= budget, (
+        f"{name}: {query_counter.count} statements exceeds budget of {budget}:\n"
+        + "\n".join(query_counter.statements)
+    )
@@ -0,0 +1,114 @@
+"""
+Helpers for the query-budget tests: statement counting and data seeding.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.security import create_access_token, get_password_hash
+from app.models.comment import Comment
+from app.models.document import Document
+from app.models.project import Project
+from app.models.task import Task, TaskPriority, TaskStatus
+from app.models.user import User
+from app.models.workspace import MemberRole, Workspace, WorkspaceMember
+
+# bcrypt is deliberately slow; hash once and reuse for every seeded user.
+_PASSWORD_HASH = get_password_hash("password")
+
+
+class QueryCounter:
+    """Counts SQL statements executed on ``engine`` inside ``with counter:``."""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.statements: List[str] = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __enter__(self):
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+
+def auth_headers(user: User) -> Dict[str, str]:
+    token = create_access_token(data={"sub": str(user.id)})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def seed_workspace(db: Session, size: int) -> Dict[str, object]:
+    """
+    Seed one workspace whose row counts all scale with ``size``.
+
+    Every member, assignee, commenter and document author is a distinct user
+    so per-row relationship loads cannot be served from the identity map.
+    """
+    owner = User(email="owner@example.com", password_hash=_PASSWORD_HASH, display_name="Owner")
+    db.add(owner)
+    db.flush()
+
+    workspace = Workspace(name="Workspace", owner_id=owner.id)
+    db.add(workspace)
+    db.flush()
+    db.add(WorkspaceMember(workspace_id=workspace.id, user_id=owner.id, role=MemberRole.ADMIN))
+
+    users = []
+    for i in range(size):
+        user = User(email=f"user{i}@example.com", password_hash=_PASSWORD_HASH, display_name=f"User {i}")
+        db.add(user)
+        users.append(user)
+    db.flush()
+    for user in users:
+        db.add(WorkspaceMember(workspace_id=workspace.id, user_id=user.id, role=MemberRole.MEMBER))
+
+    projects = [Project(workspace_id=workspace.id, name=f"Project {i}") for i in range(max(1, size // 4))]
+    db.add_all(projects)
+    db.flush()
+    project = projects[0]
+
+    statuses = list(TaskStatus)
+    priorities = list(TaskPriority)
+    now = datetime.utcnow()
+    tasks = []
+    for i, user in enumerate(users):
+        task = Task(
+            workspace_id=workspace.id,
+            project_id=project.id,
+            title=f"Task {i}",
+            status=statuses[i % len(statuses)],
+            priority=priorities[i % len(priorities)],
+            assignee_id=user.id,
+            created_by=users[-1 - i].id,
+            due_date=now + timedelta(days=i - size // 2),
+            position=i,
+        )
+        db.add(task)
+        tasks.append(task)
+    db.flush()
+
+    task = tasks[0]
+    for i, user in enumerate(users):
+        db.add(Comment(workspace_id=workspace.id, task_id=task.id, user_id=user.id, content=f"Comment {i}"))
+        db.add(Document(
+            workspace_id=workspace.id, project_id=project.id, title=f"Doc {i}", content="...", created_by=user.id
+        ))
+
+    db.commit()
+    return {
+        "owner": owner,
+        "workspace_id": workspace.id,
+        "project_id": project.id,
+        "task_id": task.id,
+    }
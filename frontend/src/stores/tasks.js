@@ -27,6 +27,26 @@ export const useTasksStore = defineStore('tasks', () => {
     }
   }
 
+  async function fetchBoard(projectId) {
+    loading.value = true
+    try {
+      const response = await api.get(`/projects/${projectId}/board`)
+      const { columns, users } = response.data
+      tasks.value = Object.entries(columns).flatMap(([status, column]) =>
+        column.tasks.map(card => ({
+          ...card,
+          status,
+          project_id: projectId,
+          assignee_name: users[card.assignee_id]?.display_name ?? null,
+          creator_name: users[card.created_by]?.display_name ?? null
+        }))
+      )
+      return response.data
+    } finally {
+      loading.value = false
+    }
+  }
+
   async function fetchTask(id) {
     const response = await api.get(`/tasks/${id}`)
     return response.data
@@ -74,6 +94,7 @@ export const useTasksStore = defineStore('tasks', () => {
     loading,
     tasksByStatus,
     fetchTasks,
+    fetchBoard,
     fetchTask,
     createTask,
     updateTask,
@@ -5,6 +5,8 @@ import api from '@/services/api'
 export const useWorkspacesStore = defineStore('workspaces', () => {
   const workspaces = ref([])
   const currentWorkspace = ref(null)
+  const members = ref([])
+  const membersCursor = ref(null)
   const loading = ref(false)
 
   async function fetchWorkspaces() {
@@ -29,6 +31,17 @@ export const useWorkspacesStore = defineStore('workspaces', () => {
     }
   }
 
+  async function fetchMembers(workspaceId, { more = false } = {}) {
+    const params = {}
+    if (more && membersCursor.value) {
+      params.cursor = membersCursor.value
+    }
+    const response = await api.get(`/workspaces/${workspaceId}/members`, { params })
+    members.value = more ? [...members.value, ...response.data.items] : response.data.items
+    membersCursor.value = response.data.next_cursor
+    return members.value
+  }
+
   async function createWorkspace(data) {
     const response = await api.post('/workspaces/', data)
     workspaces.value.push(response.data)
@@ -61,7 +74,8 @@ export const useWorkspacesStore = defineStore('workspaces', () => {
       role
     })
     if (currentWorkspace.value?.id === workspaceId) {
-      currentWorkspace.value.members.push(response.data)
+      members.value.push(response.data)
+      currentWorkspace.value.member_count += 1
     }
     return response.data
   }
@@ -69,18 +83,20 @@ export const useWorkspacesStore = defineStore('workspaces', () => {
   async function removeMember(workspaceId, userId) {
     await api.delete(`/workspaces/${workspaceId}/members/${userId}`)
     if (currentWorkspace.value?.id === workspaceId) {
-      currentWorkspace.value.members = currentWorkspace.value.members.filter(
-        m => m.user_id !== userId
-      )
+      members.value = members.value.filter(m => m.user_id !== userId)
+      currentWorkspace.value.member_count -= 1
     }
   }
 
   return {
     workspaces,
     currentWorkspace,
+    members,
+    membersCursor,
     loading,
     fetchWorkspaces,
     fetchWorkspace,
+    fetchMembers,
     createWorkspace,
     updateWorkspace,
     deleteWorkspace,